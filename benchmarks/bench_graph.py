@@ -0,0 +1,279 @@
+"""
+Benchmark of graph building and rendering on synthetic schemas.
+
+For every requested size a throwaway project with N apps of M models
+each is generated in temporary directory and measured in separate
+process, since django can only be set up once per process.
+
+    python benchmarks/bench_graph.py --sizes 10x10 50x100 --output bench.json
+    python benchmarks/bench_graph.py --sizes 10x10 --baseline bench.json
+
+With `--baseline` exits with status 1 if any phase got slower than
+baseline by more than `--tolerance`.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_VERSION = 1
+MIN_REGRESSION_SECONDS = 0.005
+"""Differences below this are noise on any machine."""
+
+
+def generate_project(
+    directory: Path,
+    apps_count: int,
+    models_per_app: int,
+    fk_density: float,
+    m2m_density: float,
+    abstract_depth: int,
+    self_ref_ratio: float,
+    seed: int,
+):
+    rng = random.Random(seed)
+    app_labels = [f'bench_app_{i}' for i in range(apps_count)]
+
+    def random_target() -> str:
+        return f'{rng.choice(app_labels)}.Model{rng.randrange(models_per_app)}'
+
+    def relation_count(density: float) -> int:
+        whole = int(density)
+        return whole + (rng.random() < density - whole)
+
+    for app_label in app_labels:
+        app = directory / app_label
+        app.mkdir()
+        (app / '__init__.py').write_text('')
+        lines = ['from django.db import models', '', '']
+        parent = 'models.Model'
+        for depth in range(abstract_depth):
+            lines += [
+                f'class Base{depth}({parent}):',
+                f'    base_field_{depth} = models.IntegerField(default=0)',
+                '',
+                '    class Meta:',
+                '        abstract = True',
+                '',
+                '',
+            ]
+            parent = f'Base{depth}'
+
+        for i in range(models_per_app):
+            lines += [
+                f'class Model{i}({parent}):',
+                '    name = models.CharField(max_length=64)',
+            ]
+            for j in range(relation_count(fk_density)):
+                lines.append(
+                    f"    fk_{j} = models.ForeignKey('{random_target()}', "
+                    "on_delete=models.CASCADE, related_name='+')"
+                )
+            for j in range(relation_count(m2m_density)):
+                lines.append(
+                    f"    m2m_{j} = models.ManyToManyField('{random_target()}', related_name='+')"
+                )
+            if rng.random() < self_ref_ratio:
+                lines.append(
+                    "    parent = models.ForeignKey('self', null=True, "
+                    "on_delete=models.SET_NULL, related_name='+')"
+                )
+            lines += ['', '']
+        (app / 'models.py').write_text('\n'.join(lines))
+
+    installed_apps = [
+        'django.contrib.contenttypes',
+        'django.contrib.auth',
+        *app_labels,
+    ]
+    (directory / 'bench_settings.py').write_text(
+        f'SECRET_KEY = "bench"\n'
+        f'INSTALLED_APPS = {installed_apps!r}\n'
+        'DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}\n'
+        'DEFAULT_AUTO_FIELD = "django.db.models.AutoField"\n'
+        'USE_TZ = True\n'
+    )
+
+
+def measure(phase: Callable, repeat: int) -> dict:
+    seconds = min(_timed(phase) for _ in range(repeat))
+    tracemalloc.start()
+    try:
+        phase()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': seconds, 'peak_bytes': peak}
+
+
+def _timed(phase: Callable) -> float:
+    start = time.perf_counter()
+    phase()
+    return time.perf_counter() - start
+
+
+def run_worker(repeat: int) -> dict:
+    start = time.perf_counter()
+    import django
+    django.setup()
+    setup_seconds = time.perf_counter() - start
+
+    from django.apps import apps
+    from django_d2_models.graph_builder import (
+        GraphModelBuilder, InheritanceRelationBuilder, ModelExportConfig,
+    )
+    from django_d2_models.renderer import GraphRenderer
+
+    config = ModelExportConfig()
+    builder = GraphModelBuilder(config)
+    graph = builder.build_graph()
+    nodes = [
+        model
+        for app_name, models in apps.all_models.items()
+        if builder.should_export_app(app_name)
+        for model in models.values()
+        if builder.should_export_model(model)
+    ]
+
+    def inheritance():
+        inheritance_builder = InheritanceRelationBuilder(config.abstract_models_depth)
+        for model in nodes:
+            inheritance_builder.add_model(model)
+
+    def render():
+        GraphRenderer().write_model_graph(graph, io.StringIO())
+
+    return {
+        'models': len(graph.nodes),
+        'relations': len(graph.relations),
+        'phases': {
+            'setup': {'seconds': setup_seconds},
+            'build_graph': measure(lambda: GraphModelBuilder(config).build_graph(), repeat),
+            'inheritance': measure(inheritance, repeat),
+            'render': measure(render, repeat),
+        },
+    }
+
+
+def run_size(args, apps_count: int, models_per_app: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix='d2_bench_') as directory:
+        generate_project(
+            Path(directory),
+            apps_count,
+            models_per_app,
+            fk_density=args.fk_density,
+            m2m_density=args.m2m_density,
+            abstract_depth=args.abstract_depth,
+            self_ref_ratio=args.self_refs,
+            seed=args.seed,
+        )
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE='bench_settings',
+            PYTHONPATH=os.pathsep.join([directory, str(REPO_ROOT), os.environ.get('PYTHONPATH', '')]),
+        )
+        process = subprocess.run(
+            [sys.executable, __file__, '--worker', '--repeat', str(args.repeat)],
+            env=env,
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+    result = json.loads(process.stdout)
+    result['size'] = f'{apps_count}x{models_per_app}'
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    baseline_sizes = {result['size']: result for result in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        base = baseline_sizes.get(result['size'])
+        if base is None:
+            continue
+        for phase, current in result['phases'].items():
+            previous = base['phases'].get(phase)
+            if previous is None:
+                continue
+            limit = previous['seconds'] * (1 + tolerance)
+            if current['seconds'] > limit and current['seconds'] - previous['seconds'] > MIN_REGRESSION_SECONDS:
+                regressions.append(
+                    f"{result['size']} {phase}: {current['seconds']:.4f}s "
+                    f"(baseline {previous['seconds']:.4f}s)"
+                )
+    return regressions
+
+
+def parse_size(value: str) -> tuple[int, int]:
+    try:
+        apps_count, models_per_app = map(int, value.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Size must look like 10x100, got {value!r}')
+    return apps_count, models_per_app
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', type=parse_size, default=[(10, 10), (10, 100), (50, 200)],
+                        help='Schema sizes as APPSxMODELS_PER_APP.')
+    parser.add_argument('--fk-density', type=float, default=2.0, help='Average foreign keys per model.')
+    parser.add_argument('--m2m-density', type=float, default=0.2, help='Average many-to-many fields per model.')
+    parser.add_argument('--abstract-depth', type=int, default=2, help='Depth of abstract base chain.')
+    parser.add_argument('--self-refs', type=float, default=0.1, help='Share of models referencing themselves.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='Timing is the best of this many runs.')
+    parser.add_argument('--output', help='Write results as JSON into file.')
+    parser.add_argument('--baseline', help='Compare results against previously written JSON.')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown.')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        json.dump(run_worker(args.repeat), sys.stdout)
+        return
+
+    results = {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'options': {
+            'fk_density': args.fk_density,
+            'm2m_density': args.m2m_density,
+            'abstract_depth': args.abstract_depth,
+            'self_refs': args.self_refs,
+            'seed': args.seed,
+        },
+        'results': [],
+    }
+    for apps_count, models_per_app in args.sizes:
+        result = run_size(args, apps_count, models_per_app)
+        results['results'].append(result)
+        phases = ', '.join(
+            f"{phase} {data['seconds']:.3f}s" + (f" {data['peak_bytes'] / 2**20:.1f}MiB" if 'peak_bytes' in data else '')
+            for phase, data in result['phases'].items()
+        )
+        print(f"{result['size']} ({result['models']} models): {phases}", file=sys.stderr)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Merges parallel relations between the same pair of models.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, Union
+
+from .graph import BaseRelation, Relation
+
+
+@dataclass(frozen=True)
+class AggregatedRelation(BaseRelation):
+    relations: tuple[Relation, ...]
+
+    @property
+    def count(self) -> int:
+        return len(self.relations)
+
+    @property
+    def source_fields(self) -> list[str]:
+        return [relation.source_field for relation in self.relations]
+
+
+def aggregate_relations(relations: Iterable[Relation]) -> list[Union[Relation, AggregatedRelation]]:
+    """
+    Groups relations by ordered (source, target) model pair in one
+    pass. Pairs with single relation are returned as is, in order of
+    first occurrence of each pair.
+    """
+    groups: dict[tuple[str, str], list[Relation]] = {}
+    for relation in relations:
+        key = (relation.source_model, relation.target_model)
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [relation]
+        else:
+            group.append(relation)
+
+    return [
+        group[0] if len(group) == 1 else AggregatedRelation(
+            source_model=source,
+            target_model=target,
+            relations=tuple(group),
+        )
+        for (source, target), group in groups.items()
+    ]
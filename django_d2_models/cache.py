@@ -0,0 +1,163 @@
+"""
+On-disk cache of built graphs and rendered diagrams.
+
+Entries are keyed by export options and by fingerprint of model
+definitions, so any change in models makes cached diagram stale.
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Type, Optional, Iterator, TextIO
+
+from django.apps import apps
+from django.apps.registry import Apps
+from django.db.models import Model
+
+from .compact import CompactGraph
+from .graph_builder import ModelExportConfig, is_abstract_model, model_indexes, on_delete_name
+
+
+GRAPH_SUFFIX = '.graph'
+
+UNREADABLE_ENTRY_ERRORS = (
+    pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError, TypeError, ValueError,
+)
+"""
+Errors of unpickling truncated entries or entries of other package
+versions, whose classes have moved or changed.
+"""
+
+CACHE_FORMAT_VERSION = 7
+"""
+Bump when rendered output or graph format changes, so entries
+cached by previous versions are not reused.
+"""
+
+
+def model_registry_fingerprint(registry: Apps = apps) -> str:
+    """
+    Hash of all registered model definitions: app labels, field names
+    and types, relation targets and `on_delete`, abstract bases and
+    indexes.
+    """
+    digest = hashlib.sha256(f'version:{CACHE_FORMAT_VERSION}\n'.encode())
+    for app_label in sorted(registry.all_models):
+        digest.update(f'app:{app_label}\n'.encode())
+        models = registry.all_models[app_label]
+        for model_name in sorted(models):
+            for line in _describe_model(models[model_name]):
+                digest.update(line.encode())
+                digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def _describe_model(model: Type[Model]) -> Iterator[str]:
+    yield f'model:{model._meta.label}'
+    for base in model.__mro__[1:]:
+        if is_abstract_model(base):
+            yield f'base:{base.__module__}.{base.__qualname__}'
+    for parent in model._meta.parents:
+        yield f'parent:{parent._meta.label}'
+    if model._meta.proxy:
+        yield f'proxy:{model._meta.proxy_for_model._meta.label}'
+    for field in model._meta.get_fields(include_hidden=True):
+        if field.auto_created and not field.concrete:
+            continue
+        field_class = field.__class__
+        related = field.related_model
+        if related is not None and not isinstance(related, str):
+            related = related._meta.label
+        yield f'field:{field.name}:{field_class.__module__}.{field_class.__qualname__}:{related}:{field.null}'
+        if field.is_relation and field.concrete:
+            yield f'on_delete:{on_delete_name(field)}'
+    for index in model_indexes(model):
+        yield f'index:{",".join(index.fields)}:{index.unique}:{index.name}'
+
+
+def config_key(config: ModelExportConfig) -> str:
+    options = json.dumps(dataclasses.asdict(config), sort_keys=True)
+    return hashlib.sha256(options.encode()).hexdigest()[:16]
+
+
+class DiagramCache:
+    """
+    Stores one rendered diagram and one built graph per export config.
+    Entry file name contains registry fingerprint, entries with other
+    fingerprints are removed once new entry for the same config is stored.
+    """
+
+    def __init__(self, directory: str):
+        self._directory = Path(directory)
+
+    def entry_path(self, config: ModelExportConfig, fingerprint: str, suffix: str = '.d2') -> Path:
+        return self._directory / f'{config_key(config)}-{fingerprint}{suffix}'
+
+    def get(self, config: ModelExportConfig, fingerprint: str) -> Optional[Path]:
+        path = self.entry_path(config, fingerprint)
+        if path.exists():
+            return path
+        return None
+
+    def store(self, config: ModelExportConfig, fingerprint: str) -> 'CacheWriter':
+        """
+        Returns context manager providing file to write diagram into.
+        Entry becomes visible only after writing successfully finished.
+        """
+        return CacheWriter(self, config, fingerprint)
+
+    def get_graph(self, config: ModelExportConfig, fingerprint: str) -> Optional[CompactGraph]:
+        path = self.entry_path(config, fingerprint, GRAPH_SUFFIX)
+        try:
+            with open(path, 'rb') as file:
+                graph = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except UNREADABLE_ENTRY_ERRORS:
+            graph = None
+        if not isinstance(graph, CompactGraph):
+            path.unlink(missing_ok=True)
+            return None
+        return graph
+
+    def store_graph(self, config: ModelExportConfig, fingerprint: str, graph: CompactGraph):
+        path = self.entry_path(config, fingerprint, GRAPH_SUFFIX)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump(graph, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.discard_stale(config, fingerprint, GRAPH_SUFFIX)
+
+    def discard_stale(self, config: ModelExportConfig, fingerprint: str, suffix: str = '.d2'):
+        current = self.entry_path(config, fingerprint, suffix)
+        for path in self._directory.glob(f'{config_key(config)}-*{suffix}'):
+            if path != current:
+                path.unlink(missing_ok=True)
+
+
+class CacheWriter:
+    def __init__(self, cache: DiagramCache, config: ModelExportConfig, fingerprint: str):
+        self._cache = cache
+        self._config = config
+        self._fingerprint = fingerprint
+        self._file: Optional[TextIO] = None
+        self.path = cache.entry_path(config, fingerprint)
+
+    def __enter__(self) -> TextIO:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        self._file = os.fdopen(fd, 'w', encoding='utf-8')
+        return self._file
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is not None:
+            os.unlink(self._tmp_path)
+            return
+        os.replace(self._tmp_path, self.path)
+        self._cache.discard_stale(self._config, self._fingerprint)
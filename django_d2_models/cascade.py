@@ -0,0 +1,269 @@
+"""
+Fan-out of deletes through `on_delete` handlers.
+
+Deleting a row deletes rows of models referencing it with CASCADE,
+which in turn delete their referencing rows, and updates rows
+referencing any of them with SET_NULL, SET_DEFAULT or SET. Relations
+declared on abstract models apply to concrete models inheriting them.
+
+Cascade graph is condensed into strongly connected components with
+iterative Tarjan algorithm, so cycles (e.g. self-referencing trees)
+are found in linear time and depth is computed over acyclic
+condensation.
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional, TextIO
+
+from .graph import BaseRelation, ModelGraph, ModelView, Relation, concrete_labels
+from .overlay import Overlay
+
+
+CASCADE = 'CASCADE'
+UPDATING = {'SET_NULL', 'SET_DEFAULT', 'SET'}
+
+CHAIN_STROKE = '"#c0392b"'
+ROOT_FILL = '"#fadbd8"'
+
+
+@dataclass
+class CascadeEdge:
+    target: int
+    """Node deleted or updated when source node is deleted."""
+    relation: Relation
+
+
+@dataclass
+class DeleteFanOut:
+    label: str
+    deleted: list[str] = field(default_factory=list)
+    """Models whose rows are deleted transitively, excluding model itself."""
+    updated: list[str] = field(default_factory=list)
+    """Models whose rows are updated by SET_NULL, SET_DEFAULT or SET."""
+    depth: int = 0
+    """Length of the longest chain of cascades, cycles counted once."""
+    cyclic: bool = False
+    """Whether delete reaches a cascade cycle, so its depth depends on data."""
+    chain: list[Relation] = field(default_factory=list)
+    """Relations of the longest chain."""
+    path: list[str] = field(default_factory=list)
+    """Models deleted along the longest chain, with fields referencing previous one."""
+
+    @property
+    def touched(self) -> int:
+        return len(self.deleted) + len(self.updated)
+
+
+class CascadeIndex:
+    """
+    Reverse-cascade index: for each model, models which are deleted
+    or updated when its row is deleted.
+    """
+
+    def __init__(self, graph: ModelGraph):
+        self.labels: list[str] = []
+        self._ids: dict[str, int] = {}
+        for node in graph.nodes:
+            if not node.model._meta.abstract:
+                self._id(node.model._meta.label)
+
+        concrete = concrete_labels(graph)
+        edges = []
+        for relation in graph.relations:
+            if relation.on_delete != CASCADE and relation.on_delete not in UPDATING:
+                continue
+            target = self._id(relation.target_model)
+            for source in concrete.get(relation.source_model, [relation.source_model]):
+                edges.append((target, CascadeEdge(self._id(source), relation)))
+
+        self.cascades: list[list[CascadeEdge]] = [[] for _ in self.labels]
+        self.updates: list[list[CascadeEdge]] = [[] for _ in self.labels]
+        for target, edge in edges:
+            if edge.relation.on_delete == CASCADE:
+                self.cascades[target].append(edge)
+            else:
+                self.updates[target].append(edge)
+
+    def _id(self, label: str) -> int:
+        node_id = self._ids.get(label)
+        if node_id is None:
+            node_id = self._ids[label] = len(self.labels)
+            self.labels.append(label)
+        return node_id
+
+    def components(self) -> list[int]:
+        """
+        Strongly connected component of each node over cascade edges.
+        Components are numbered in reverse topological order: cascades
+        only lead to components with smaller or the same number.
+        """
+        count = len(self.labels)
+        index = [-1] * count
+        low = [0] * count
+        component = [-1] * count
+        on_stack = [False] * count
+        stack: list[int] = []
+        counter = 0
+        components = 0
+
+        for root in range(count):
+            if index[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, edge_position = work.pop()
+                if edge_position == 0:
+                    index[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                edges = self.cascades[node]
+                while edge_position < len(edges):
+                    target = edges[edge_position].target
+                    edge_position += 1
+                    if index[target] == -1:
+                        work.append((node, edge_position))
+                        work.append((target, 0))
+                        break
+                    if on_stack[target]:
+                        low[node] = min(low[node], index[target])
+                else:
+                    if low[node] == index[node]:
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = False
+                            component[member] = components
+                            if member == node:
+                                break
+                        components += 1
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+        return component
+
+    def fan_out(self) -> list[DeleteFanOut]:
+        """
+        Delete fan-out of every concrete model, computed per component
+        in topological order with reachable sets kept as bit masks.
+        """
+        component = self.components()
+        count = max(component, default=-1) + 1
+        members: list[list[int]] = [[] for _ in range(count)]
+        for node, item in enumerate(component):
+            members[item].append(node)
+
+        reached = [0] * count
+        updated = [0] * count
+        depth = [0] * count
+        cyclic = [False] * count
+        best: list[Optional[CascadeEdge]] = [None] * count
+        for item in range(count):
+            mask = 0
+            for node in members[item]:
+                mask |= 1 << node
+            reached[item] = mask
+            cyclic[item] = len(members[item]) > 1
+            for node in members[item]:
+                for edge in self.updates[node]:
+                    updated[item] |= 1 << edge.target
+                for edge in self.cascades[node]:
+                    target = component[edge.target]
+                    if target == item:
+                        cyclic[item] = True
+                        continue
+                    reached[item] |= reached[target]
+                    updated[item] |= updated[target]
+                    cyclic[item] = cyclic[item] or cyclic[target]
+                    if best[item] is None or depth[target] + 1 > depth[item]:
+                        depth[item] = depth[target] + 1
+                        best[item] = edge
+
+        result = []
+        for node, label in enumerate(self.labels):
+            item = component[node]
+            deleted = reached[item] & ~(1 << node)
+            chain = []
+            path = []
+            current = item
+            while best[current] is not None:
+                edge = best[current]
+                chain.append(edge.relation)
+                path.append(f'{self.labels[edge.target]}.{edge.relation.source_field}')
+                current = component[edge.target]
+            result.append(DeleteFanOut(
+                label=label,
+                deleted=self._labels_of(deleted),
+                updated=self._labels_of(updated[item] & ~reached[item]),
+                depth=depth[item],
+                cyclic=cyclic[item],
+                chain=chain,
+                path=path,
+            ))
+        return result
+
+    def _labels_of(self, mask: int) -> list[str]:
+        result = []
+        while mask:
+            lowest = mask & -mask
+            result.append(self.labels[lowest.bit_length() - 1])
+            mask ^= lowest
+        return result
+
+
+def worst_fan_outs(graph: ModelGraph, limit: Optional[int] = None) -> list[DeleteFanOut]:
+    """
+    Models with at least one cascade, worst first: reaching cycles,
+    then touching most models, then with deepest chains.
+    """
+    items = [item for item in CascadeIndex(graph).fan_out() if item.deleted or item.cyclic]
+    items.sort(key=lambda item: (not item.cyclic, -item.touched, -item.depth, item.label))
+    return items[:limit] if limit is not None else items
+
+
+class CascadeOverlay(Overlay):
+    """
+    Highlights longest cascade chains of the worst `limit` models.
+    """
+
+    def __init__(self, graph: ModelGraph, limit: int = 5):
+        self._fan_outs = {item.label: item for item in CascadeIndex(graph).fan_out()}
+        worst = worst_fan_outs(graph, limit)
+        self._roots = {item.label for item in worst}
+        self._chain = {relation for item in worst for relation in item.chain}
+
+    def model_attributes(self, model: ModelView) -> dict[str, str]:
+        label = model.model._meta.label
+        item = self._fan_outs.get(label)
+        if item is None or not (item.deleted or item.cyclic):
+            return {}
+        tooltip = (
+            f'"delete cascades to {len(item.deleted)} models'
+            f'{" through cycle" if item.cyclic else ""}, depth {item.depth}, '
+            f'updates {len(item.updated)}"'
+        )
+        if label in self._roots:
+            return {'style.fill': ROOT_FILL, 'style.stroke': CHAIN_STROKE, 'tooltip': tooltip}
+        return {'tooltip': tooltip}
+
+    def relation_attributes(self, relation: BaseRelation) -> dict[str, str]:
+        relations = getattr(relation, 'relations', (relation,))
+        if any(item in self._chain for item in relations):
+            return {'style.stroke': CHAIN_STROKE, 'style.stroke-width': '4', 'style.animated': 'true'}
+        return {}
+
+
+def write_cascade_report(graph: ModelGraph, sink: TextIO, limit: Optional[int] = 20):
+    items = worst_fan_outs(graph, limit)
+    if not items:
+        sink.write('No cascade deletes.\n')
+        return
+    for item in items:
+        sink.write(
+            f'{item.label}: deletes {len(item.deleted)}, updates {len(item.updated)}, '
+            f'depth {item.depth}{", reaches cycle" if item.cyclic else ""}\n'
+        )
+        sink.write(f'  longest chain: {" <- ".join([item.label, *item.path])}\n')
+        if item.deleted:
+            sink.write(f'  deletes: {", ".join(item.deleted)}\n')
+        if item.updated:
+            sink.write(f'  updates: {", ".join(item.updated)}\n')
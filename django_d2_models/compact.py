@@ -0,0 +1,303 @@
+"""
+Compact django-free graph representation.
+
+Labels and field names are interned and addressed by integer ids,
+edges are stored in parallel arrays with forward and reverse
+adjacency index in CSR form. Unlike `ModelGraph` it holds no model
+classes, so it is cheap to pickle and to query on large schemas.
+"""
+
+import sys
+from array import array
+from typing import Optional, Iterator, Sequence
+
+from .detached import DetachedField, DetachedModel, DetachedOptions
+from .graph import Index, ModelGraph, ModelView, Relation, RelationKind, InheritanceKind, InheritanceRelation
+
+
+INHERITANCE = 3
+"""Edge kind codes of inheritance edges start from this one."""
+INHERITANCE_CODES = {
+    InheritanceKind.ABSTRACT: INHERITANCE,
+    InheritanceKind.MULTI_TABLE: INHERITANCE + 1,
+    InheritanceKind.PROXY: INHERITANCE + 2,
+}
+INHERITANCE_KINDS = {code: kind for kind, code in INHERITANCE_CODES.items()}
+
+KIND_CODES = {
+    RelationKind.FOREIGN_KEY: 0,
+    RelationKind.ONE_TO_ONE: 1,
+    RelationKind.MANY_TO_MANY: 2,
+}
+KINDS = {code: kind for kind, code in KIND_CODES.items()}
+
+PRIMARY_KEY = 1
+NULL = 2
+MANY_TO_ONE = 4
+ONE_TO_ONE = 8
+MANY_TO_MANY = 16
+
+
+class CompactField:
+    __slots__ = ('name', 'internal_type', 'flags', 'related')
+
+    def __init__(self, name: str, internal_type: str, flags: int, related: int):
+        self.name = name
+        self.internal_type = internal_type
+        self.flags = flags
+        self.related = related
+        """Node id of related model or -1."""
+
+
+class CompactNode:
+    __slots__ = ('id', 'label', 'db_table', 'abstract', 'fields', 'indexes', 'parent_joins')
+
+    def __init__(
+        self,
+        id: int,
+        label: str,
+        db_table: str,
+        abstract: bool,
+        fields: tuple,
+        indexes: Optional[tuple[Index, ...]] = None,
+        parent_joins: int = 0,
+    ):
+        self.id = id
+        self.label = label
+        self.db_table = db_table
+        self.abstract = abstract
+        self.fields: tuple[CompactField, ...] = fields
+        self.indexes = indexes
+        self.parent_joins = parent_joins
+
+
+class CompactGraph:
+    def __init__(self):
+        self.labels: list[str] = []
+        self._label_ids: dict[str, int] = {}
+        self.nodes: list[Optional[CompactNode]] = []
+        """
+        Indexed by node id. Models which are only referenced,
+        but not exported, have no node.
+        """
+        self.node_order: list[int] = []
+
+        self.edge_source = array('i')
+        self.edge_target = array('i')
+        self.edge_kind = array('b')
+        self.edge_null = array('b')
+        self.edge_on_delete: list[Optional[str]] = []
+        self.edge_through: list[Optional[str]] = []
+        self.edge_source_field: list[str] = []
+        self.edge_target_field: list[str] = []
+
+        self._out_offsets = array('i', [0])
+        self._out_edges = array('i')
+        self._in_offsets = array('i', [0])
+        self._in_edges = array('i')
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def intern_label(self, label: str) -> int:
+        node_id = self._label_ids.get(label)
+        if node_id is None:
+            node_id = len(self.labels)
+            self.labels.append(sys.intern(label))
+            self.nodes.append(None)
+            self._label_ids[label] = node_id
+        return node_id
+
+    def node_id(self, label: str) -> Optional[int]:
+        return self._label_ids.get(label)
+
+    def add_node(
+        self,
+        label: str,
+        db_table: str,
+        abstract: bool,
+        fields: Sequence[CompactField],
+        indexes: Optional[Sequence[Index]] = None,
+        parent_joins: int = 0,
+    ) -> CompactNode:
+        node_id = self.intern_label(label)
+        if indexes is not None:
+            indexes = tuple(indexes)
+        node = CompactNode(node_id, self.labels[node_id], db_table, abstract, tuple(fields), indexes, parent_joins)
+        self.nodes[node_id] = node
+        self.node_order.append(node_id)
+        return node
+
+    def add_edge(
+        self,
+        source: int,
+        target: int,
+        kind: int,
+        source_field: str = '',
+        target_field: str = '',
+        null: bool = False,
+        on_delete: Optional[str] = None,
+        through: Optional[str] = None,
+    ):
+        self.edge_source.append(source)
+        self.edge_target.append(target)
+        self.edge_kind.append(kind)
+        self.edge_null.append(null)
+        self.edge_on_delete.append(sys.intern(on_delete) if on_delete else None)
+        self.edge_through.append(through)
+        self.edge_source_field.append(sys.intern(source_field))
+        self.edge_target_field.append(sys.intern(target_field))
+
+    def build_index(self):
+        """
+        Builds adjacency index. Must be called after all edges added.
+        """
+        self._out_offsets, self._out_edges = self._csr(self.edge_source)
+        self._in_offsets, self._in_edges = self._csr(self.edge_target)
+
+    def _csr(self, endpoints: array) -> tuple[array, array]:
+        offsets = array('i', bytes(4 * (len(self.labels) + 1)))
+        for node_id in endpoints:
+            offsets[node_id + 1] += 1
+        for i in range(len(self.labels)):
+            offsets[i + 1] += offsets[i]
+        position = array('i', offsets[:-1])
+        edges = array('i', bytes(4 * len(endpoints)))
+        for edge_id, node_id in enumerate(endpoints):
+            edges[position[node_id]] = edge_id
+            position[node_id] += 1
+        return offsets, edges
+
+    def out_edges(self, node_id: int) -> array:
+        return self._out_edges[self._out_offsets[node_id]:self._out_offsets[node_id + 1]]
+
+    def in_edges(self, node_id: int) -> array:
+        return self._in_edges[self._in_offsets[node_id]:self._in_offsets[node_id + 1]]
+
+    def neighbours(self, node_id: int) -> Iterator[int]:
+        """
+        Nodes connected with given one by forward or reverse edge.
+        """
+        for edge_id in self.out_edges(node_id):
+            yield self.edge_target[edge_id]
+        for edge_id in self.in_edges(node_id):
+            yield self.edge_source[edge_id]
+
+    @classmethod
+    def from_model_graph(cls, graph: ModelGraph) -> 'CompactGraph':
+        result = cls()
+        for view in graph.nodes:
+            result.intern_label(view.model._meta.label)
+        for view in graph.nodes:
+            meta = view.model._meta
+            result.add_node(
+                label=meta.label,
+                db_table=meta.db_table,
+                abstract=meta.abstract,
+                fields=[result._compact_field(view, field_) for field_ in view.fields],
+                indexes=view.indexes,
+                parent_joins=view.parent_joins,
+            )
+        for relation in graph.relations:
+            result.add_edge(
+                result.intern_label(relation.source_model),
+                result.intern_label(relation.target_model),
+                KIND_CODES[relation.kind],
+                relation.source_field,
+                relation.target_field,
+                relation.allow_null,
+                relation.on_delete,
+                relation.through,
+            )
+        for relation in graph.inheritance:
+            result.add_edge(
+                result.intern_label(relation.source_model),
+                result.intern_label(relation.target_model),
+                INHERITANCE_CODES[relation.kind],
+            )
+        result.build_index()
+        return result
+
+    def _compact_field(self, view: ModelView, field_) -> CompactField:
+        flags = (
+            PRIMARY_KEY * bool(field_.primary_key)
+            | NULL * bool(field_.null)
+            | MANY_TO_ONE * bool(field_.many_to_one)
+            | ONE_TO_ONE * bool(field_.one_to_one)
+            | MANY_TO_MANY * bool(field_.many_to_many)
+        )
+        related = -1
+        if field_.is_relation and field_.related_model is not None:
+            related = self.intern_label(related_label(view, field_.related_model))
+        return CompactField(sys.intern(field_.name), field_.get_internal_type(), flags, related)
+
+    def to_model_graph(self) -> ModelGraph:
+        """
+        Converts back to `ModelGraph` made of detached models.
+        """
+        models = {}
+        nodes = []
+        for node_id in self.node_order:
+            node = self.nodes[node_id]
+            app_label, object_name = node.label.split('.', 1)
+            fields = [
+                DetachedField(
+                    name=field_.name,
+                    internal_type=field_.internal_type,
+                    primary_key=bool(field_.flags & PRIMARY_KEY),
+                    null=bool(field_.flags & NULL),
+                    many_to_one=bool(field_.flags & MANY_TO_ONE),
+                    one_to_one=bool(field_.flags & ONE_TO_ONE),
+                    many_to_many=bool(field_.flags & MANY_TO_MANY),
+                    related_model=self.labels[field_.related] if field_.related >= 0 else None,
+                )
+                for field_ in node.fields
+            ]
+            models[node_id] = DetachedModel(DetachedOptions(
+                app_label=app_label,
+                object_name=object_name,
+                db_table=node.db_table,
+                abstract=node.abstract,
+                fields=fields,
+            ))
+            indexes = None if node.indexes is None else list(node.indexes)
+            nodes.append(ModelView(models[node_id], fields, indexes, node.parent_joins))
+
+        relations = []
+        inheritance = []
+        for edge_id in range(len(self.edge_source)):
+            source = self.labels[self.edge_source[edge_id]]
+            target = self.labels[self.edge_target[edge_id]]
+            kind = self.edge_kind[edge_id]
+            if kind >= INHERITANCE:
+                inheritance.append(InheritanceRelation(
+                    source_model=source,
+                    target_model=target,
+                    kind=INHERITANCE_KINDS[kind],
+                ))
+            else:
+                relations.append(Relation(
+                    source_model=source,
+                    source_field=self.edge_source_field[edge_id],
+                    target_model=target,
+                    target_field=self.edge_target_field[edge_id],
+                    kind=KINDS[kind],
+                    allow_null=bool(self.edge_null[edge_id]),
+                    on_delete=self.edge_on_delete[edge_id],
+                    through=self.edge_through[edge_id],
+                ))
+        return ModelGraph(nodes=nodes, inheritance=inheritance, relations=relations)
+
+
+def related_label(view: ModelView, related) -> str:
+    """
+    Label of related model. Related fields of abstract models may
+    keep unresolved string references.
+    """
+    if not isinstance(related, str):
+        return related._meta.label
+    if related == 'self':
+        return view.model._meta.label
+    if '.' not in related:
+        return f'{view.model._meta.app_label}.{related}'
+    return related
@@ -0,0 +1,114 @@
+"""
+Compiles d2 files into SVG with `d2` executable.
+
+Files are compiled in bounded pool of subprocesses. Compiled SVGs
+are cached by hash of their d2 source (including imported files),
+so unchanged files are never recompiled.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence
+
+
+IMPORT_RE = re.compile(r'@([\w./-]+)')
+
+
+class D2CompileError(Exception):
+    pass
+
+
+def source_key(path: Path, extra: Sequence[str] = ()) -> str:
+    """
+    Hash of d2 file together with files it imports.
+    """
+    digest = hashlib.sha256()
+    for item in extra:
+        digest.update(item.encode())
+        digest.update(b'\0')
+    _hash_source(path, digest, set())
+    return digest.hexdigest()
+
+
+def _hash_source(path: Path, digest, visited: set[Path]):
+    path = path.resolve()
+    if path in visited:
+        return
+    visited.add(path)
+    content = path.read_bytes()
+    digest.update(content)
+    for name in IMPORT_RE.findall(content.decode('utf-8', errors='replace')):
+        imported = path.parent / name
+        if imported.suffix != '.d2':
+            imported = imported.with_name(f'{imported.name}.d2')
+        if imported.is_file():
+            _hash_source(imported, digest, visited)
+
+
+class D2Compiler:
+    def __init__(
+        self,
+        binary: str = 'd2',
+        cache_dir: Optional[str] = None,
+        jobs: Optional[int] = None,
+        args: Sequence[str] = (),
+        timeout: Optional[float] = None,
+    ):
+        self._binary = binary
+        self._cache_dir = Path(cache_dir) if cache_dir else None
+        self._jobs = jobs or os.cpu_count() or 1
+        self._args = list(args)
+        self._timeout = timeout
+
+    def compile(self, sources: Sequence[Path]) -> list[Path]:
+        """
+        Compiles each source into SVG next to it. Returns SVG paths.
+        """
+        if self._cache_dir:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self._jobs) as executor:
+            return list(executor.map(self.compile_one, sources))
+
+    def compile_one(self, source: Path) -> Path:
+        source = Path(source)
+        target = source.with_suffix('.svg')
+        if self._cache_dir is None:
+            self._run(source, target)
+            return target
+
+        key = source_key(source, [self._binary, *self._args])
+        cached = self._cache_dir / f'{key}.svg'
+        if not cached.exists():
+            # d2 picks output format by extension, so it has to stay last.
+            tmp_path = cached.with_name(f'.{key}.{os.getpid()}.{threading.get_ident()}.svg')
+            try:
+                self._run(source, tmp_path)
+                os.replace(tmp_path, cached)
+            finally:
+                # Partial output of failed or timed out run.
+                tmp_path.unlink(missing_ok=True)
+        if not target.exists() or target.read_bytes() != cached.read_bytes():
+            shutil.copyfile(cached, target)
+        return target
+
+    def _run(self, source: Path, target: Path):
+        try:
+            process = subprocess.run(
+                [self._binary, *self._args, str(source), str(target)],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                timeout=self._timeout,
+            )
+        except OSError as e:
+            raise D2CompileError(f'Cannot run {self._binary}: {e}')
+        except subprocess.TimeoutExpired:
+            raise D2CompileError(f'{self._binary} timed out on {source} after {self._timeout} seconds')
+        if process.returncode != 0:
+            raise D2CompileError(f'{self._binary} failed on {source}:\n{process.stderr.strip()}')
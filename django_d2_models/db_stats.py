@@ -0,0 +1,181 @@
+"""
+Table sizes read from database catalog.
+
+Statistics of all exported tables are fetched with single catalog
+query per database, never with query per table.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Collection, Type
+
+from django.apps import apps
+from django.db import DatabaseError, connections, router
+from django.db.models import Model
+
+from .graph import ModelGraph, ModelView
+from .overlay import Overlay
+
+
+SIZE_FILLS = ['"#f1f8e9"', '"#dcedc8"', '"#fff59d"', '"#ffcc80"', '"#ef9a9a"']
+"""Node fills from smallest to largest tables."""
+
+
+class DbStatsError(Exception):
+    pass
+
+
+@dataclass
+class TableStats:
+    rows: int
+    table_bytes: int
+    index_bytes: int
+
+    @property
+    def total_bytes(self) -> int:
+        return self.table_bytes + self.index_bytes
+
+
+POSTGRESQL_QUERY = '''
+    SELECT c.relname,
+           CASE WHEN c.reltuples < 0 THEN COALESCE(s.n_live_tup, 0) ELSE c.reltuples::bigint END,
+           pg_table_size(c.oid),
+           pg_indexes_size(c.oid)
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    WHERE c.relkind IN ('r', 'p', 'm')
+      AND c.relname = ANY(%s)
+      AND n.nspname = ANY(current_schemas(false))
+'''
+
+SQLITE_QUERY = '''
+    SELECT m.tbl_name,
+           SUM(CASE WHEN m.type = 'table' AND d.pagetype = 'leaf' THEN d.ncell ELSE 0 END),
+           SUM(CASE WHEN m.type = 'table' THEN d.pgsize ELSE 0 END),
+           SUM(CASE WHEN m.type = 'index' THEN d.pgsize ELSE 0 END)
+    FROM sqlite_master m
+    JOIN dbstat d ON d.name = m.name
+    WHERE m.type IN ('table', 'index')
+    GROUP BY m.tbl_name
+'''
+"""
+Rows of rowid table are cells of its leaf pages, so SQLite row
+counts are exact. Requires SQLite built with dbstat virtual table.
+"""
+
+
+def fetch_table_stats(alias: str, tables: Collection[str]) -> dict[str, TableStats]:
+    """
+    Statistics of `tables` in database `alias`, by table name.
+    Tables missing in database are not included.
+    """
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        try:
+            if connection.vendor == 'postgresql':
+                cursor.execute(POSTGRESQL_QUERY, [list(tables)])
+            elif connection.vendor == 'sqlite':
+                cursor.execute(SQLITE_QUERY)
+            else:
+                raise DbStatsError(f'Database statistics are not supported for {connection.vendor} ({alias!r}).')
+            rows = cursor.fetchall()
+        except DatabaseError as e:
+            raise DbStatsError(f'Cannot read statistics of database {alias!r}: {e}')
+    tables = set(tables)
+    return {
+        name: TableStats(rows=int(count or 0), table_bytes=int(table or 0), index_bytes=int(index or 0))
+        for name, count, table, index in rows
+        if name in tables
+    }
+
+
+def registered_model(model) -> Type[Model]:
+    """
+    Model class registered for `model`, which can be detached stand-in,
+    e.g. of cached graph. Routers need real model classes. Raises
+    `LookupError` for models missing in registry.
+    """
+    if isinstance(model, type) and issubclass(model, Model):
+        return model
+    return apps.get_model(model._meta.label)
+
+
+def database_alias(model) -> str:
+    return router.db_for_read(registered_model(model))
+
+
+def collect_stats(graph: ModelGraph) -> dict[str, TableStats]:
+    """
+    Statistics of tables of non-abstract models, by model label.
+    Models are grouped by database they are read from.
+    """
+    tables: dict[str, dict[str, list[str]]] = {}
+    for node in graph.nodes:
+        meta = node.model._meta
+        if meta.abstract:
+            continue
+        try:
+            alias = database_alias(node.model)
+        except LookupError as e:
+            raise DbStatsError(f'Cannot find database of {meta.label}: {e}')
+        labels = tables.setdefault(alias, {}).setdefault(meta.db_table, [])
+        labels.append(meta.label)
+
+    result = {}
+    for alias, labels_by_table in tables.items():
+        for table, stats in fetch_table_stats(alias, labels_by_table).items():
+            for label in labels_by_table[table]:
+                result[label] = stats
+    return result
+
+
+def format_size(size: float) -> str:
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = 'TiB'
+    return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+
+
+def format_count(count: int) -> str:
+    for suffix in ('', 'k', 'M'):
+        if count < 1000:
+            return f'{count:.0f}{suffix}' if not suffix else f'{count:.1f}{suffix}'
+        count /= 1000
+    return f'{count:.1f}G'
+
+
+class DbStatsOverlay(Overlay):
+    """
+    Adds row count and sizes to model labels and colours models by
+    total size, on logarithmic scale from the smallest to the largest
+    table.
+    """
+
+    def __init__(self, stats: dict[str, TableStats]):
+        self._stats = stats
+        sizes = [max(item.total_bytes, 1) for item in stats.values()]
+        self._smallest = math.log(min(sizes, default=1))
+        self._largest = math.log(max(sizes, default=1))
+
+    def model_attributes(self, model: ModelView) -> dict[str, str]:
+        stats = self._stats.get(model.model._meta.label)
+        if stats is None:
+            return {}
+        meta = model.model._meta
+        return {
+            'label': (
+                f'"{meta.object_name}\\n{format_count(stats.rows)} rows, '
+                f'{format_size(stats.table_bytes)} + {format_size(stats.index_bytes)} indexes"'
+            ),
+            'style.fill': SIZE_FILLS[self.size_class(stats)],
+        }
+
+    def size_class(self, stats: TableStats) -> int:
+        if self._largest == self._smallest:
+            return 0
+        share = (math.log(max(stats.total_bytes, 1)) - self._smallest) / (self._largest - self._smallest)
+        return min(int(share * len(SIZE_FILLS)), len(SIZE_FILLS) - 1)
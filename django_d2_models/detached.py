@@ -0,0 +1,98 @@
+"""
+Lightweight stand-ins for django model classes and fields.
+
+They mirror the small part of django `Model._meta` and `Field`
+API used by renderer, so graphs can be built from sources other
+than live model registry: parsed source files, serialized graphs
+and so on.
+"""
+
+from typing import Optional, Sequence
+
+
+class DetachedField:
+    __slots__ = (
+        'name', 'internal_type', 'primary_key', 'null',
+        'many_to_one', 'one_to_one', 'many_to_many', 'related_model', 'on_delete', 'through',
+        'to_field',
+    )
+
+    def __init__(
+        self,
+        name: str,
+        internal_type: str,
+        primary_key: bool = False,
+        null: bool = False,
+        many_to_one: bool = False,
+        one_to_one: bool = False,
+        many_to_many: bool = False,
+        related_model: Optional[str] = None,
+        on_delete: Optional[str] = None,
+        through: Optional[str] = None,
+        to_field: Optional[str] = None,
+    ):
+        self.name = name
+        self.internal_type = internal_type
+        self.primary_key = primary_key
+        self.null = null
+        self.many_to_one = many_to_one
+        self.one_to_one = one_to_one
+        self.many_to_many = many_to_many
+        self.related_model = related_model
+        """Label of related model."""
+        self.on_delete = on_delete
+        """Name of `on_delete` handler of relation."""
+        self.through = through
+        """Label of explicit through model of many-to-many field."""
+        self.to_field = to_field
+        """Field of related model relation refers to, if not primary key."""
+
+    @property
+    def is_relation(self) -> bool:
+        return self.related_model is not None
+
+    def get_internal_type(self) -> str:
+        return self.internal_type
+
+    def __repr__(self):
+        return f'<DetachedField: {self.name}>'
+
+
+class DetachedOptions:
+    __slots__ = ('app_label', 'object_name', 'db_table', 'abstract', 'fields')
+
+    def __init__(
+        self,
+        app_label: str,
+        object_name: str,
+        db_table: str,
+        abstract: bool = False,
+        fields: Sequence[DetachedField] = (),
+    ):
+        self.app_label = app_label
+        self.object_name = object_name
+        self.db_table = db_table
+        self.abstract = abstract
+        self.fields = tuple(fields)
+
+    @property
+    def label(self) -> str:
+        return f'{self.app_label}.{self.object_name}'
+
+    @property
+    def model_name(self) -> str:
+        return self.object_name.lower()
+
+
+class DetachedModel:
+    """
+    Stands for model class, so `ModelView.model._meta` works the
+    same way as for django models.
+    """
+    __slots__ = ('_meta',)
+
+    def __init__(self, meta: DetachedOptions):
+        self._meta = meta
+
+    def __repr__(self):
+        return f'<DetachedModel: {self._meta.label}>'
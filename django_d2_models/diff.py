@@ -0,0 +1,295 @@
+"""
+Structural diff of two model graphs, e.g. graphs dumped with
+`model_diagram --dump-graph` before and after a pull request:
+
+    python -m django_d2_models.diff base.json head.json --output changes.d2
+    python -m django_d2_models.diff base.json head.json --report --exit-code
+
+Every model is reduced to hashable signature of its table and fields,
+and relations are compared as is, so diff takes single pass over
+both graphs.
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass, field, replace
+from typing import Hashable, Optional, Sequence, TextIO
+
+from .compact import related_label
+from .graph import BaseRelation, InheritanceRelation, ModelGraph, ModelView, Relation
+from .overlay import Overlay
+from .renderer import GraphRenderer
+from .serialization import GraphFormatError, load_graph
+
+
+ADDED_FILL = '"#d8f5d0"'
+ADDED_STROKE = '"#2b9348"'
+REMOVED_FILL = '"#fadbd8"'
+REMOVED_STROKE = '"#c0392b"'
+CHANGED_FILL = '"#fff3bf"'
+CHANGED_STROKE = '"#e67700"'
+
+
+def field_signature(node: ModelView, field_) -> tuple[Hashable, ...]:
+    related = None
+    if field_.is_relation and field_.related_model is not None:
+        related = related_label(node, field_.related_model)
+    return (
+        field_.get_internal_type(),
+        bool(field_.primary_key),
+        bool(field_.null),
+        related,
+    )
+
+
+def model_signature(node: ModelView, with_indexes: bool = True) -> tuple[Hashable, ...]:
+    """
+    Everything diff compares model by. Field and index order is ignored.
+    """
+    meta = node.model._meta
+    fields = sorted((field_.name, field_signature(node, field_)) for field_ in node.fields)
+    indexes = frozenset(node.indexes or ()) if with_indexes else None
+    return (meta.db_table, bool(meta.abstract), tuple(fields), indexes)
+
+
+@dataclass
+class ModelChange:
+    label: str
+    added_fields: list[str] = field(default_factory=list)
+    removed_fields: list[str] = field(default_factory=list)
+    changed_fields: list[str] = field(default_factory=list)
+
+
+@dataclass
+class GraphDiff:
+    added_models: list[str] = field(default_factory=list)
+    removed_models: list[str] = field(default_factory=list)
+    changed_models: list[ModelChange] = field(default_factory=list)
+    added_relations: list[BaseRelation] = field(default_factory=list)
+    """Both `Relation` and `InheritanceRelation`."""
+    removed_relations: list[BaseRelation] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (
+            self.added_models or self.removed_models or self.changed_models
+            or self.added_relations or self.removed_relations
+        )
+
+
+def diff_graphs(old: ModelGraph, new: ModelGraph) -> GraphDiff:
+    result = GraphDiff()
+    old_nodes = {node.model._meta.label: node for node in old.nodes}
+    new_labels = set()
+    for node in new.nodes:
+        label = node.model._meta.label
+        new_labels.add(label)
+        old_node = old_nodes.get(label)
+        if old_node is None:
+            result.added_models.append(label)
+            continue
+        # Indexes are only compared when both graphs know them.
+        with_indexes = old_node.indexes is not None and node.indexes is not None
+        if model_signature(old_node, with_indexes) != model_signature(node, with_indexes):
+            result.changed_models.append(diff_fields(old_node, node))
+    result.removed_models = [label for label in old_nodes if label not in new_labels]
+
+    # Same for `on_delete`, which graphs dumped by older versions lack.
+    with_on_delete = (
+        any(relation.on_delete for relation in old.relations)
+        and any(relation.on_delete for relation in new.relations)
+    )
+
+    def key(relation: BaseRelation) -> BaseRelation:
+        if with_on_delete or not isinstance(relation, Relation):
+            return relation
+        return replace(relation, on_delete=None)
+
+    old_relations = {key(relation) for relation in [*old.relations, *old.inheritance]}
+    new_relations = {key(relation) for relation in [*new.relations, *new.inheritance]}
+    result.added_relations = [
+        relation for relation in [*new.relations, *new.inheritance]
+        if key(relation) not in old_relations
+    ]
+    result.removed_relations = [
+        relation for relation in [*old.relations, *old.inheritance]
+        if key(relation) not in new_relations
+    ]
+    return result
+
+
+def diff_fields(old: ModelView, new: ModelView) -> ModelChange:
+    old_fields = {field_.name: field_signature(old, field_) for field_ in old.fields}
+    new_fields = {field_.name: field_signature(new, field_) for field_ in new.fields}
+    return ModelChange(
+        label=new.model._meta.label,
+        added_fields=[name for name in new_fields if name not in old_fields],
+        removed_fields=[name for name in old_fields if name not in new_fields],
+        changed_fields=[
+            name for name, signature in new_fields.items()
+            if name in old_fields and old_fields[name] != signature
+        ],
+    )
+
+
+def diff_view(old: ModelGraph, new: ModelGraph, diff: GraphDiff) -> ModelGraph:
+    """
+    Graph of changed models and their direct neighbours. Removed
+    models and fields are taken from `old`, so they can be shown too.
+    """
+    changed = {change.label: change for change in diff.changed_models}
+    highlighted = {*diff.added_models, *diff.removed_models, *changed}
+    for relation in [*diff.added_relations, *diff.removed_relations]:
+        highlighted.update((relation.source_model, relation.target_model))
+
+    shown = set(highlighted)
+    for relation in [*new.relations, *new.inheritance]:
+        if relation.source_model in highlighted or relation.target_model in highlighted:
+            shown.update((relation.source_model, relation.target_model))
+
+    old_nodes = {node.model._meta.label: node for node in old.nodes}
+    nodes = []
+    for node in new.nodes:
+        label = node.model._meta.label
+        if label not in shown:
+            continue
+        change = changed.get(label)
+        if change is not None and change.removed_fields:
+            removed = set(change.removed_fields)
+            old_fields = [field_ for field_ in old_nodes[label].fields if field_.name in removed]
+            node = ModelView(node.model, [*node.fields, *old_fields], node.indexes, node.parent_joins)
+        nodes.append(node)
+    nodes += [old_nodes[label] for label in diff.removed_models]
+
+    def touches_highlighted(relation: BaseRelation) -> bool:
+        return relation.source_model in highlighted or relation.target_model in highlighted
+
+    return ModelGraph(
+        nodes=nodes,
+        relations=[
+            *(relation for relation in new.relations if touches_highlighted(relation)),
+            *(relation for relation in diff.removed_relations if isinstance(relation, Relation)),
+        ],
+        inheritance=[
+            *(relation for relation in new.inheritance if touches_highlighted(relation)),
+            *(relation for relation in diff.removed_relations if isinstance(relation, InheritanceRelation)),
+        ],
+    )
+
+
+class DiffOverlay(Overlay):
+    """
+    Colours added elements green, removed red and changed yellow.
+    """
+
+    def __init__(self, diff: GraphDiff):
+        self._added_models = set(diff.added_models)
+        self._removed_models = set(diff.removed_models)
+        self._changes = {change.label: change for change in diff.changed_models}
+        self._added_relations = set(diff.added_relations)
+        self._removed_relations = set(diff.removed_relations)
+
+    def model_attributes(self, model: ModelView) -> dict[str, str]:
+        label = model.model._meta.label
+        if label in self._added_models:
+            return {'style.fill': ADDED_FILL, 'style.stroke': ADDED_STROKE}
+        if label in self._removed_models:
+            return {'style.fill': REMOVED_FILL, 'style.stroke': REMOVED_STROKE, 'style.stroke-dash': '3'}
+        if label in self._changes:
+            return {'style.fill': CHANGED_FILL, 'style.stroke': CHANGED_STROKE}
+        return {}
+
+    def field_attributes(self, model: ModelView, field_) -> dict[str, str]:
+        change = self._changes.get(model.model._meta.label)
+        if change is None:
+            return {}
+        if field_.name in change.added_fields:
+            return {'style.fill': ADDED_FILL}
+        if field_.name in change.removed_fields:
+            return {'style.fill': REMOVED_FILL}
+        if field_.name in change.changed_fields:
+            return {'style.fill': CHANGED_FILL}
+        return {}
+
+    def relation_attributes(self, relation: BaseRelation) -> dict[str, str]:
+        if relation in self._added_relations:
+            return {'style.stroke': ADDED_STROKE, 'style.stroke-width': '3'}
+        if relation in self._removed_relations:
+            return {'style.stroke': REMOVED_STROKE, 'style.stroke-dash': '3'}
+        return {}
+
+
+def describe_relation(relation: BaseRelation) -> str:
+    if isinstance(relation, Relation):
+        return (
+            f'{relation.source_model}.{relation.source_field} -> '
+            f'{relation.target_model}.{relation.target_field} '
+            f'({relation.kind.value}{f", {relation.on_delete}" if relation.on_delete else ""}'
+            f'{f", via {relation.through}" if relation.through else ""})'
+        )
+    return f'{relation.source_model} -> {relation.target_model} (inherits, {relation.kind.value})'
+
+
+def write_report(diff: GraphDiff, sink: TextIO):
+    if diff.is_empty:
+        sink.write('No schema changes.\n')
+        return
+
+    sink.write(
+        f'Models: {len(diff.added_models)} added, {len(diff.removed_models)} removed, '
+        f'{len(diff.changed_models)} changed\n'
+    )
+    for label in diff.added_models:
+        sink.write(f'  + {label}\n')
+    for label in diff.removed_models:
+        sink.write(f'  - {label}\n')
+    for change in diff.changed_models:
+        fields = (
+            [f'+{name}' for name in change.added_fields]
+            + [f'-{name}' for name in change.removed_fields]
+            + [f'~{name}' for name in change.changed_fields]
+        )
+        sink.write(f'  ~ {change.label}: {" ".join(fields) or "indexes or table options"}\n')
+
+    sink.write(f'Relations: {len(diff.added_relations)} added, {len(diff.removed_relations)} removed\n')
+    for relation in diff.added_relations:
+        sink.write(f'  + {describe_relation(relation)}\n')
+    for relation in diff.removed_relations:
+        sink.write(f'  - {describe_relation(relation)}\n')
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m django_d2_models.diff',
+        description='Compares two graphs dumped with `model_diagram --dump-graph`.',
+    )
+    parser.add_argument('old', help='Graph before changes.')
+    parser.add_argument('new', help='Graph after changes.')
+    parser.add_argument('--output', help='Write diagram (or report) into file instead of stdout.')
+    parser.add_argument('--report', action='store_true', help='Write text report instead of diagram.')
+    parser.add_argument('--exit-code', action='store_true', help='Exit with status 1 if graphs differ.')
+    args = parser.parse_args(argv)
+
+    try:
+        old = load_graph(args.old)
+        new = load_graph(args.new)
+    except (OSError, GraphFormatError) as e:
+        parser.error(str(e))
+
+    diff = diff_graphs(old, new)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.report:
+            write_report(diff, output)
+        else:
+            GraphRenderer(overlays=[DiffOverlay(diff)]).write_model_graph(diff_view(old, new, diff), output)
+    finally:
+        if args.output:
+            output.close()
+
+    if args.exit_code and not diff.is_empty:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Restricts graph to neighbourhood of selected models.
+"""
+
+from collections import deque
+from typing import Iterable, Optional, Sequence
+
+from .compact import CompactGraph
+from .graph import ModelGraph
+
+
+def nodes_within(graph: CompactGraph, sources: Iterable[int], radius: int) -> set[int]:
+    """
+    Ids of nodes reachable from `sources` in at most `radius` hops,
+    following relation and inheritance edges in both directions.
+    """
+    distance = {node_id: 0 for node_id in sources}
+    queue = deque(distance)
+    while queue:
+        node_id = queue.popleft()
+        if distance[node_id] >= radius:
+            continue
+        for neighbour in graph.neighbours(node_id):
+            if neighbour not in distance:
+                distance[neighbour] = distance[node_id] + 1
+                queue.append(neighbour)
+    return set(distance)
+
+
+def resolve_labels(graph: CompactGraph, labels: Sequence[str]) -> list[int]:
+    """
+    Maps model labels to node ids. Labels are matched case-insensitively,
+    like `apps.get_model` does for model names.
+    """
+    lowered = None
+    result = []
+    for label in labels:
+        node_id = graph.node_id(label)
+        if node_id is None:
+            if lowered is None:
+                lowered = {item.lower(): i for i, item in enumerate(graph.labels)}
+            node_id = lowered.get(label.lower())
+        if node_id is None:
+            raise LookupError(f"Model '{label}' is not in diagram.")
+        result.append(node_id)
+    return result
+
+
+def focus_graph(
+    graph: ModelGraph,
+    labels: Sequence[str],
+    radius: int,
+    show_ref: bool = True,
+    index: Optional[CompactGraph] = None,
+) -> ModelGraph:
+    """
+    Keeps only models within `radius` hops of models with given labels.
+    Relations leading out of neighbourhood are kept if `show_ref` is set,
+    the same way references to excluded apps are.
+    """
+    if index is None:
+        index = CompactGraph.from_model_graph(graph)
+    selected = {
+        index.labels[node_id]
+        for node_id in nodes_within(index, resolve_labels(index, labels), radius)
+    }
+    return ModelGraph(
+        nodes=[node for node in graph.nodes if node.model._meta.label in selected],
+        relations=[
+            relation
+            for relation in graph.relations
+            if relation.source_model in selected
+            and (show_ref or relation.target_model in selected)
+        ],
+        inheritance=[
+            relation
+            for relation in graph.inheritance
+            if relation.source_model in selected
+            and relation.target_model in selected
+        ],
+    )
@@ -0,0 +1,141 @@
+"""
+Model graph data structures.
+
+Kept free of django imports, so graphs can be processed and
+rendered without configured django.
+"""
+
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Iterable, Optional, Type, Sequence
+
+if TYPE_CHECKING:
+    from django.db.models import Model, Field
+
+
+class RelationKind(Enum):
+    MANY_TO_MANY = 'm2m'
+    FOREIGN_KEY = 'fk'
+    ONE_TO_ONE = 'o2o'
+
+
+class InheritanceKind(Enum):
+    ABSTRACT = 'abstract'
+    MULTI_TABLE = 'mti'
+    """Concrete parent with its own table, joined by `parent_ptr`."""
+    PROXY = 'proxy'
+
+
+@dataclass(frozen=True)
+class BaseRelation:
+    source_model: str
+    target_model: str
+
+
+@dataclass(frozen=True)
+class Relation(BaseRelation):
+    source_field: str
+    target_field: str
+    kind: RelationKind
+    allow_null: bool
+    on_delete: Optional[str] = None
+    """
+    Name of `on_delete` handler, e.g. 'CASCADE' or 'SET_NULL'.
+    `None` for many-to-many relations and when unknown.
+    """
+    through: Optional[str] = None
+    """
+    Label of through model of many-to-many relation, whose table
+    costs one more join when relation is traversed.
+    """
+
+
+@dataclass(frozen=True)
+class InheritanceRelation(BaseRelation):
+    kind: InheritanceKind = InheritanceKind.ABSTRACT
+
+
+@dataclass(frozen=True)
+class Index:
+    """
+    Index or unique constraint over model fields, in index column order.
+    """
+    fields: tuple[str, ...]
+    unique: bool = False
+    name: Optional[str] = None
+
+
+@dataclass
+class ModelView:
+    model: Type['Model']
+    fields: Sequence['Field']
+    indexes: Optional[list[Index]] = None
+    """
+    All indexes of model table, including ones on fields not in
+    `fields`. `None` if indexes are unknown.
+    """
+    parent_joins: int = 0
+    """
+    Number of tables of concrete parents joined to load one instance
+    of model, due to multi-table inheritance.
+    """
+
+
+@dataclass
+class ModelGraph:
+    nodes: list[ModelView]
+    inheritance: list[InheritanceRelation]
+    relations: list[Relation]
+
+
+def concrete_labels(graph: ModelGraph) -> dict[str, list[str]]:
+    """
+    Maps label of each model to labels of concrete models it stands
+    for: itself if it is concrete, concrete models inheriting it
+    otherwise.
+    """
+    children: dict[str, list[str]] = {}
+    for relation in graph.inheritance:
+        children.setdefault(relation.target_model, []).append(relation.source_model)
+    abstract = {node.model._meta.label for node in graph.nodes if node.model._meta.abstract}
+
+    result: dict[str, list[str]] = {}
+    for node in graph.nodes:
+        label = node.model._meta.label
+        if label not in abstract:
+            result[label] = [label]
+            continue
+        found = []
+        visited = {label}
+        stack = [label]
+        while stack:
+            for child in children.get(stack.pop(), ()):
+                if child in visited:
+                    continue
+                visited.add(child)
+                if child in abstract:
+                    stack.append(child)
+                else:
+                    found.append(child)
+        result[label] = found
+    return result
+
+
+def merge_graphs(graphs: Iterable[ModelGraph]) -> ModelGraph:
+    """
+    Merges graphs, keeping first occurrence of each model
+    (by label) and of each relation.
+    """
+    nodes = {}
+    inheritance = {}
+    relations = {}
+    for graph in graphs:
+        for node in graph.nodes:
+            nodes.setdefault(node.model._meta.label, node)
+        inheritance.update(dict.fromkeys(graph.inheritance))
+        relations.update(dict.fromkeys(graph.relations))
+    return ModelGraph(
+        nodes=list(nodes.values()),
+        inheritance=list(inheritance),
+        relations=list(relations),
+    )
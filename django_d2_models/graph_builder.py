@@ -5,52 +5,19 @@ in d2 diagram language.
 
 import os
 from dataclasses import dataclass, field
-from typing import Type, Optional, Sequence, Iterator
-from enum import Enum
+from typing import Callable, Collection, Type, Optional
 
-from django.db.models import Model, Field
+from django.db.models import Model, UniqueConstraint
 from django.db.models.fields.related import (
     RelatedField, ForeignKey, ManyToManyField, OneToOneField,
 )
 from django.apps import apps
 
-
-class RelationKind(Enum):
-    MANY_TO_MANY = 'm2m'
-    FOREIGN_KEY = 'fk'
-    ONE_TO_ONE = 'o2o'
-
-
-@dataclass(frozen=True)
-class BaseRelation:
-    source_model: str
-    target_model: str
-
-
-@dataclass(frozen=True)
-class Relation(BaseRelation):
-    source_field: str
-    target_field: str
-    kind: RelationKind
-    allow_null: bool
-
-
-@dataclass(frozen=True)
-class InheritanceRelation(BaseRelation):
-    pass
-
-
-@dataclass
-class ModelView:
-    model: Type[Model]
-    fields: Sequence[Field]
-
-
-@dataclass
-class ModelGraph:
-    nodes: list[ModelView]
-    inheritance: list[InheritanceRelation]
-    relations: list[Relation]
+from .profiling import NullProfiler
+from .graph import (
+    RelationKind, BaseRelation, Relation, InheritanceKind, InheritanceRelation,
+    Index, ModelView, ModelGraph,
+)
 
 
 @dataclass
@@ -72,28 +39,39 @@ class ModelExportConfig:
 
 
 class GraphModelBuilder:
-    def __init__(self, config: ModelExportConfig):
+    def __init__(self, config: ModelExportConfig, profiler: Optional[NullProfiler] = None):
         self._config = config
-
-    def build_graph(self) -> ModelGraph:
-        nodes = [
-            model
-            for app_name, models in apps.all_models.items()
-            if self.should_export_app(app_name)
-            for _, model in models.items()
-            if self.should_export_model(model)
-        ]
-        inheritance_builder = InheritanceRelationBuilder(self._config.abstract_models_depth)
-        for model in nodes:
-            inheritance_builder.add_model(model)
-
-        models = {
-            model.model._meta.label: model.model
-            for model in inheritance_builder.models
-        }
-        relations = []
-        for node in inheritance_builder.models:
-            relations += self.get_model_relations(models, node)
+        self._profiler = profiler or NullProfiler()
+        self._resolver = RelationResolver(self.get_model)
+
+    def build_graph(self, app_labels: Optional[Collection[str]] = None) -> ModelGraph:
+        """
+        Builds graph of exported models. If `app_labels` given, only
+        models of these apps (and their abstract bases) are included.
+        """
+        with self._profiler.phase('discovery'):
+            nodes = [
+                model
+                for app_name, models in self.get_app_models().items()
+                if (app_labels is None or app_name in app_labels)
+                and self.should_export_app(app_name)
+                for _, model in models.items()
+                if self.should_export_model(model)
+            ]
+        with self._profiler.phase('inheritance'):
+            inheritance_builder = InheritanceRelationBuilder(self._config.abstract_models_depth)
+            for model in nodes:
+                inheritance_builder.add_model(model)
+
+        with self._profiler.phase('relations'):
+            self._resolver = RelationResolver(self.get_model)
+            models = {
+                model.model._meta.label: model.model
+                for model in inheritance_builder.models
+            }
+            relations = []
+            for node in inheritance_builder.models:
+                relations += self.get_model_relations(models, node)
 
         return ModelGraph(
             nodes=inheritance_builder.models,
@@ -101,6 +79,16 @@ class GraphModelBuilder:
             inheritance=inheritance_builder.relations,
         )
 
+    def get_app_models(self) -> dict[str, dict[str, Type[Model]]]:
+        """
+        Returns models to export grouped by application label.
+        """
+        return apps.all_models
+
+    def get_model(self, label: str) -> Type[Model]:
+        self._profiler.count('get_model')
+        return apps.get_model(label)
+
     def get_model_relations(
         self,
         models: dict[str, Type[Model]],
@@ -120,88 +108,254 @@ class GraphModelBuilder:
         model: Type[Model],
         field: RelatedField,
     ) -> Optional[Relation]:
+        kind = self._resolver.kind(field.__class__)
+        if kind is None:
+            return
+
         to = field.related_model
         # Django does not resolve related fields in abstract models
         if isinstance(to, str):
             if to == 'self':
                 to = model
             else:
-                to = apps.get_model(to)
+                to = self._resolver.model(to, model._meta.app_label)
 
         related = models.get(to._meta.label)
         if related is None and not self._config.show_ref:
             return
 
-        kind_map: dict[Type[RelatedField], RelationKind] = {
-            ForeignKey: RelationKind.FOREIGN_KEY,
-            ManyToManyField: RelationKind.MANY_TO_MANY,
-            OneToOneField: RelationKind.ONE_TO_ONE,
-        }
-        kind = kind_map.get(field.__class__)
-
-        if kind is None:
-            return
-
         return Relation(
             source_model=model._meta.label,
             source_field=field.name,
             target_model=to._meta.label,
-            target_field='id',
+            target_field=target_field_name(field, to),
             kind=kind,
             allow_null=field.null,
+            on_delete=on_delete_name(field),
+            through=through_label(field),
         )
 
     def should_export_model(self, model: Type[Model]) -> bool:
         return not model._meta.abstract
 
     def should_export_app(self, app_name: str) -> bool:
+        self._profiler.count('should_export_app')
         return (
             app_name not in self._config.exclude_apps
             and (
                 not self._config.user_apps_only
-                or is_local_dep(apps.get_app_config(app_name).module)
+                or self._is_local_app(app_name)
             )
         )
 
+    def _is_local_app(self, app_name: str) -> bool:
+        self._profiler.count('is_local_dep')
+        return is_local_dep(apps.get_app_config(app_name).module)
+
+
+RELATION_KINDS: dict[Type[RelatedField], RelationKind] = {
+    ForeignKey: RelationKind.FOREIGN_KEY,
+    ManyToManyField: RelationKind.MANY_TO_MANY,
+    OneToOneField: RelationKind.ONE_TO_ONE,
+}
+
+
+class RelationResolver:
+    """
+    Caches field class classification and string reference
+    resolution for the duration of one graph build.
+    """
+
+    def __init__(self, get_model: Callable[[str], Type[Model]]):
+        self._get_model = get_model
+        self._kinds: dict[type, Optional[RelationKind]] = {}
+        self._models: dict[str, Type[Model]] = {}
+
+    def kind(self, field_class: type) -> Optional[RelationKind]:
+        """
+        Relation kind of the closest base in MRO, so subclasses of
+        related fields are classified as their base.
+        """
+        try:
+            return self._kinds[field_class]
+        except KeyError:
+            pass
+        kind = next(
+            (RELATION_KINDS[base] for base in field_class.__mro__ if base in RELATION_KINDS),
+            None,
+        )
+        self._kinds[field_class] = kind
+        return kind
+
+    def model(self, reference: str, app_label: str) -> Type[Model]:
+        """
+        Resolves `app_label.ModelName` reference. References without
+        app label are relative to `app_label`.
+        """
+        if '.' not in reference:
+            reference = f'{app_label}.{reference}'
+        try:
+            return self._models[reference]
+        except KeyError:
+            model = self._models[reference] = self._get_model(reference)
+            return model
+
 
 class InheritanceRelationBuilder:
+    """
+    Collects models together with their abstract bases (up to
+    `max_depth` levels), concrete multi-table inheritance parents and
+    concrete models of proxies.
+
+    Hierarchy is walked with explicit stack, so depth of inheritance
+    is not limited by recursion limit, and field names of each base
+    are computed once.
+    """
+
     def __init__(self, max_depth: int):
         self._max_depth = max_depth
         self.models: list[ModelView] = []
         self._visited = set()
         self.relations: list[InheritanceRelation] = []
+        self._base_fields: dict[Type[Model], frozenset[str]] = {}
 
     def add_model(self, model: Type[Model], depth: int = 0):
-        if model._meta.label in self._visited:
-            return
-        self._visited.add(model._meta.label)
+        """
+        Adds model and its bases in depth-first order: each relation is
+        followed by its base, before other bases of the same model.
+        """
+        stack: list[tuple[Type[Model], int, Optional[InheritanceRelation]]] = [(model, depth, None)]
+        while stack:
+            model, depth, relation = stack.pop()
+            if relation is not None:
+                self.relations.append(relation)
+            if model._meta.label in self._visited:
+                continue
+            self._visited.add(model._meta.label)
+
+            bases = self._bases(model, depth)
+            self.models.append(self._model_view(model, [base for base, _, kind in bases if kind == InheritanceKind.ABSTRACT]))
+            for base, base_depth, kind in reversed(bases):
+                stack.append((base, base_depth, InheritanceRelation(
+                    source_model=model._meta.label,
+                    target_model=base._meta.label,
+                    kind=kind,
+                )))
+
+    def _bases(self, model: Type[Model], depth: int) -> list[tuple[Type[Model], int, InheritanceKind]]:
+        """
+        Bases shown as separate models, with their depth and kind of inheritance.
+        """
+        meta = model._meta
+        if meta.proxy:
+            return [(meta.proxy_for_model, 0, InheritanceKind.PROXY)]
 
-        if depth >= self._max_depth:
-            self.models.append(ModelView(model, model._meta.fields))
-            return
-
-        parents: list[Type[Model]] = [
-            base
-            for base in model.__bases__
-            if is_abstract_model(base)
+        result = []
+        for base in model.__bases__:
+            if base in meta.parents:
+                result.append((base, 0, InheritanceKind.MULTI_TABLE))
+            elif depth < self._max_depth and is_abstract_model(base):
+                result.append((base, depth + 1, InheritanceKind.ABSTRACT))
+        # Concrete parents inherited through abstract bases or mixins.
+        result += [
+            (parent, 0, InheritanceKind.MULTI_TABLE)
+            for parent in meta.parents
+            if parent not in model.__bases__
         ]
-        parent_fields = {
-            field.name
-            for base in parents
-            for field in base._meta.fields
-        }
+        return result
+
+    def _model_view(self, model: Type[Model], abstract_bases: list[Type[Model]]) -> ModelView:
+        meta = model._meta
+        if meta.proxy:
+            return ModelView(model, [], [], parent_joins=len(meta.concrete_model._meta.get_parent_list()))
+
+        parent_fields = set()
+        for base in abstract_bases:
+            parent_fields |= self._fields_of(base)
         fields = [
             field
-            for field in model._meta.fields
+            for field in [*meta.local_fields, *meta.local_many_to_many]
             if field.name not in parent_fields
         ]
-        self.models.append(ModelView(model, fields))
-        for base in parents:
-            self.relations.append(InheritanceRelation(
-                source_model=model._meta.label,
-                target_model=base._meta.label,
-            ))
-            self.add_model(base, depth + 1)
+        return ModelView(model, fields, model_indexes(model), parent_joins=len(meta.get_parent_list()))
+
+    def _fields_of(self, base: Type[Model]) -> frozenset[str]:
+        try:
+            return self._base_fields[base]
+        except KeyError:
+            meta = base._meta
+            names = self._base_fields[base] = frozenset(
+                field.name for field in [*meta.fields, *meta.local_many_to_many]
+            )
+            return names
+
+
+def on_delete_name(field: RelatedField) -> Optional[str]:
+    """
+    Name of `on_delete` handler of field, 'SET' for `models.SET(...)`.
+    """
+    on_delete = getattr(field.remote_field, 'on_delete', None)
+    if on_delete is None or field.many_to_many:
+        return None
+    if hasattr(on_delete, 'deconstruct'):
+        return 'SET'
+    return getattr(on_delete, '__name__', None)
+
+
+def target_field_name(field: RelatedField, to: Type[Model]) -> str:
+    """
+    Name of field of `to` relation refers to: `to_field` or primary
+    key. Fields of abstract models are not resolved by django, so their
+    target is taken from `to_field` argument.
+    """
+    if not field.many_to_many and not isinstance(field.related_model, str):
+        return field.target_field.name
+    to_fields = getattr(field, 'to_fields', None)
+    if to_fields and to_fields[0]:
+        return to_fields[0]
+    # Abstract models, e.g. target of 'self', have no `pk` set.
+    pk = to._meta.pk or next((field_ for field_ in to._meta.fields if field_.primary_key), None)
+    return pk.name if pk is not None else 'id'
+
+
+def through_label(field: RelatedField) -> Optional[str]:
+    """
+    Label of through model of many-to-many field, `None` for other
+    fields and for fields of abstract models, which have none.
+    """
+    through = getattr(field.remote_field, 'through', None) if field.many_to_many else None
+    if through is None or isinstance(through, str):
+        return None
+    return through._meta.label
+
+
+def model_indexes(model: Type[Model]) -> list[Index]:
+    """
+    Indexes created for model table: primary key, `unique` and
+    `db_index` fields (foreign keys have `db_index` by default),
+    `unique_together`, `index_together`, `Meta.indexes` and unique
+    constraints. Expression indexes are skipped.
+    """
+    meta = model._meta
+    result = []
+    for field_ in meta.fields:
+        if field_.primary_key or field_.unique:
+            result.append(Index((field_.name,), unique=True))
+        elif field_.db_index:
+            result.append(Index((field_.name,)))
+    result += [Index(tuple(fields), unique=True) for fields in meta.unique_together]
+    result += [Index(tuple(fields)) for fields in getattr(meta, 'index_together', ())]
+    result += [
+        Index(tuple(name.lstrip('-') for name in index.fields), name=index.name)
+        for index in meta.indexes
+        if index.fields
+    ]
+    result += [
+        Index(tuple(constraint.fields), unique=True, name=constraint.name)
+        for constraint in meta.constraints
+        if isinstance(constraint, UniqueConstraint) and constraint.fields
+    ]
+    return result
 
 
 def is_local_dep(module) -> bool:
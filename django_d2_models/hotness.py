@@ -0,0 +1,307 @@
+"""
+Query hot paths: which tables are accessed and joined, how often
+and how long it takes.
+
+Profile is recorded with `django_d2_models.query_recorder` during
+test suite or load replay and saved as JSON:
+
+    {
+        "format": "django_d2_models.hotness",
+        "version": 1,
+        "queries": 1520,
+        "tables": {"chat_message": {"count": 830, "seconds": 0.52}},
+        "joins": [{"tables": ["chat_message", "chat_vote"], "count": 120, "seconds": 0.09}]
+    }
+
+Time of each query is attributed to every table and join in it.
+SQL is parsed with regular expressions, which is enough for queries
+generated by django ORM, and each distinct SQL string is parsed once.
+"""
+
+import bisect
+import json
+import math
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+from .graph import BaseRelation, ModelGraph, ModelView, concrete_labels
+from .overlay import Overlay
+
+
+FORMAT = 'django_d2_models.hotness'
+VERSION = 1
+
+PARSE_CACHE_SIZE = 10000
+
+NAME = r'[`"\[]?(\w+)[`"\]]?'
+TABLE_RE = re.compile(rf'\b(?:FROM|JOIN|UPDATE|INTO)\s+{NAME}(?:\s+(?:AS\s+)?{NAME})?', re.IGNORECASE)
+JOIN_RE = re.compile(
+    rf'\bJOIN\s+{NAME}(?:\s+(?:AS\s+)?{NAME})?\s+ON\s+\(?\s*{NAME}\.{NAME}\s*=\s*{NAME}\.',
+    re.IGNORECASE,
+)
+SCOPE_RE = re.compile(r"'(?:[^']|'')*'|[()]")
+SUBQUERY_RE = re.compile(r'\s*(?:SELECT|WITH)\b', re.IGNORECASE)
+KEYWORDS = {
+    'on', 'where', 'inner', 'left', 'right', 'full', 'cross', 'outer', 'join', 'group',
+    'order', 'limit', 'offset', 'having', 'union', 'set', 'values', 'select', 'returning',
+    'using', 'window', 'for', 'natural', 'lateral', 'default',
+}
+
+HOT_FILLS = ['"#fff8e1"', '"#ffe082"', '"#ffb74d"', '"#ff8a65"', '"#e57373"']
+"""Node fills from rarely to most frequently accessed tables."""
+LATENCY_STROKES = ['"#546e7a"', '"#f57c00"', '"#c62828"']
+"""Edge colours for joins averaging under 1 ms, under 10 ms and slower."""
+MAX_STROKE_WIDTH = 8
+
+
+class ProfileFormatError(ValueError):
+    pass
+
+
+@dataclass
+class AccessStats:
+    count: int = 0
+    seconds: float = 0.0
+
+    def add(self, count: int, seconds: float):
+        self.count += count
+        self.seconds += seconds
+
+    @property
+    def average_ms(self) -> float:
+        return 1000 * self.seconds / self.count if self.count else 0.0
+
+
+def parse_sql(sql: str) -> tuple[frozenset[str], frozenset[tuple[str, str]]]:
+    """
+    Tables used by query and joined table pairs, each pair sorted.
+    """
+    scopes = QueryScopes(sql)
+    tables = set()
+    aliases = {}
+    for match in TABLE_RE.finditer(sql):
+        scope = scopes.at(match.start())
+        if scope is None:
+            continue
+        table, alias = match.groups()
+        tables.add(table)
+        if alias and alias.lower() not in KEYWORDS:
+            aliases[scope, alias] = table
+    joins = set()
+    for match in JOIN_RE.finditer(sql):
+        scope = scopes.at(match.start())
+        if scope is None:
+            continue
+        _, _, left, _, right = match.groups()
+        left, right = scopes.resolve(aliases, scope, left), scopes.resolve(aliases, scope, right)
+        joins.add((min(left, right), max(left, right)))
+    return frozenset(tables), frozenset(joins)
+
+
+class QueryScopes:
+    """
+    Splits SQL into query and subqueries, numbered in order of their
+    opening parentheses, with 0 standing for query itself. Aliases
+    are scoped, since django names tables of each subquery `U0`, `U1`
+    and so on. Text of string literals and of function arguments,
+    like `EXTRACT(YEAR FROM "created")`, belongs to no scope: keywords
+    in it do not refer to tables.
+    """
+
+    def __init__(self, sql: str):
+        self.parents: list[Optional[int]] = [None]
+        self._starts: list[int] = []
+        self._scopes: list[Optional[int]] = []
+        stack: list[Optional[int]] = [0]
+        query = 0
+        for match in SCOPE_RE.finditer(sql):
+            token = match.group()
+            if token == '(':
+                if SUBQUERY_RE.match(sql, match.end()):
+                    self.parents.append(query)
+                    stack.append(len(self.parents) - 1)
+                else:
+                    stack.append(None)
+            elif token == ')':
+                if len(stack) > 1:
+                    stack.pop()
+            else:
+                self._starts.append(match.start())
+                self._scopes.append(None)
+            self._starts.append(match.end())
+            self._scopes.append(stack[-1])
+            query = next(scope for scope in reversed(stack) if scope is not None)
+
+    def at(self, position: int) -> Optional[int]:
+        index = bisect.bisect_right(self._starts, position) - 1
+        return 0 if index < 0 else self._scopes[index]
+
+    def resolve(self, aliases: dict[tuple[int, str], str], scope: Optional[int], name: str) -> str:
+        """
+        Table of `name` used in `scope`, which may be alias of this
+        or enclosing query.
+        """
+        while scope is not None:
+            table = aliases.get((scope, name))
+            if table is not None:
+                return table
+            scope = self.parents[scope]
+        return name
+
+
+class QueryProfile:
+    def __init__(self):
+        self.queries = 0
+        self.tables: dict[str, AccessStats] = {}
+        self.joins: dict[tuple[str, str], AccessStats] = {}
+        self._parsed: dict[str, tuple[frozenset[str], frozenset[tuple[str, str]]]] = {}
+
+    def add(self, sql: str, seconds: float, count: int = 1):
+        """
+        Accounts `count` executions of `sql` (e.g. `executemany`)
+        which took `seconds` in total.
+        """
+        parsed = self._parsed.get(sql)
+        if parsed is None:
+            if len(self._parsed) >= PARSE_CACHE_SIZE:
+                self._parsed.clear()
+            parsed = self._parsed[sql] = parse_sql(sql)
+        tables, joins = parsed
+        self.queries += count
+        for table in tables:
+            self._stats(self.tables, table).add(count, seconds)
+        for pair in joins:
+            self._stats(self.joins, pair).add(count, seconds)
+
+    def merge(self, other: 'QueryProfile'):
+        self.queries += other.queries
+        for table, stats in other.tables.items():
+            self._stats(self.tables, table).add(stats.count, stats.seconds)
+        for pair, stats in other.joins.items():
+            self._stats(self.joins, pair).add(stats.count, stats.seconds)
+
+    @staticmethod
+    def _stats(stats: dict, key) -> AccessStats:
+        item = stats.get(key)
+        if item is None:
+            item = stats[key] = AccessStats()
+        return item
+
+    def to_dict(self) -> dict:
+        return {
+            'format': FORMAT,
+            'version': VERSION,
+            'queries': self.queries,
+            'tables': {
+                table: {'count': stats.count, 'seconds': stats.seconds}
+                for table, stats in sorted(self.tables.items())
+            },
+            'joins': [
+                {'tables': list(pair), 'count': stats.count, 'seconds': stats.seconds}
+                for pair, stats in sorted(self.joins.items())
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'QueryProfile':
+        if data.get('format') != FORMAT:
+            raise ProfileFormatError('Not a query hotness profile.')
+        if data.get('version') != VERSION:
+            raise ProfileFormatError(f"Unsupported profile version {data.get('version')!r}, expected {VERSION}.")
+        result = cls()
+        try:
+            result.queries = data['queries']
+            for table, stats in data['tables'].items():
+                result.tables[table] = AccessStats(stats['count'], stats['seconds'])
+            for join in data['joins']:
+                left, right = join['tables']
+                result.joins[(left, right)] = AccessStats(join['count'], join['seconds'])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ProfileFormatError(f'Malformed profile: {e!r}')
+        return result
+
+    def save(self, path: Union[str, Path]):
+        Path(path).write_text(json.dumps(self.to_dict(), indent=1), encoding='utf-8')
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'QueryProfile':
+        try:
+            data = json.loads(Path(path).read_text(encoding='utf-8'))
+        except json.JSONDecodeError as e:
+            raise ProfileFormatError(f'Malformed profile: {e}')
+        return cls.from_dict(data)
+
+
+def log_scale(value: float, largest: float, steps: int) -> int:
+    """
+    Step of `value` on logarithmic scale from 1 to `largest`.
+    """
+    if value <= 1 or largest <= 1:
+        return 0
+    return min(int(math.log(value) / math.log(largest) * steps), steps - 1)
+
+
+class HotnessOverlay(Overlay):
+    """
+    Colours models by number of queries touching their table, and
+    draws relations wider the more often they are joined, coloured by
+    average latency of these joins. Abstract models stand for tables
+    of models inheriting them.
+    """
+
+    def __init__(self, graph: ModelGraph, profile: QueryProfile):
+        self._profile = profile
+        tables = {node.model._meta.label: node.model._meta.db_table for node in graph.nodes}
+        self._tables: dict[str, set[str]] = {
+            label: {tables[item] for item in concrete}
+            for label, concrete in concrete_labels(graph).items()
+        }
+        self._largest_table = max((stats.count for stats in profile.tables.values()), default=0)
+        self._largest_join = max((stats.count for stats in profile.joins.values()), default=0)
+
+    def model_stats(self, label: str) -> AccessStats:
+        result = AccessStats()
+        for table in self._tables.get(label, ()):
+            stats = self._profile.tables.get(table)
+            if stats is not None:
+                result.add(stats.count, stats.seconds)
+        return result
+
+    def relation_stats(self, relation: BaseRelation) -> AccessStats:
+        result = AccessStats()
+        sources = self._tables.get(relation.source_model, set())
+        targets = self._tables.get(relation.target_model, set())
+        for source in sources:
+            for target in targets:
+                stats = self._profile.joins.get((min(source, target), max(source, target)))
+                if stats is not None:
+                    result.add(stats.count, stats.seconds)
+        return result
+
+    def model_attributes(self, model: ModelView) -> dict[str, str]:
+        stats = self.model_stats(model.model._meta.label)
+        if not stats.count:
+            return {}
+        return {
+            'style.fill': HOT_FILLS[log_scale(stats.count, self._largest_table, len(HOT_FILLS))],
+            'tooltip': f'"{stats.count} queries, {stats.seconds * 1000:.1f} ms total"',
+        }
+
+    def relation_attributes(self, relation: BaseRelation) -> dict[str, str]:
+        stats = self.relation_stats(relation)
+        if not stats.count:
+            return {}
+        if stats.average_ms < 1:
+            stroke = LATENCY_STROKES[0]
+        elif stats.average_ms < 10:
+            stroke = LATENCY_STROKES[1]
+        else:
+            stroke = LATENCY_STROKES[2]
+        width = 1 + log_scale(stats.count, self._largest_join, MAX_STROKE_WIDTH)
+        return {
+            'style.stroke': stroke,
+            'style.stroke-width': str(width),
+            'tooltip': f'"{stats.count} joins, {stats.average_ms:.2f} ms average"',
+        }
@@ -0,0 +1,114 @@
+"""
+Renders diagram as one d2 file per application, tied together
+by root file with d2 imports.
+
+Files which content did not change are left untouched, so build
+tools relying on modification time only recompile changed apps.
+Files of apps imported by previous root file but no longer exported
+are removed; other files of directory are never touched.
+"""
+
+import io
+import os
+from pathlib import Path
+from typing import Collection, Optional
+
+from .graph import ModelGraph
+from .renderer import GraphRenderer
+
+
+def app_label_of(label: str) -> str:
+    return label.split('.', 1)[0]
+
+
+def split_graph_by_app(graph: ModelGraph) -> dict[str, ModelGraph]:
+    """
+    Splits graph into per-app graphs. Relations and inheritance
+    belong to app of their source model.
+    """
+    result: dict[str, ModelGraph] = {}
+
+    def app_graph(app_label: str) -> ModelGraph:
+        if app_label not in result:
+            result[app_label] = ModelGraph(nodes=[], inheritance=[], relations=[])
+        return result[app_label]
+
+    for node in graph.nodes:
+        app_graph(node.model._meta.app_label).nodes.append(node)
+    for relation in graph.relations:
+        app_graph(app_label_of(relation.source_model)).relations.append(relation)
+    for relation in graph.inheritance:
+        app_graph(app_label_of(relation.source_model)).inheritance.append(relation)
+    return result
+
+
+class AppDiagramWriter:
+    def __init__(
+        self,
+        directory: str,
+        renderer: Optional[GraphRenderer] = None,
+        root_name: str = 'index',
+    ):
+        self._directory = Path(directory)
+        self._renderer = renderer or GraphRenderer()
+        self._root_name = root_name
+        self.paths: list[Path] = []
+        """All files of diagram, set by last `write` call."""
+
+    @property
+    def root_path(self) -> Path:
+        return self._directory / f'{self._root_name}.d2'
+
+    def app_path(self, app_label: str) -> Path:
+        return self._directory / f'{app_label}.d2'
+
+    def write(self, graph: ModelGraph, app_labels: Optional[Collection[str]] = None) -> list[Path]:
+        """
+        Writes per-app files and root file. Returns list of files
+        which content changed. If `app_labels` given, only files of
+        these apps are rendered, others are assumed to be up to date.
+        """
+        self._directory.mkdir(parents=True, exist_ok=True)
+        changed = []
+        app_graphs = split_graph_by_app(graph)
+        previous = self.written_app_labels()
+        self.paths = [self.app_path(app_label) for app_label in sorted(app_graphs)] + [self.root_path]
+        for app_label in sorted(app_graphs):
+            if app_labels is not None and app_label not in app_labels:
+                continue
+            sink = io.StringIO()
+            self._renderer.write_model_graph(app_graphs[app_label], sink)
+            path = self.app_path(app_label)
+            if write_if_changed(path, sink.getvalue()):
+                changed.append(path)
+
+        root = ''.join(f'...@{app_label}\n' for app_label in sorted(app_graphs))
+        if write_if_changed(self.root_path, root):
+            changed.append(self.root_path)
+        for app_label in sorted(previous - app_graphs.keys()):
+            self.app_path(app_label).unlink(missing_ok=True)
+        return changed
+
+    def written_app_labels(self) -> set[str]:
+        """
+        Apps imported by existing root file.
+        """
+        try:
+            root = self.root_path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return set()
+        return {line[4:] for line in root.splitlines() if line.startswith('...@')}
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    data = content.encode('utf-8')
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return True
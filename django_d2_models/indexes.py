@@ -0,0 +1,119 @@
+"""
+Index coverage of relations.
+
+Join on a relation is supported by index when its column is the
+leading column of some index of the table: a column which is only
+second in composite index does not help lookups by it alone.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, TextIO
+
+from .graph import BaseRelation, Index, ModelGraph, ModelView, Relation, RelationKind
+from .overlay import Overlay
+
+
+UNINDEXED_STROKE = '"#c0392b"'
+UNINDEXED_FILL = '"#fadbd8"'
+
+
+def leading_columns(indexes: list[Index]) -> set[str]:
+    return {index.fields[0] for index in indexes if index.fields}
+
+
+def index_constraints(model: ModelView) -> dict[str, list[str]]:
+    """
+    d2 constraints for fields of model: `unique` and `index` for
+    single column indexes, `ixN.M`/`uqN.M` for M-th column of N-th
+    composite index (unique ones counted separately).
+    """
+    result: dict[str, list[str]] = {}
+    counters = {False: 0, True: 0}
+    for index in model.indexes or ():
+        if len(index.fields) == 1:
+            name = 'unique' if index.unique else 'index'
+            constraints = result.setdefault(index.fields[0], [])
+            if name not in constraints and not (name == 'index' and 'unique' in constraints):
+                constraints.append(name)
+            continue
+        counters[index.unique] += 1
+        prefix = 'uq' if index.unique else 'ix'
+        for position, field_name in enumerate(index.fields, 1):
+            result.setdefault(field_name, []).append(f'{prefix}{counters[index.unique]}.{position}')
+    return result
+
+
+@dataclass(frozen=True)
+class UnindexedRelation:
+    relation: Relation
+    model: str
+    """Label of model whose column is not indexed."""
+    field: str
+
+
+def unindexed_relations(graph: ModelGraph) -> list[UnindexedRelation]:
+    """
+    Relations whose source or target column is not leading column of
+    any index. Many-to-many relations are joined through separate
+    table and models with unknown indexes are not checked.
+    """
+    views = {node.model._meta.label: node for node in graph.nodes}
+    leading: dict[str, Optional[set[str]]] = {
+        label: None if node.indexes is None else leading_columns(node.indexes)
+        for label, node in views.items()
+    }
+    result = []
+    for relation in graph.relations:
+        if relation.kind == RelationKind.MANY_TO_MANY:
+            continue
+        for label, field_name in (
+            (relation.source_model, relation.source_field),
+            (relation.target_model, relation.target_field),
+        ):
+            columns = leading.get(label)
+            if columns is None or field_name in columns:
+                continue
+            if not any(field_.name == field_name for field_ in views[label].model._meta.fields):
+                continue
+            result.append(UnindexedRelation(relation, label, field_name))
+    return result
+
+
+class IndexOverlay(Overlay):
+    """
+    Flags relations without supporting index and their columns.
+    """
+
+    def __init__(self, graph: ModelGraph):
+        self._unindexed = unindexed_relations(graph)
+        self._relations = {item.relation for item in self._unindexed}
+        self._columns = {(item.model, item.field) for item in self._unindexed}
+
+    def field_attributes(self, model: ModelView, field) -> dict[str, str]:
+        if (model.model._meta.label, field.name) in self._columns:
+            return {'style.fill': UNINDEXED_FILL}
+        return {}
+
+    def relation_attributes(self, relation: BaseRelation) -> dict[str, str]:
+        relations = getattr(relation, 'relations', (relation,))
+        if any(item in self._relations for item in relations):
+            return {'style.stroke': UNINDEXED_STROKE, 'style.stroke-width': '3'}
+        return {}
+
+
+def write_index_report(graph: ModelGraph, sink: TextIO):
+    unindexed = unindexed_relations(graph)
+    unknown = [node.model._meta.label for node in graph.nodes if node.indexes is None]
+    if not unindexed:
+        sink.write('All relations are supported by indexes.\n')
+    else:
+        sink.write(f'Relations without supporting index: {len(unindexed)}\n')
+        for item in unindexed:
+            relation = item.relation
+            sink.write(
+                f'  {relation.source_model}.{relation.source_field} -> '
+                f'{relation.target_model}.{relation.target_field}: '
+                f'no index on {item.model}.{item.field}\n'
+            )
+    if unknown:
+        sink.write(f'Indexes unknown, not checked: {", ".join(unknown)}\n')
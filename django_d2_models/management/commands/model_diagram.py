@@ -1,7 +1,33 @@
-from django.core.management.base import BaseCommand
+import cProfile
+import json
+import shutil
+from functools import partial
+from pathlib import Path
+from typing import Callable, Optional, Sequence, TextIO
 
-from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig
+from django.core.management.base import BaseCommand, CommandError
+from django.db.migrations.exceptions import AmbiguityError
+
+from django_d2_models.cache import DiagramCache, model_registry_fingerprint
+from django_d2_models.compact import CompactGraph
+from django_d2_models.compiler import D2Compiler, D2CompileError
+from django_d2_models.db_stats import DbStatsError, DbStatsOverlay, collect_stats
+from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig, ModelGraph
+from django_d2_models.hotness import ProfileFormatError
+from django_d2_models.incremental import AppDiagramWriter
+from django_d2_models.migration_builder import MigrationStateGraphBuilder
+from django_d2_models.profiling import NullProfiler, PhaseProfiler
+from django_d2_models.render import (
+    ViewOptions, add_view_arguments, make_renderer, requested_report, view_graph,
+    view_options_from_arguments,
+)
 from django_d2_models.renderer import GraphRenderer
+from django_d2_models.routing import DatabaseOverlay, DatabaseRouting, DatabaseRoutingError, write_routing_report
+from django_d2_models.serialization import dump_graph
+from django_d2_models.watch import DiagramWatcher
+
+
+OUTPUT_BUFFER_SIZE = 1024 * 1024
 
 
 class Command(BaseCommand):
@@ -35,10 +61,322 @@ class Command(BaseCommand):
             type=str,
             nargs='+',
         )
+        parser.add_argument(
+            '--from-migrations',
+            action='store_true',
+            help='Build diagram from migration files instead of model registry.',
+        )
+        parser.add_argument(
+            '--migration',
+            nargs=2,
+            metavar=('APP_LABEL', 'MIGRATION_NAME'),
+            help=(
+                'Build diagram from project state right after given migration. '
+                'Implies --from-migrations.'
+            ),
+        )
+        add_view_arguments(parser)
+        parser.add_argument(
+            '--with-db-stats',
+            action='store_true',
+            help=(
+                'Show row count, table and index size of each model, read from catalog '
+                'of its database, and colour models by size. PostgreSQL and SQLite only.'
+            ),
+        )
+        parser.add_argument(
+            '--db-routing',
+            action='store_true',
+            help=(
+                'Group models into containers by database DATABASE_ROUTERS read them from, '
+                'and highlight relations crossing database boundary.'
+            ),
+        )
+        parser.add_argument(
+            '--db-routing-report',
+            action='store_true',
+            help='Write database of each model and relations crossing database boundary instead of diagram.',
+        )
+        parser.add_argument(
+            '--dump-graph',
+            type=str,
+            metavar='PATH',
+            help=(
+                'Write built graph into file instead of rendering it: as JSON if file '
+                'name ends with .json, in compact binary form otherwise. Diagrams can '
+                'then be rendered with `python -m django_d2_models.render` without django.'
+            ),
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write diagram into file instead of stdout.',
+        )
+        parser.add_argument(
+            '--output-dir',
+            type=str,
+            help=(
+                'Write one d2 file per application into directory, together '
+                'with index.d2 importing all of them. Files of unchanged '
+                'applications are not rewritten.'
+            ),
+        )
+        parser.add_argument(
+            '--cache-dir',
+            type=str,
+            help=(
+                'Directory to cache rendered diagrams in. Cached diagram is '
+                'reused until any model definition changes.'
+            ),
+        )
+        parser.add_argument(
+            '--compile',
+            action='store_true',
+            help=(
+                'Compile generated files into SVG with d2. Requires --output or --output-dir. '
+                'Compiled SVGs are cached by hash of their source.'
+            ),
+        )
+        parser.add_argument(
+            '--d2-binary',
+            type=str,
+            default='d2',
+            help='d2 executable used by --compile.',
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            help='Number of parallel d2 processes. Defaults to number of CPUs.',
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help=(
+                'Keep running and regenerate diagram whenever models modules change. '
+                'Requires --output or --output-dir.'
+            ),
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=0.05,
+            help='Seconds between checks of models files in --watch mode.',
+        )
+        parser.add_argument(
+            '--profile',
+            action='store_true',
+            help='Print wall time, call counts and allocated memory of each phase as JSON into stderr.',
+        )
+        parser.add_argument(
+            '--cprofile',
+            type=str,
+            metavar='PATH',
+            help='Run command under cProfile and dump statistics into .pstats file.',
+        )
 
     def handle(self, *args, **options):
-        graph = GraphModelBuilder(self._config_from_options(options)).build_graph()
-        print(GraphRenderer().render_model_graph(graph))
+        profiler = PhaseProfiler() if options['profile'] else None
+        self._profiler = profiler or NullProfiler()
+        export = partial(self._export, options)
+        if options['cprofile']:
+            export = partial(self._run_with_cprofile, export, options['cprofile'])
+
+        if profiler is None:
+            export()
+            return
+        with profiler:
+            export()
+        self.stderr.write(json.dumps(profiler.report(), indent=2))
+
+    def _run_with_cprofile(self, export: Callable, path: str):
+        profile = cProfile.Profile()
+        try:
+            profile.runcall(export)
+        finally:
+            profile.dump_stats(path)
+
+    def _export(self, options: dict):
+        if options['compile'] and not options['output'] and not options['output_dir']:
+            raise CommandError('--compile requires --output or --output-dir.')
+        if options['db_routing'] and options['partition']:
+            raise CommandError('--db-routing cannot be used with --partition.')
+
+        if options['dump_graph']:
+            graph = self._graph(options)
+            with self._profiler.phase('dump'):
+                dump_graph(graph, options['dump_graph'])
+        elif requested_report(options):
+            requested_report(options)(self._view_graph(self._graph(options), options), self.stdout)
+        elif options['db_routing_report']:
+            write_routing_report(self._routing(self._view_graph(self._graph(options), options)), self.stdout)
+        elif options['watch']:
+            self._watch(options)
+        elif options['output_dir']:
+            graph = self._view_graph(self._graph(options), options)
+            writer = AppDiagramWriter(options['output_dir'], self._renderer(graph, options))
+            with self._profiler.phase('render'):
+                writer.write(graph)
+            self._compile(options, writer.paths)
+        elif options['output']:
+            with open(options['output'], 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as output:
+                self._write_diagram(options, output)
+            self._compile(options, [Path(options['output'])])
+        else:
+            # Diagram is written in chunks, which must not get line
+            # ending appended by `OutputWrapper`.
+            ending, self.stdout.ending = self.stdout.ending, ''
+            try:
+                self._write_diagram(options, self.stdout)
+            finally:
+                self.stdout.ending = ending
+
+    def _compile(self, options: dict, paths: Sequence[Path]):
+        if not options['compile']:
+            return
+        if options['cache_dir']:
+            cache_dir = Path(options['cache_dir']) / 'svg'
+        else:
+            cache_dir = Path(paths[0]).parent / '.d2-svg-cache'
+        compiler = D2Compiler(options['d2_binary'], cache_dir, options['jobs'])
+        try:
+            with self._profiler.phase('compile'):
+                compiler.compile(paths)
+        except D2CompileError as e:
+            raise CommandError(str(e))
+
+    def _watch(self, options: dict):
+        if not options['output'] and not options['output_dir']:
+            raise CommandError('--watch requires --output or --output-dir.')
+        if self._uses_migrations(options):
+            raise CommandError('--watch cannot be used with migrations.')
+
+        def write(graph: ModelGraph, app_labels: Optional[set[str]]):
+            graph = self._view_graph(graph, options)
+            if options['output_dir']:
+                if self._has_view_options(options):
+                    app_labels = None
+                writer = AppDiagramWriter(options['output_dir'], self._renderer(graph, options))
+                writer.write(graph, app_labels)
+                paths = writer.paths
+            else:
+                with open(options['output'], 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as output:
+                    self._renderer(graph, options).write_model_graph(graph, output)
+                paths = [Path(options['output'])]
+            self._compile(options, paths)
+
+        watcher = DiagramWatcher(
+            self._config_from_options(options),
+            write,
+            poll_interval=options['poll_interval'],
+            debounce=options['poll_interval'],
+            log=self.stderr.write,
+        )
+        watcher.build()
+        self.stderr.write('Watching models for changes, press CTRL-C to stop.')
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+
+    def _write_diagram(self, options: dict, output: TextIO):
+        if not options['cache_dir'] or self._uses_migrations(options) or self._has_view_options(options):
+            graph = self._view_graph(self._graph(options), options)
+            renderer = self._renderer(graph, options)
+            with self._profiler.phase('render'):
+                renderer.write_model_graph(graph, output)
+            return
+
+        config = self._config_from_options(options)
+        cache = DiagramCache(options['cache_dir'])
+        fingerprint = self._fingerprint()
+        path = cache.get(config, fingerprint)
+        if path is None:
+            graph = self._cached_graph(options, cache, fingerprint)
+            with self._profiler.phase('render'), cache.store(config, fingerprint) as entry:
+                GraphRenderer().write_model_graph(graph, entry)
+            path = cache.entry_path(config, fingerprint)
+
+        with self._profiler.phase('cache_copy'), open(path, encoding='utf-8') as cached:
+            shutil.copyfileobj(cached, output)
+
+    def _fingerprint(self) -> str:
+        with self._profiler.phase('fingerprint'):
+            return model_registry_fingerprint()
+
+    def _graph(self, options: dict) -> ModelGraph:
+        if not options['cache_dir'] or self._uses_migrations(options):
+            return self._build_graph(options)
+        cache = DiagramCache(options['cache_dir'])
+        return self._cached_graph(options, cache, self._fingerprint())
+
+    def _cached_graph(self, options: dict, cache: DiagramCache, fingerprint: str) -> ModelGraph:
+        config = self._config_from_options(options)
+        with self._profiler.phase('cache_load'):
+            compact = cache.get_graph(config, fingerprint)
+            if compact is not None:
+                return compact.to_model_graph()
+
+        graph = self._build_graph(options)
+        cache.store_graph(config, fingerprint, CompactGraph.from_model_graph(graph))
+        return graph
+
+    def _view_options(self, options: dict) -> ViewOptions:
+        return view_options_from_arguments(options, show_ref=self._config_from_options(options).show_ref)
+
+    def _has_view_options(self, options: dict) -> bool:
+        """
+        Whether rendered diagram depends on options other than export
+        config, so it cannot be taken from diagram cache.
+        """
+        return not self._view_options(options).is_default or options['with_db_stats'] or options['db_routing']
+
+    def _renderer(self, graph: ModelGraph, options: dict) -> GraphRenderer:
+        overlays = []
+        if options['with_db_stats']:
+            try:
+                with self._profiler.phase('db_stats'):
+                    overlays.append(DbStatsOverlay(collect_stats(graph)))
+            except DbStatsError as e:
+                raise CommandError(str(e))
+        containers = None
+        if options['db_routing']:
+            with self._profiler.phase('db_routing'):
+                routing = self._routing(graph)
+                overlays.append(DatabaseOverlay(routing.cross_database_relations()))
+                containers = routing.containers()
+        try:
+            return make_renderer(graph, self._view_options(options), self._profiler, overlays, containers)
+        except (OSError, ProfileFormatError) as e:
+            raise CommandError(f'Cannot read query profile: {e}')
+
+    def _routing(self, graph: ModelGraph) -> DatabaseRouting:
+        try:
+            return DatabaseRouting(graph)
+        except DatabaseRoutingError as e:
+            raise CommandError(str(e))
+
+    def _view_graph(self, graph: ModelGraph, options: dict) -> ModelGraph:
+        try:
+            return view_graph(graph, self._view_options(options), self._profiler)
+        except LookupError as e:
+            raise CommandError(str(e))
+
+    def _uses_migrations(self, options: dict) -> bool:
+        return options['from_migrations'] or options['migration'] is not None
+
+    def _build_graph(self, options: dict) -> ModelGraph:
+        config = self._config_from_options(options)
+        if not self._uses_migrations(options):
+            return GraphModelBuilder(config, self._profiler).build_graph()
+
+        migration = tuple(options['migration']) if options['migration'] else None
+        try:
+            builder = MigrationStateGraphBuilder(config, migration, self._profiler)
+        except AmbiguityError:
+            raise CommandError(f'More than one migration matches {migration[1]!r} in app {migration[0]!r}.')
+        except KeyError:
+            raise CommandError(f'Cannot find migration {migration[1]!r} in app {migration[0]!r}.')
+        return builder.build_graph()
 
     def _config_from_options(self, options: dict) -> ModelExportConfig:
         args = (
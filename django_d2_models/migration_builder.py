@@ -0,0 +1,72 @@
+"""
+Builds model graph from migration files instead of application
+model registry.
+
+Models are rendered from `ProjectState` produced by migration loader,
+so graph reflects migrations and can be built for any point of
+migration history. Django still has to be set up, which imports
+models modules of all apps, so this is not faster than building
+graph from registry. `static_migrations` builds the same graph from
+parsed migration files without setting up django.
+"""
+
+from typing import Type, Optional
+
+from django.apps import apps
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.state import ProjectState
+from django.db.models import Model
+
+from .graph_builder import GraphModelBuilder, ModelExportConfig
+from .profiling import NullProfiler
+
+
+def load_project_state(migration: Optional[tuple[str, str]] = None) -> ProjectState:
+    """
+    Returns project state after applying all migrations or, if
+    `migration` is given as (app_label, migration_name prefix),
+    state right after applying that migration.
+    """
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    if migration is None:
+        return loader.project_state()
+
+    app_label, name = migration
+    key = loader.get_migration_by_prefix(app_label, name)
+    return loader.project_state((key.app_label, key.name), at_end=True)
+
+
+class MigrationStateGraphBuilder(GraphModelBuilder):
+    """
+    Migrations do not record abstract models, so fields inherited
+    from them are always shown inline.
+    """
+
+    def __init__(
+        self,
+        config: ModelExportConfig,
+        migration: Optional[tuple[str, str]] = None,
+        profiler: Optional[NullProfiler] = None,
+    ):
+        super().__init__(config, profiler)
+        with self._profiler.phase('migrations'):
+            self._state_apps = load_project_state(migration).apps
+
+    def get_app_models(self) -> dict[str, dict[str, Type[Model]]]:
+        return self._state_apps.all_models
+
+    def get_model(self, label: str) -> Type[Model]:
+        self._profiler.count('get_model')
+        return self._state_apps.get_model(label)
+
+    def should_export_app(self, app_name: str) -> bool:
+        self._profiler.count('should_export_app')
+        if app_name in self._config.exclude_apps:
+            return False
+        if not self._config.user_apps_only:
+            return True
+        # Migration state only knows labels, so locality is taken
+        # from installed application with the same label.
+        if app_name not in apps.app_configs:
+            return False
+        return self._is_local_app(app_name)
@@ -0,0 +1,26 @@
+"""
+Extension point for adding styles to rendered diagram.
+"""
+
+from typing import TYPE_CHECKING
+
+from .graph import BaseRelation, ModelView
+
+if TYPE_CHECKING:
+    from django.db.models import Field
+
+
+class Overlay:
+    """
+    Adds d2 attributes, e.g. `style.fill`, to rendered models, fields
+    and relations. Values are written as is, so colours must be quoted.
+    """
+
+    def model_attributes(self, model: ModelView) -> dict[str, str]:
+        return {}
+
+    def field_attributes(self, model: ModelView, field: 'Field') -> dict[str, str]:
+        return {}
+
+    def relation_attributes(self, relation: BaseRelation) -> dict[str, str]:
+        return {}
@@ -0,0 +1,163 @@
+"""
+Splits graph into groups of related models, so each group can be
+rendered in its own d2 container and laid out independently.
+"""
+
+from typing import Optional
+
+from .compact import CompactGraph
+from .graph import ModelGraph
+
+
+ISOLATED = 'isolated'
+"""Container for models without any relations."""
+
+
+def connected_components(graph: CompactGraph) -> list[int]:
+    """
+    Component representative for each node id, found with union-find
+    over relation and inheritance edges.
+    """
+    parent = list(range(len(graph)))
+
+    def find(node_id: int) -> int:
+        root = node_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node_id] != root:
+            parent[node_id], node_id = root, parent[node_id]
+        return root
+
+    for source, target in zip(graph.edge_source, graph.edge_target):
+        source_root, target_root = find(source), find(target)
+        if source_root != target_root:
+            parent[max(source_root, target_root)] = min(source_root, target_root)
+    return [find(node_id) for node_id in range(len(graph))]
+
+
+TRIANGLE_DEGREE_LIMIT = 64
+"""
+Nodes with more neighbours are not counted as shared neighbours, see
+`edge_weights`.
+"""
+
+
+def edge_weights(
+    adjacency: dict[int, set[int]],
+    degree_limit: int = TRIANGLE_DEGREE_LIMIT,
+) -> dict[int, dict[int, int]]:
+    """
+    Weight of each edge: 1 plus number of neighbours both its nodes
+    share, i.e. of triangles it is part of.
+
+    Hubs with more than `degree_limit` neighbours, like user model
+    referenced from everywhere, are skipped: being related to the
+    same hub says little about coupling of two models, and skipping
+    them bounds the work. Every triangle is found from its node of
+    the lowest degree, following edges oriented towards higher degree,
+    so for each edge at most `degree_limit` neighbours are checked,
+    which takes O(E * degree_limit).
+    """
+    rank = {node_id: (len(adjacent), node_id) for node_id, adjacent in adjacency.items()}
+    forward = {
+        node_id: [
+            neighbour for neighbour in adjacent
+            if rank[neighbour] > rank[node_id] and len(adjacency[neighbour]) <= degree_limit
+        ]
+        for node_id, adjacent in adjacency.items()
+        if len(adjacent) <= degree_limit
+    }
+    weights = {node_id: dict.fromkeys(adjacent, 1) for node_id, adjacent in adjacency.items()}
+    for first, later_nodes in forward.items():
+        later = set(later_nodes)
+        for second in later_nodes:
+            for third in forward[second]:
+                if third not in later:
+                    continue
+                for left, right in ((first, second), (second, third), (first, third)):
+                    weights[left][right] += 1
+                    weights[right][left] += 1
+    return weights
+
+
+def propagate_labels(graph: CompactGraph, node_ids: list[int], iterations: int = 10) -> dict[int, int]:
+    """
+    Finds tightly coupled clusters among `node_ids` with label
+    propagation: each node repeatedly takes the label with the largest
+    vote of its neighbours. Vote of neighbour is weighted by number of
+    neighbours both nodes share (see `edge_weights`), so edges inside
+    densely connected groups outweigh edges bridging them. Each round
+    takes O(E).
+
+    Node keeps its label on ties it is part of, other ties are broken
+    by smaller label, so result is deterministic.
+    """
+    members = set(node_ids)
+    adjacency: dict[int, set[int]] = {node_id: set() for node_id in node_ids}
+    for node_id in node_ids:
+        for neighbour in graph.neighbours(node_id):
+            if neighbour != node_id and neighbour in members:
+                adjacency[node_id].add(neighbour)
+
+    weights = edge_weights(adjacency)
+    labels = {node_id: node_id for node_id in node_ids}
+    for _ in range(iterations):
+        changed = False
+        for node_id in node_ids:
+            votes: dict[int, int] = {}
+            for neighbour, weight in weights[node_id].items():
+                label = labels[neighbour]
+                votes[label] = votes.get(label, 0) + weight
+            if not votes:
+                continue
+            best = max(votes.values())
+            if votes.get(labels[node_id]) == best:
+                continue
+            labels[node_id] = min(label for label, vote in votes.items() if vote == best)
+            changed = True
+        if not changed:
+            break
+    return labels
+
+
+def partition_graph(
+    graph: ModelGraph,
+    split_clusters: bool = False,
+    max_size: int = 50,
+    index: Optional[CompactGraph] = None,
+) -> dict[str, str]:
+    """
+    Maps model labels to container names. Each connected component
+    gets its own container; with `split_clusters`, components larger
+    than `max_size` are split further into clusters.
+    """
+    if index is None:
+        index = CompactGraph.from_model_graph(graph)
+    components = connected_components(index)
+
+    groups: dict[int, list[int]] = {}
+    for node_id, component in enumerate(components):
+        groups.setdefault(component, []).append(node_id)
+
+    partitions: list[list[int]] = []
+    isolated: list[int] = []
+    for node_ids in groups.values():
+        if len(node_ids) == 1:
+            isolated += node_ids
+        elif split_clusters and len(node_ids) > max_size:
+            clusters: dict[int, list[int]] = {}
+            for node_id, label in propagate_labels(index, node_ids).items():
+                clusters.setdefault(label, []).append(node_id)
+            partitions += clusters.values()
+        else:
+            partitions.append(node_ids)
+
+    prefix = 'cluster' if split_clusters else 'component'
+    partitions.sort(key=lambda node_ids: (-len(node_ids), node_ids[0]))
+    result = {
+        index.labels[node_id]: f'{prefix}_{i}'
+        for i, node_ids in enumerate(partitions)
+        for node_id in node_ids
+    }
+    result.update((index.labels[node_id], ISOLATED) for node_id in isolated)
+    return result
@@ -0,0 +1,108 @@
+"""
+Per-phase timing and memory accounting for diagram generation.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field, asdict
+
+
+@dataclass
+class PhaseStats:
+    seconds: float = 0.0
+    """Wall time spent in phase, excluding nested phases."""
+    calls: int = 0
+    """Number of times phase was entered."""
+    allocated_bytes: int = 0
+    """Peak memory allocated during phase, over its baseline, including nested phases."""
+    counters: dict[str, int] = field(default_factory=dict)
+
+
+class NullProfiler:
+    """
+    Profiler doing nothing, used when profiling is disabled.
+    """
+
+    def phase(self, name: str):
+        return nullcontext()
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+
+class PhaseProfiler(NullProfiler):
+    """
+    Collects wall time, number of calls and allocated memory of
+    named phases. Phases may nest: time of nested phase is only
+    counted in it, so times of all phases add up to at most total
+    time, while peak memory of outer phase includes nested ones.
+    """
+
+    def __init__(self, trace_memory: bool = True):
+        self.phases: dict[str, PhaseStats] = {}
+        self._trace_memory = trace_memory
+        self._current: PhaseStats = PhaseStats()
+        self._stack: list[_Frame] = []
+        self._started = time.perf_counter()
+
+    def __enter__(self) -> 'PhaseProfiler':
+        if self._trace_memory:
+            tracemalloc.start()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.total_seconds = time.perf_counter() - self._started
+        if self._trace_memory:
+            tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, name: str):
+        stats = self.phases.setdefault(name, PhaseStats())
+        previous, self._current = self._current, stats
+        tracing = tracemalloc.is_tracing()
+        frame = _Frame()
+        if tracing:
+            frame.baseline, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # Resetting peak below would lose peak of outer phase.
+                parent = self._stack[-1]
+                parent.peak = max(parent.peak, peak)
+            tracemalloc.reset_peak()
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            stats.seconds += elapsed - frame.nested_seconds
+            stats.calls += 1
+            if self._stack:
+                self._stack[-1].nested_seconds += elapsed
+            if tracing:
+                _, peak = tracemalloc.get_traced_memory()
+                stats.allocated_bytes = max(stats.allocated_bytes, max(frame.peak, peak) - frame.baseline)
+            self._current = previous
+
+    def count(self, name: str, n: int = 1):
+        counters = self._current.counters
+        counters[name] = counters.get(name, 0) + n
+
+    def report(self) -> dict:
+        return {
+            'total_seconds': getattr(self, 'total_seconds', time.perf_counter() - self._started),
+            'phases': {name: asdict(stats) for name, stats in self.phases.items()},
+        }
+
+
+@dataclass
+class _Frame:
+    """
+    State of entered phase.
+    """
+    baseline: int = 0
+    peak: int = 0
+    """Peak memory seen before nested phases reset it."""
+    nested_seconds: float = 0.0
@@ -0,0 +1,171 @@
+"""
+Combined diagram of several django projects, e.g. of monorepo whose
+projects share some apps:
+
+    python -m django_d2_models.projects \\
+        services/shop:shop.settings services/crm:crm.settings --output all.d2
+
+Each project is given as settings module, optionally prefixed with
+directory to put on `sys.path`. Only one settings module can be
+configured per process, so every project is extracted in fresh
+process of a pool and sends its graph back in binary serialized form.
+
+Graphs are merged by model label, first project wins for models
+defined differently. Models found in single project are put into
+container of that project, models of several projects into `shared`.
+"""
+
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+from .graph import ModelGraph, merge_graphs
+from .graph_builder import ModelExportConfig
+from .renderer import GraphRenderer
+from .serialization import dump_graph, dumps, loads
+
+
+SHARED_CONTAINER = 'shared'
+
+
+@dataclass(frozen=True)
+class Project:
+    settings: str
+    """Dotted path of settings module."""
+    path: Optional[str] = None
+    """Directory added to `sys.path` before django is set up."""
+
+    @property
+    def name(self) -> str:
+        name = Path(os.path.abspath(self.path)).name if self.path else self.settings.split('.')[0]
+        return re.sub(r'\W', '_', name)
+
+    @classmethod
+    def parse(cls, value: str) -> 'Project':
+        """
+        Parses `[PATH:]SETTINGS_MODULE`.
+        """
+        path, _, settings = value.rpartition(':')
+        return cls(settings=settings, path=path or None)
+
+
+def extract_project(project: Project, config: ModelExportConfig) -> bytes:
+    """
+    Builds graph of project in current process, which must not have
+    django set up yet.
+    """
+    if project.path:
+        sys.path.insert(0, str(Path(project.path).resolve()))
+    os.environ['DJANGO_SETTINGS_MODULE'] = project.settings
+
+    import django
+    django.setup()
+    from .graph_builder import GraphModelBuilder
+    return dumps(GraphModelBuilder(config).build_graph(), binary=True)
+
+
+def _extract_job(task: tuple[Project, ModelExportConfig]) -> tuple[Optional[bytes], Optional[str]]:
+    project, config = task
+    try:
+        return extract_project(project, config), None
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+
+
+class ProjectExtractionError(Exception):
+    pass
+
+
+def extract_projects(
+    projects: Sequence[Project],
+    config: ModelExportConfig,
+    jobs: Optional[int] = None,
+) -> list[ModelGraph]:
+    """
+    Graphs of `projects` in the same order, extracted in parallel.
+    """
+    jobs = min(jobs or os.cpu_count() or 1, len(projects))
+    # Spawned workers serving single task each, so no django state
+    # leaks between projects.
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes=jobs, maxtasksperchild=1) as pool:
+        results = pool.map(_extract_job, [(project, config) for project in projects], chunksize=1)
+
+    graphs = []
+    for project, (data, error) in zip(projects, results):
+        if error is not None:
+            raise ProjectExtractionError(f'Cannot extract models of {project.settings}: {error}')
+        graphs.append(loads(data))
+    return graphs
+
+
+def project_containers(projects: Sequence[Project], graphs: Sequence[ModelGraph]) -> dict[str, str]:
+    """
+    Maps model labels to container of the only project defining
+    them, or to shared container if several projects do.
+    """
+    result = {}
+    for project, graph in zip(projects, graphs):
+        for node in graph.nodes:
+            label = node.model._meta.label
+            result[label] = SHARED_CONTAINER if result.get(label, project.name) != project.name else project.name
+    return result
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m django_d2_models.projects',
+        description='Generates single d2 diagram of models of several django projects.',
+    )
+    parser.add_argument(
+        'projects',
+        nargs='+',
+        metavar='[PATH:]SETTINGS',
+        help='Settings module of project, optionally prefixed with directory to add to sys.path.',
+    )
+    parser.add_argument('--output', help='Write diagram into file instead of stdout.')
+    parser.add_argument(
+        '--dump-graph',
+        metavar='PATH',
+        help='Write merged graph into file instead of rendering it, see `model_diagram --dump-graph`.',
+    )
+    parser.add_argument('--jobs', type=int, help='Number of parallel processes. Defaults to number of CPUs.')
+    parser.add_argument('--exclude-apps', nargs='+', default=[])
+    parser.add_argument('--hide-ref', action='store_true', help='Do not show models from excluded apps.')
+    parser.add_argument('--abstract-models-depth', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    projects = [Project.parse(value) for value in args.projects]
+    names = [project.name for project in projects]
+    if len(set(names)) != len(names) or SHARED_CONTAINER in names:
+        parser.error(f'Project names must be unique and not {SHARED_CONTAINER!r}: {", ".join(names)}')
+
+    config = ModelExportConfig(
+        exclude_apps=args.exclude_apps,
+        show_ref=not args.hide_ref,
+        abstract_models_depth=args.abstract_models_depth,
+    )
+    try:
+        graphs = extract_projects(projects, config, args.jobs)
+    except ProjectExtractionError as e:
+        parser.error(str(e))
+    graph = merge_graphs(graphs)
+
+    if args.dump_graph:
+        dump_graph(graph, args.dump_graph)
+        return
+    renderer = GraphRenderer(containers=project_containers(projects, graphs))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            renderer.write_model_graph(graph, output)
+    else:
+        renderer.write_model_graph(graph, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Records query hot paths of running django project.
+
+Wrap any code executing queries, e.g. load replay script:
+
+    with record_queries('hotness.json'):
+        replay()
+
+or run test suite with recording runner:
+
+    python manage.py test --testrunner django_d2_models.query_recorder.HotnessTestRunner \
+        --hotness-profile hotness.json
+
+Wrappers are installed on connections of current thread only, so
+tests must not run in parallel processes.
+"""
+
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Union
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+from .hotness import QueryProfile
+
+
+class QueryRecorder:
+    """
+    `execute_wrapper` accounting each executed query in profile.
+    """
+
+    def __init__(self, profile: Optional[QueryProfile] = None):
+        self.profile = profile or QueryProfile()
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            count = len(params) if many and isinstance(params, Sequence) else 1
+            with self._lock:
+                self.profile.add(sql, elapsed, count)
+
+
+@contextmanager
+def record_queries(
+    path: Union[str, Path, None] = None,
+    using: Optional[Sequence[str]] = None,
+) -> Iterator[QueryProfile]:
+    """
+    Records queries to databases `using` (all by default) executed
+    within block. Profile is merged into file at `path` if given, so
+    several runs can be accumulated.
+    """
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for alias in using or connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder.profile
+
+    if path is not None:
+        profile = recorder.profile
+        if Path(path).exists():
+            profile = QueryProfile.load(path)
+            profile.merge(recorder.profile)
+        profile.save(path)
+
+
+class HotnessTestRunner(DiscoverRunner):
+    """
+    Test runner recording queries executed by tests, excluding test
+    database setup.
+    """
+
+    def __init__(self, hotness_profile: str = 'hotness.json', **kwargs):
+        super().__init__(**kwargs)
+        self.hotness_profile = hotness_profile
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--hotness-profile',
+            default='hotness.json',
+            help='File to merge recorded query profile into.',
+        )
+
+    def run_suite(self, suite, **kwargs):
+        with record_queries(self.hotness_profile):
+            return super().run_suite(suite, **kwargs)
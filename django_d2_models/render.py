@@ -0,0 +1,235 @@
+"""
+Renders serialized model graph without django.
+
+Graph is extracted once with `model_diagram --dump-graph graph.json`,
+after which any number of views can be rendered from it:
+
+    python -m django_d2_models.render graph.json --focus chat.Message --radius 2
+    python -m django_d2_models.render graph.json --output-dir diagrams/ --aggregate-relations
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass, field
+from typing import Callable, Mapping, Optional, Sequence, TextIO
+
+from .cascade import CascadeOverlay, write_cascade_report
+from .focus import focus_graph
+from .graph import ModelGraph
+from .hotness import HotnessOverlay, ProfileFormatError, QueryProfile
+from .incremental import AppDiagramWriter
+from .indexes import IndexOverlay, write_index_report
+from .partition import partition_graph
+from .profiling import NullProfiler
+from .overlay import Overlay
+from .renderer import GraphRenderer
+from .serialization import GraphFormatError, load_graph
+
+
+@dataclass
+class ViewOptions:
+    """
+    Options of diagram view, which only depend on already built graph.
+    """
+    focus: list[str] = field(default_factory=list)
+    radius: int = 1
+    show_ref: bool = True
+    partition: Optional[str] = None
+    """Either 'components' or 'clusters'."""
+    max_cluster_size: int = 50
+    aggregate_relations: bool = False
+    indexes: bool = False
+    hotness: Optional[str] = None
+    """Path to query profile recorded with `query_recorder`."""
+    cascades: bool = False
+
+    @property
+    def is_default(self) -> bool:
+        return not (
+            self.focus or self.partition or self.aggregate_relations
+            or self.indexes or self.hotness or self.cascades
+        )
+
+
+REPORTS: dict[str, Callable[[ModelGraph, TextIO], None]] = {
+    'index_report': write_index_report,
+    'cascade_report': write_cascade_report,
+}
+"""Text reports written instead of diagram, by argument name."""
+
+
+def view_graph(graph: ModelGraph, options: ViewOptions, profiler: Optional[NullProfiler] = None) -> ModelGraph:
+    """
+    Applies focus to graph. Raises `LookupError` on unknown focus models.
+    """
+    if not options.focus:
+        return graph
+    with (profiler or NullProfiler()).phase('focus'):
+        return focus_graph(graph, options.focus, options.radius, show_ref=options.show_ref)
+
+
+def make_renderer(
+    graph: ModelGraph,
+    options: ViewOptions,
+    profiler: Optional[NullProfiler] = None,
+    overlays: Sequence[Overlay] = (),
+    containers: Optional[Mapping[str, str]] = None,
+) -> GraphRenderer:
+    """
+    Renderer for view. `overlays` are applied after ones implied by options,
+    `containers` are used unless options partition graph.
+    Raises `OSError` or `ProfileFormatError` if query profile cannot be read.
+    """
+    implied: list[Overlay] = []
+    if options.indexes:
+        implied.append(IndexOverlay(graph))
+    if options.hotness:
+        implied.append(HotnessOverlay(graph, QueryProfile.load(options.hotness)))
+    if options.cascades:
+        implied.append(CascadeOverlay(graph))
+    if options.partition:
+        with (profiler or NullProfiler()).phase('partition'):
+            containers = partition_graph(
+                graph,
+                split_clusters=options.partition == 'clusters',
+                max_size=options.max_cluster_size,
+            )
+    return GraphRenderer(
+        containers=containers,
+        aggregate_relations=options.aggregate_relations,
+        overlays=implied + list(overlays),
+        show_indexes=options.indexes,
+    )
+
+
+def add_view_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        '--focus',
+        type=str,
+        nargs='+',
+        metavar='MODEL',
+        help='Only show models within --radius relations of given models, e.g. chat.Message.',
+    )
+    parser.add_argument(
+        '--radius',
+        type=int,
+        default=1,
+        help='Number of relation or inheritance hops from --focus models to show.',
+    )
+    parser.add_argument(
+        '--partition',
+        choices=['components', 'clusters'],
+        help=(
+            'Put each connected component (or, with "clusters", each tightly '
+            'coupled cluster of large components) into its own d2 container, '
+            'so d2 lays them out independently.'
+        ),
+    )
+    parser.add_argument(
+        '--max-cluster-size',
+        type=int,
+        default=50,
+        help='Components larger than this are split into clusters with --partition clusters.',
+    )
+    parser.add_argument(
+        '--aggregate-relations',
+        action='store_true',
+        help='Draw all relations between the same pair of models as one edge labelled with their fields.',
+    )
+    parser.add_argument(
+        '--indexes',
+        action='store_true',
+        help=(
+            'Show indexes and unique constraints each field belongs to, '
+            'and highlight relations whose columns have no supporting index.'
+        ),
+    )
+    parser.add_argument(
+        '--index-report',
+        action='store_true',
+        help='Write list of relations without supporting index instead of diagram.',
+    )
+    parser.add_argument(
+        '--hotness',
+        metavar='PROFILE',
+        help=(
+            'Colour models and relations by frequency and latency of queries and joins '
+            'recorded into PROFILE with django_d2_models.query_recorder.'
+        ),
+    )
+    parser.add_argument(
+        '--cascades',
+        action='store_true',
+        help='Highlight longest on_delete=CASCADE chains of models whose deletes touch most tables.',
+    )
+    parser.add_argument(
+        '--cascade-report',
+        action='store_true',
+        help='Write models whose deletes cascade furthest instead of diagram.',
+    )
+
+
+def view_options_from_arguments(arguments: dict, show_ref: bool = True) -> ViewOptions:
+    return ViewOptions(
+        focus=arguments['focus'] or [],
+        radius=arguments['radius'],
+        show_ref=show_ref,
+        partition=arguments['partition'],
+        max_cluster_size=arguments['max_cluster_size'],
+        aggregate_relations=arguments['aggregate_relations'],
+        indexes=arguments['indexes'],
+        hotness=arguments['hotness'],
+        cascades=arguments['cascades'],
+    )
+
+
+def requested_report(arguments: dict) -> Optional[Callable[[ModelGraph, TextIO], None]]:
+    return next((report for name, report in REPORTS.items() if arguments.get(name)), None)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m django_d2_models.render',
+        description='Renders d2 diagram from graph dumped with `model_diagram --dump-graph`.',
+    )
+    parser.add_argument('graph', help='Graph file in JSON or binary format.')
+    parser.add_argument('--output', help='Write diagram into file instead of stdout.')
+    parser.add_argument('--output-dir', help='Write one d2 file per application into directory.')
+    parser.add_argument('--hide-ref', action='store_true', help='Do not show relations leading out of --focus.')
+    add_view_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        graph = load_graph(args.graph)
+    except (OSError, GraphFormatError) as e:
+        parser.error(str(e))
+
+    options = view_options_from_arguments(vars(args), show_ref=not args.hide_ref)
+    try:
+        graph = view_graph(graph, options)
+    except LookupError as e:
+        parser.error(str(e))
+    report = requested_report(vars(args))
+    if report is not None:
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as output:
+                report(graph, output)
+        else:
+            report(graph, sys.stdout)
+        return
+
+    try:
+        renderer = make_renderer(graph, options)
+    except (OSError, ProfileFormatError) as e:
+        parser.error(str(e))
+    if args.output_dir:
+        AppDiagramWriter(args.output_dir, renderer).write(graph)
+    elif args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            renderer.write_model_graph(graph, output)
+    else:
+        renderer.write_model_graph(graph, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
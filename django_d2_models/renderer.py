@@ -1,72 +1,232 @@
-from typing import Type
+"""
+Renders model graph in d2 language.
 
-from django.db.models import Model, Field
-from django.db.models.fields.related import ForeignKey
+Renderer only relies on small part of model and field API, which is
+also provided by detached models, so it does not import django.
+"""
 
-from .graph_builder import ModelGraph, ModelView, Relation, RelationKind, InheritanceRelation
+import io
+from typing import TYPE_CHECKING, TextIO, Iterable, Mapping, Optional, Sequence
+
+from .aggregate import AggregatedRelation, aggregate_relations
+from .graph import ModelGraph, ModelView, Relation, RelationKind, InheritanceKind, InheritanceRelation
+from .indexes import index_constraints
+from .overlay import Overlay
+
+if TYPE_CHECKING:
+    from django.db.models import Field
 
 
 class GraphRenderer:
+    def __init__(
+        self,
+        containers: Optional[Mapping[str, str]] = None,
+        aggregate_relations: bool = False,
+        overlays: Sequence[Overlay] = (),
+        show_indexes: bool = False,
+    ):
+        """
+        `containers` maps model labels to names of d2 containers to
+        put models into. Models not in mapping stay at top level.
+
+        With `aggregate_relations` all relations between the same pair
+        of models are drawn as single edge.
+
+        Attributes of `overlays` are added to every element, later
+        overlays override earlier ones.
+
+        With `show_indexes` index membership of each field is rendered
+        as its constraints.
+        """
+        self._containers = containers or {}
+        self._aggregate_relations = aggregate_relations
+        self._overlays = list(overlays)
+        self._show_indexes = show_indexes
+        self._scope: Optional[str] = None
+        self._through_models: set[str] = set()
+
     def render_model_graph(self, graph: ModelGraph) -> str:
-        models = '\n'.join(self.render_model(model) for model in graph.nodes)
-        relations = '\n'.join(self.render_relation(rel) for rel in graph.relations)
-        inheritance = '\n'.join(self.render_inheritance_relation(rel) for rel in graph.inheritance)
-        return (
-            '# Models:\n\n'
-            f'{models}\n'
-            '# Relations:\n\n'
-            f'{relations}\n'
-            '# Inheritance:\n\n'
-            f'{inheritance}\n'
-        )
+        sink = io.StringIO()
+        self.write_model_graph(graph, sink)
+        return sink.getvalue()
+
+    def write_model_graph(self, graph: ModelGraph, sink: TextIO):
+        """
+        Write diagram into file-like `sink` block by block, so whole
+        document never has to be kept in memory.
+        """
+        self._through_models = {relation.through for relation in graph.relations if relation.through}
+        if self._containers:
+            self._write_containers(graph, sink)
+        else:
+            self._write_sections(graph, sink)
+
+    def _write_sections(self, graph: ModelGraph, sink: TextIO):
+        sink.write('# Models:\n\n')
+        self._write_blocks(sink, (self.render_model(model) for model in graph.nodes))
+        sink.write('# Relations:\n\n')
+        if self._aggregate_relations:
+            self._write_blocks(sink, (
+                self.render_aggregated_relation(rel) if isinstance(rel, AggregatedRelation)
+                else self.render_relation(rel)
+                for rel in aggregate_relations(graph.relations)
+            ))
+        else:
+            self._write_blocks(sink, (self.render_relation(rel) for rel in graph.relations))
+        sink.write('# Inheritance:\n\n')
+        self._write_blocks(sink, (self.render_inheritance_relation(rel) for rel in graph.inheritance))
+
+    def _write_containers(self, graph: ModelGraph, sink: TextIO):
+        """
+        Writes each container with its models and relations inside
+        it, so d2 lays containers out independently. Relations between
+        containers are written at top level.
+        """
+        groups: dict[Optional[str], ModelGraph] = {}
+
+        def group(container: Optional[str]) -> ModelGraph:
+            if container not in groups:
+                groups[container] = ModelGraph(nodes=[], inheritance=[], relations=[])
+            return groups[container]
+
+        def relation_container(relation) -> Optional[str]:
+            source = self._containers.get(relation.source_model)
+            return source if source == self._containers.get(relation.target_model) else None
+
+        for node in graph.nodes:
+            group(self._containers.get(node.model._meta.label)).nodes.append(node)
+        for relation in graph.relations:
+            group(relation_container(relation)).relations.append(relation)
+        for relation in graph.inheritance:
+            group(relation_container(relation)).inheritance.append(relation)
+
+        for container in [name for name in groups if name is not None]:
+            sink.write(f'{container}: {{\n')
+            self._scope = container
+            try:
+                self._write_sections(groups[container], IndentedSink(sink))
+            finally:
+                self._scope = None
+            sink.write('}\n\n')
+        self._write_sections(group(None), sink)
+
+    def node_path(self, label: str) -> str:
+        """
+        Path of model node relative to container currently written.
+        """
+        container = self._containers.get(label)
+        if container is None or container == self._scope:
+            return label
+        return f'{container}.{label}'
+
+    def _write_blocks(self, sink: TextIO, blocks: Iterable[str]):
+        for i, block in enumerate(blocks):
+            if i:
+                sink.write('\n')
+            sink.write(block)
+        sink.write('\n')
 
     def render_inheritance_relation(self, relation: InheritanceRelation) -> str:
-        return f'{relation.source_model} -> {relation.target_model}'
+        edge = f'{self.node_path(relation.source_model)} -> {self.node_path(relation.target_model)}'
+        attributes = {}
+        if relation.kind == InheritanceKind.MULTI_TABLE:
+            edge += ': "+1 join"'
+        elif relation.kind == InheritanceKind.PROXY:
+            edge += ': proxy'
+            attributes['style.stroke-dash'] = '3'
+        properties = self._render_block(self._overlay_items('relation_attributes', relation, defaults=attributes))
+        return f'{edge} {properties}' if properties else edge
 
     def render_model(self, model: ModelView) -> str:
+        attributes = {}
+        notes = []
+        if model.parent_joins:
+            notes.append(f'+{model.parent_joins} join' + ('s' if model.parent_joins > 1 else ''))
+        if model.model._meta.label in self._through_models:
+            notes.append('m2m through')
+        if notes:
+            attributes['label'] = f'"{model.model._meta.object_name} ({", ".join(notes)})"'
         return (
-            f'{model.model._meta.label}: {{\n'
+            f'{self.node_path(model.model._meta.label)}: {{\n'
             '\tshape: sql_table\n'
+            + ''.join(f'\t{item}\n' for item in self._overlay_items('model_attributes', model, defaults=attributes))
             + self.render_model_fields(model)
             + '\n}\n'
         )
 
     def render_model_fields(self, model: ModelView) -> str:
+        indexes = index_constraints(model) if self._show_indexes else {}
         return '\n'.join(
-            f'\t".{field_.name}": ".{field_.name}" {self.render_model_field_properties(field_)}'
+            f'\t".{field_.name}": ".{field_.name}" '
+            + self.render_model_field_properties(field_, model, indexes.get(field_.name, ()))
             for field_ in model.fields
         )
 
-    def render_model_field_properties(self, field: Field) -> str:
+    def render_model_field_properties(
+        self,
+        field: 'Field',
+        model: Optional[ModelView] = None,
+        indexes: Sequence[str] = (),
+    ) -> str:
         items = [
-            self.render_field_constraints(field),
+            self.render_field_constraints(field, indexes),
         ]
+        if model is not None:
+            items += self._overlay_items('field_attributes', model, field)
         items = [item for item in items if item]
         if not items:
             return ''
 
         return '{\n' + '\n'.join(f'\t\t{item}' for item in items) + '\n\t}'
 
-    def render_field_constraints(self, field: Field) -> str:
-        if field.name == 'id':
-            constraints = 'primary_key'
-        elif isinstance(field, ForeignKey):
-            constraints = 'foreign_key'
-        else:
-            constraints = None
+    def render_field_constraints(self, field: 'Field', indexes: Sequence[str] = ()) -> str:
+        """
+        `indexes` are additional constraints of field, e.g. names of
+        indexes it belongs to.
+        """
+        constraints = ['primary_key'] if field.primary_key else []
+        if field.many_to_one or field.one_to_one:
+            constraints.append('foreign_key')
+        elif field.many_to_many:
+            constraints.append('m2m')
+        constraints += [
+            item for item in indexes
+            if not (item == 'unique' and 'primary_key' in constraints)
+        ]
 
-        if constraints:
-            return f'constraint: {constraints}'
+        if len(constraints) == 1:
+            return f'constraint: {constraints[0]}'
+        elif constraints:
+            return f'constraint: [{"; ".join(constraints)}]'
         else:
             return ''
 
     def render_relation(self, relation: Relation) -> str:
-        source = f'{relation.source_model}.".{relation.source_field}"'
-        target = f'{relation.target_model}.".{relation.target_field}"'
+        source = f'{self.node_path(relation.source_model)}.".{relation.source_field}"'
+        target = f'{self.node_path(relation.target_model)}.".{relation.target_field}"'
         properties = self.render_relation_properties(relation)
+        if relation.through:
+            # Traversal joins through table too.
+            through = relation.through.rsplit('.', 1)[-1]
+            return f'{source} <-> {target}: "+1 join via {through}" {properties}\n'
         return f'{source} <-> {target} {properties}\n'
 
+    def render_aggregated_relation(self, relation: AggregatedRelation) -> str:
+        source = self.node_path(relation.source_model)
+        target = self.node_path(relation.target_model)
+        label = f'{relation.count}: {", ".join(relation.source_fields)}'
+        kinds = {item.kind for item in relation.relations}
+        items = self.render_arrowheads(relation.relations[0]) if len(kinds) == 1 else []
+        properties = self._render_block(items + self._overlay_items('relation_attributes', relation))
+        return f'{source} <-> {target}: "{label}" {properties}\n'
+
     def render_relation_properties(self, relation: Relation) -> str:
+        return self._render_block(
+            self.render_arrowheads(relation)
+            + self._overlay_items('relation_attributes', relation)
+        )
+
+    def render_arrowheads(self, relation: Relation) -> list[str]:
         if relation.kind == RelationKind.FOREIGN_KEY:
             source = 'cf-many'
             target = 'cf-one'
@@ -77,9 +237,41 @@ class GraphRenderer:
             source = 'cf-one'
             target = 'cf-one'
 
-        return (
-            '{\n'
-            f'\tsource-arrowhead.shape: {source}\n'
-            f'\ttarget-arrowhead.shape: {target}\n'
-            '}'
-        )
+        return [
+            f'source-arrowhead.shape: {source}',
+            f'target-arrowhead.shape: {target}',
+        ]
+
+    def _overlay_items(self, method: str, *args, defaults: Optional[dict[str, str]] = None) -> list[str]:
+        """
+        Attributes of element from overlays, rendered as d2 items.
+        Overlays override `defaults` set by renderer itself.
+        """
+        attributes: dict[str, str] = dict(defaults or {})
+        for overlay in self._overlays:
+            attributes.update(getattr(overlay, method)(*args))
+        return [f'{key}: {value}' for key, value in attributes.items()]
+
+    @staticmethod
+    def _render_block(items: list[str]) -> str:
+        if not items:
+            return ''
+        return '{\n' + ''.join(f'\t{item}\n' for item in items) + '}'
+
+
+class IndentedSink:
+    """
+    Wraps file-like object, indenting every written line.
+    """
+
+    def __init__(self, sink: TextIO, prefix: str = '\t'):
+        self._sink = sink
+        self._prefix = prefix
+        self._line_start = True
+
+    def write(self, text: str):
+        for line in text.splitlines(keepends=True):
+            if self._line_start and line != '\n':
+                self._sink.write(self._prefix)
+            self._sink.write(line)
+            self._line_start = line.endswith('\n')
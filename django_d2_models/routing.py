@@ -0,0 +1,164 @@
+"""
+Databases models are routed to by `DATABASE_ROUTERS`.
+
+Tables of different databases cannot be joined, so relation between
+models read from different databases cannot be used in joins and
+every traversal of it is separate query.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional, TextIO, Type
+
+from django.apps import apps
+from django.db import router
+from django.db.models import Model
+from django.db.models.base import ModelState
+
+from .db_stats import database_alias, registered_model
+from .graph import BaseRelation, ModelGraph, Relation, concrete_labels
+from .overlay import Overlay
+
+
+CROSS_STROKE = '"#8e44ad"'
+
+
+class DatabaseRoutingError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class CrossDatabaseRelation:
+    relation: Relation
+    source_model: str
+    """Label of concrete source model, differs from relation source for abstract models."""
+    source_database: str
+    target_database: str
+    allowed: bool
+    """Whether routers allow relation between objects of these databases."""
+
+
+class DatabaseRouting:
+    """
+    Database of every concrete model of graph and of models its
+    relations refer to, as reported by `router.db_for_read`. Detached
+    models, e.g. of cached graph, are resolved to registered ones.
+    """
+
+    def __init__(self, graph: ModelGraph):
+        self._graph = graph
+        self._models: dict[str, Type[Model]] = {}
+        for node in graph.nodes:
+            meta = node.model._meta
+            if meta.abstract:
+                continue
+            try:
+                self._models[meta.label] = registered_model(node.model)
+            except LookupError as e:
+                raise DatabaseRoutingError(f'Cannot find database of {meta.label}: {e}')
+        for relation in graph.relations:
+            if relation.target_model not in self._models:
+                model = _registered_model(relation.target_model)
+                if model is not None:
+                    self._models[relation.target_model] = model
+        self.databases: dict[str, str] = {
+            label: database_alias(model)
+            for label, model in self._models.items()
+        }
+
+    def containers(self) -> dict[str, str]:
+        """
+        Maps model labels to d2 container named after their database.
+        """
+        return {label: re.sub(r'\W', '_', alias) for label, alias in self.databases.items()}
+
+    def cross_database_relations(self) -> list[CrossDatabaseRelation]:
+        """
+        Relations between models of different databases. Relations of
+        abstract models are checked for every concrete model inheriting them.
+        """
+        concrete = concrete_labels(self._graph)
+        result = []
+        for relation in self._graph.relations:
+            target_database = self.databases.get(relation.target_model)
+            if target_database is None:
+                continue
+            for source in concrete.get(relation.source_model, [relation.source_model]):
+                source_database = self.databases.get(source)
+                if source_database is None or source_database == target_database:
+                    continue
+                allowed = router.allow_relation(
+                    _instance(self._models[source], source_database),
+                    _instance(self._models[relation.target_model], target_database),
+                )
+                result.append(CrossDatabaseRelation(
+                    relation=relation,
+                    source_model=source,
+                    source_database=source_database,
+                    target_database=target_database,
+                    allowed=bool(allowed),
+                ))
+        return result
+
+
+def _registered_model(label: str) -> Optional[Type[Model]]:
+    try:
+        return apps.get_model(label)
+    except (LookupError, ValueError):
+        return None
+
+
+def _instance(model: Type[Model], alias: str) -> Model:
+    """
+    Unsaved object loaded from `alias`, as routers see it. Model
+    `__init__` is skipped, so no field defaults are computed.
+    """
+    instance = model.__new__(model)
+    instance._state = ModelState()
+    instance._state.db = alias
+    return instance
+
+
+class DatabaseOverlay(Overlay):
+    """
+    Flags relations crossing database boundary.
+    """
+
+    def __init__(self, crossings: list[CrossDatabaseRelation]):
+        self._crossings: dict[Relation, CrossDatabaseRelation] = {}
+        for item in crossings:
+            self._crossings.setdefault(item.relation, item)
+
+    def relation_attributes(self, relation: BaseRelation) -> dict[str, str]:
+        relations = getattr(relation, 'relations', (relation,))
+        item = next((self._crossings[item] for item in relations if item in self._crossings), None)
+        if item is None:
+            return {}
+        return {
+            'style.stroke': CROSS_STROKE,
+            'style.stroke-width': '3',
+            'style.stroke-dash': '5',
+            'tooltip': f'"{item.source_database} -> {item.target_database}: cannot be joined"',
+        }
+
+
+def write_routing_report(routing: DatabaseRouting, sink: TextIO):
+    counts: dict[str, int] = {}
+    for alias in routing.databases.values():
+        counts[alias] = counts.get(alias, 0) + 1
+    databases = [f'{alias} ({count} model{"s" if count != 1 else ""})' for alias, count in sorted(counts.items())]
+    sink.write(f'Databases: {", ".join(databases)}\n')
+
+    crossings = routing.cross_database_relations()
+    if not crossings:
+        sink.write('No relations cross database boundary.\n')
+        return
+    sink.write(f'Relations crossing database boundary: {len(crossings)}\n')
+    for item in crossings:
+        relation = item.relation
+        sink.write(
+            f'  {item.source_model}.{relation.source_field} -> '
+            f'{relation.target_model}.{relation.target_field}: '
+            f'{item.source_database} -> {item.target_database}'
+            f'{"" if item.allowed else ", not allowed by routers"}\n'
+        )
@@ -0,0 +1,235 @@
+"""
+Serialization of `ModelGraph` into versioned JSON document and its
+compact binary variant.
+
+JSON document looks like:
+
+    {
+        "format": "django_d2_models.graph",
+        "version": 2,
+        "models": [
+            {
+                "label": "chat.Message",
+                "db_table": "chat_message",
+                "abstract": false,
+                "parent_joins": 0,
+                "fields": [
+                    {"name": "id", "type": "BigAutoField", "primary_key": true, "null": false,
+                     "relation": null, "related_model": null},
+                    ...
+                ],
+                "indexes": [
+                    {"fields": ["chat", "user"], "unique": true, "name": "unique_vote"},
+                    ...
+                ]
+            }
+        ],
+        "relations": [
+            {"source_model": "chat.Vote", "source_field": "message", "target_model": "chat.Message",
+             "target_field": "id", "kind": "fk", "allow_null": false, "on_delete": "CASCADE",
+             "through": null},
+            {"source_model": "chat.Chat", "source_field": "members", "target_model": "users.User",
+             "target_field": "id", "kind": "m2m", "allow_null": false, "on_delete": null,
+             "through": "chat.Chat_members"}
+        ],
+        "inheritance": [
+            {"source_model": "chat.Message", "target_model": "chat.AbstractMessage", "kind": "abstract"}
+        ]
+    }
+
+`indexes` is `null` when indexes of model are unknown.
+
+Version 1 documents have no `parent_joins`, `indexes`, `on_delete`,
+`through` and inheritance `kind`; they are still loaded, with joins
+and indexes unknown and inheritance assumed abstract.
+
+Binary variant is the same document, zlib-compressed after magic
+header, which makes it several times smaller and faster to read.
+Loaded graphs are made of detached models, so no django is needed.
+"""
+
+import json
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Union
+
+from .compact import related_label
+from .detached import DetachedField, DetachedModel, DetachedOptions
+from .graph import Index, ModelGraph, ModelView, Relation, RelationKind, InheritanceKind, InheritanceRelation
+
+
+FORMAT = 'django_d2_models.graph'
+VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+BINARY_MAGIC = b'D2MG'
+
+
+class GraphFormatError(ValueError):
+    pass
+
+
+def graph_to_dict(graph: ModelGraph) -> dict[str, Any]:
+    return {
+        'format': FORMAT,
+        'version': VERSION,
+        'models': [_model_to_dict(node) for node in graph.nodes],
+        'relations': [
+            {
+                'source_model': relation.source_model,
+                'source_field': relation.source_field,
+                'target_model': relation.target_model,
+                'target_field': relation.target_field,
+                'kind': relation.kind.value,
+                'allow_null': relation.allow_null,
+                'on_delete': relation.on_delete,
+                'through': relation.through,
+            }
+            for relation in graph.relations
+        ],
+        'inheritance': [
+            {
+                'source_model': relation.source_model,
+                'target_model': relation.target_model,
+                'kind': relation.kind.value,
+            }
+            for relation in graph.inheritance
+        ],
+    }
+
+
+def _model_to_dict(node: ModelView) -> dict[str, Any]:
+    meta = node.model._meta
+    return {
+        'label': meta.label,
+        'db_table': meta.db_table,
+        'abstract': bool(meta.abstract),
+        'parent_joins': node.parent_joins,
+        'fields': [_field_to_dict(node, field_) for field_ in node.fields],
+        'indexes': None if node.indexes is None else [
+            {'fields': list(index.fields), 'unique': index.unique, 'name': index.name}
+            for index in node.indexes
+        ],
+    }
+
+
+def _field_to_dict(node: ModelView, field_) -> dict[str, Any]:
+    relation = None
+    related_model = None
+    if field_.is_relation and field_.related_model is not None:
+        if field_.many_to_many:
+            relation = RelationKind.MANY_TO_MANY.value
+        elif field_.one_to_one:
+            relation = RelationKind.ONE_TO_ONE.value
+        else:
+            relation = RelationKind.FOREIGN_KEY.value
+        related_model = related_label(node, field_.related_model)
+    return {
+        'name': field_.name,
+        'type': field_.get_internal_type(),
+        'primary_key': bool(field_.primary_key),
+        'null': bool(field_.null),
+        'relation': relation,
+        'related_model': related_model,
+    }
+
+
+def graph_from_dict(data: dict[str, Any]) -> ModelGraph:
+    if data.get('format') != FORMAT:
+        raise GraphFormatError('Not a serialized model graph.')
+    if data.get('version') not in SUPPORTED_VERSIONS:
+        raise GraphFormatError(f"Unsupported graph format version {data.get('version')!r}, expected {VERSION}.")
+
+    nodes = []
+    for model in data['models']:
+        app_label, object_name = model['label'].split('.', 1)
+        fields = [
+            DetachedField(
+                name=field_['name'],
+                internal_type=field_['type'],
+                primary_key=field_['primary_key'],
+                null=field_['null'],
+                many_to_one=field_['relation'] == RelationKind.FOREIGN_KEY.value,
+                one_to_one=field_['relation'] == RelationKind.ONE_TO_ONE.value,
+                many_to_many=field_['relation'] == RelationKind.MANY_TO_MANY.value,
+                related_model=field_['related_model'],
+            )
+            for field_ in model['fields']
+        ]
+        options = DetachedOptions(
+            app_label=app_label,
+            object_name=object_name,
+            db_table=model['db_table'],
+            abstract=model['abstract'],
+            fields=fields,
+        )
+        indexes = model.get('indexes')
+        if indexes is not None:
+            indexes = [
+                Index(tuple(index['fields']), unique=index['unique'], name=index['name'])
+                for index in indexes
+            ]
+        nodes.append(ModelView(DetachedModel(options), fields, indexes, model.get('parent_joins', 0)))
+
+    return ModelGraph(
+        nodes=nodes,
+        relations=[
+            Relation(
+                source_model=relation['source_model'],
+                source_field=relation['source_field'],
+                target_model=relation['target_model'],
+                target_field=relation['target_field'],
+                kind=RelationKind(relation['kind']),
+                allow_null=relation['allow_null'],
+                on_delete=relation.get('on_delete'),
+                through=relation.get('through'),
+            )
+            for relation in data['relations']
+        ],
+        inheritance=[
+            InheritanceRelation(
+                source_model=relation['source_model'],
+                target_model=relation['target_model'],
+                kind=InheritanceKind(relation.get('kind', InheritanceKind.ABSTRACT.value)),
+            )
+            for relation in data['inheritance']
+        ],
+    )
+
+
+def dumps(graph: ModelGraph, binary: bool = False) -> bytes:
+    if not binary:
+        return json.dumps(graph_to_dict(graph), indent=1).encode('utf-8')
+    document = json.dumps(graph_to_dict(graph), separators=(',', ':')).encode('utf-8')
+    return BINARY_MAGIC + struct.pack('<B', VERSION) + zlib.compress(document, 6)
+
+
+def loads(data: bytes) -> ModelGraph:
+    """
+    Loads graph from JSON or binary representation. Raises
+    `GraphFormatError` for data which is not a valid graph.
+    """
+    try:
+        if data.startswith(BINARY_MAGIC):
+            (version,) = struct.unpack_from('<B', data, len(BINARY_MAGIC))
+            if version not in SUPPORTED_VERSIONS:
+                raise GraphFormatError(f'Unsupported graph format version {version!r}, expected {VERSION}.')
+            data = zlib.decompress(data[len(BINARY_MAGIC) + 1:])
+        return graph_from_dict(json.loads(data))
+    except GraphFormatError:
+        raise
+    except (struct.error, zlib.error, KeyError, TypeError, AttributeError, ValueError) as e:
+        raise GraphFormatError(f'Malformed graph document: {e!r}') from e
+
+
+def dump_graph(graph: ModelGraph, path: Union[str, Path]):
+    """
+    Writes graph into file, as JSON if file name ends with `.json`,
+    in binary form otherwise.
+    """
+    path = Path(path)
+    path.write_bytes(dumps(graph, binary=path.suffix != '.json'))
+
+
+def load_graph(path: Union[str, Path]) -> ModelGraph:
+    return loads(Path(path).read_bytes())
@@ -0,0 +1,697 @@
+"""
+Extracts model graph by parsing `models.py` files with `ast`.
+
+Does not need configured django, settings or database drivers, which
+makes it suitable for lint and pre-commit jobs. Since nothing is
+imported, extraction relies on conventions:
+
+- classes derived from `models.Model`, from other parsed models or
+  from classes imported from some `models` module are models;
+- app label is taken from `label` or `name` of AppConfig in `apps.py`
+  next to models module, falling back to directory name;
+- fields are class level assignments of calls to `*Field` and
+  `ForeignKey` callables;
+- models imported from modules which are not parsed only get a label
+  guessed from their module path, their fields are unknown.
+
+Usage:
+
+    python -m django_d2_models.static_extractor apps/ --settings-file project/settings.py
+"""
+
+import argparse
+import ast
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Iterable, Sequence
+
+from .detached import DetachedField, DetachedModel, DetachedOptions
+from .graph import (
+    ModelGraph, ModelView, Relation, RelationKind, InheritanceRelation, InheritanceKind,
+)
+from .renderer import GraphRenderer
+
+
+DJANGO_MODEL = 'django.db.models.Model'
+AUTH_USER_MODEL = '@AUTH_USER_MODEL'
+"""Reference placeholder for `get_user_model()` and `settings.AUTH_USER_MODEL`."""
+
+RELATION_KINDS = {
+    'ForeignKey': RelationKind.FOREIGN_KEY,
+    'OneToOneField': RelationKind.ONE_TO_ONE,
+    'ManyToManyField': RelationKind.MANY_TO_MANY,
+}
+NOT_FIELDS = {'GenericForeignKey', 'GenericRelation'}
+SKIP_DIRS = {'migrations', '__pycache__', 'node_modules', 'site-packages'}
+
+
+@dataclass
+class ParsedField:
+    name: str
+    field_type: str
+    to: Optional[str] = None
+    """
+    Reference to related model: dotted class path, model label,
+    'self' or `AUTH_USER_MODEL` placeholder.
+    """
+    null: bool = False
+    primary_key: bool = False
+    on_delete: Optional[str] = None
+    """Name of `on_delete` handler, e.g. 'CASCADE'."""
+    through: Optional[str] = None
+    """Reference to explicit through model of many-to-many field."""
+    to_field: Optional[str] = None
+
+
+@dataclass
+class ParsedClass:
+    path: str
+    """Dotted path of class: `module.ClassName`."""
+    name: str
+    app_label: str
+    bases: list[str]
+    abstract: bool
+    db_table: Optional[str]
+    fields: list[ParsedField]
+    proxy: bool = False
+
+
+@dataclass
+class ParsedModule:
+    module: str
+    app_label: str
+    classes: list[ParsedClass] = field(default_factory=list)
+
+
+def find_models_files(paths: Iterable[str]) -> list[Path]:
+    result = []
+    for path in map(Path, paths):
+        if path.is_file():
+            result.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(
+                name for name in dirs
+                if not name.startswith('.') and name not in SKIP_DIRS
+            )
+            root_path = Path(root)
+            if root_path.name == 'models':
+                result += [root_path / name for name in sorted(files) if name.endswith('.py')]
+            elif 'models.py' in files:
+                result.append(root_path / 'models.py')
+    return result
+
+
+def module_name(path: Path) -> str:
+    path = path.resolve()
+    parts = [] if path.stem == '__init__' else [path.stem]
+    directory = path.parent
+    while (directory / '__init__.py').exists():
+        parts.append(directory.name)
+        directory = directory.parent
+    return '.'.join(reversed(parts))
+
+
+def app_directory(path: Path) -> Path:
+    directory = path.resolve().parent
+    if directory.name == 'models':
+        directory = directory.parent
+    return directory
+
+
+def app_label(directory: Path) -> str:
+    """
+    Reads app label from AppConfig declared in `apps.py`.
+    """
+    label = directory.name
+    try:
+        tree = ast.parse((directory / 'apps.py').read_text(encoding='utf-8'))
+    except (OSError, SyntaxError):
+        return label
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.ClassDef):
+            continue
+        attributes = dict(iter_constant_assignments(node.body))
+        if isinstance(attributes.get('label'), str):
+            return attributes['label']
+        if isinstance(attributes.get('name'), str):
+            label = attributes['name'].rsplit('.', 1)[-1]
+    return label
+
+
+def read_auth_user_model(settings_file: str) -> Optional[str]:
+    tree = ast.parse(Path(settings_file).read_text(encoding='utf-8'))
+    value = dict(iter_constant_assignments(tree.body)).get('AUTH_USER_MODEL')
+    return value if isinstance(value, str) else None
+
+
+def iter_constant_assignments(body: Sequence[ast.stmt]):
+    for statement in body:
+        if (
+            isinstance(statement, ast.Assign)
+            and isinstance(statement.value, ast.Constant)
+        ):
+            for target in statement.targets:
+                if isinstance(target, ast.Name):
+                    yield target.id, statement.value.value
+
+
+def parse_models_file(path: str, module: str, app_label: str) -> ParsedModule:
+    tree = ast.parse(Path(path).read_text(encoding='utf-8'), filename=path)
+    return ModuleParser(module, app_label).parse(tree)
+
+
+def _parse_job(job: tuple[str, str, str]) -> ParsedModule:
+    return parse_models_file(*job)
+
+
+class ModuleParser:
+    def __init__(self, module: str, app_label: str):
+        self._module = module
+        self._app_label = app_label
+        self._names: dict[str, str] = {}
+        """Maps names bound at module level to dotted paths."""
+
+    def parse(self, tree: ast.Module) -> ParsedModule:
+        result = ParsedModule(module=self._module, app_label=self._app_label)
+        for statement in tree.body:
+            if isinstance(statement, ast.Import):
+                for alias in statement.names:
+                    if alias.asname:
+                        self._names[alias.asname] = alias.name
+                    else:
+                        head = alias.name.split('.', 1)[0]
+                        self._names[head] = head
+            elif isinstance(statement, ast.ImportFrom):
+                package = self._import_base(statement)
+                for alias in statement.names:
+                    self._names[alias.asname or alias.name] = f'{package}.{alias.name}'
+            elif isinstance(statement, ast.Assign) and isinstance(statement.value, ast.Call):
+                if self._resolve(statement.value.func) == 'django.contrib.auth.get_user_model':
+                    for target in statement.targets:
+                        if isinstance(target, ast.Name):
+                            self._names[target.id] = AUTH_USER_MODEL
+            elif isinstance(statement, ast.ClassDef):
+                self._names[statement.name] = f'{self._module}.{statement.name}'
+                result.classes.append(self._parse_class(statement))
+        return result
+
+    def _import_base(self, statement: ast.ImportFrom) -> str:
+        if not statement.level:
+            return statement.module or ''
+        parts = self._module.split('.')
+        package = parts[:len(parts) - statement.level]
+        if statement.module:
+            package.append(statement.module)
+        return '.'.join(package)
+
+    def _resolve(self, node: ast.expr) -> Optional[str]:
+        if isinstance(node, ast.Name):
+            return self._names.get(node.id, f'{self._module}.{node.id}')
+        if isinstance(node, ast.Attribute):
+            if self._resolve(node.value) == 'django.conf.settings' and node.attr == 'AUTH_USER_MODEL':
+                return AUTH_USER_MODEL
+            value = self._resolve(node.value)
+            return f'{value}.{node.attr}' if value else None
+        return None
+
+    def _parse_class(self, node: ast.ClassDef) -> ParsedClass:
+        abstract = False
+        proxy = False
+        db_table = None
+        fields = []
+        for statement in node.body:
+            if isinstance(statement, ast.ClassDef) and statement.name == 'Meta':
+                meta = dict(iter_constant_assignments(statement.body))
+                abstract = meta.get('abstract') is True
+                proxy = meta.get('proxy') is True
+                db_table = meta.get('db_table')
+            elif isinstance(statement, (ast.Assign, ast.AnnAssign)):
+                parsed = self._parse_field(statement)
+                if parsed:
+                    fields.append(parsed)
+
+        return ParsedClass(
+            path=f'{self._module}.{node.name}',
+            name=node.name,
+            app_label=self._app_label,
+            bases=[base for base in map(self._resolve, node.bases) if base],
+            abstract=abstract,
+            db_table=db_table if isinstance(db_table, str) else None,
+            fields=fields,
+            proxy=proxy,
+        )
+
+    def _parse_field(self, statement) -> Optional[ParsedField]:
+        targets = statement.targets if isinstance(statement, ast.Assign) else [statement.target]
+        if len(targets) != 1 or not isinstance(targets[0], ast.Name):
+            return None
+        return self._parse_field_call(targets[0].id, statement.value)
+
+    def _parse_field_call(self, name: str, call: ast.expr) -> Optional[ParsedField]:
+        if not isinstance(call, ast.Call):
+            return None
+        func = self._resolve(call.func)
+        if not func:
+            return None
+        field_type = func.rsplit('.', 1)[-1]
+        if field_type in NOT_FIELDS or not field_type.endswith(('Field', 'ForeignKey')):
+            return None
+
+        keywords = {keyword.arg: keyword.value for keyword in call.keywords if keyword.arg}
+        to = None
+        on_delete = None
+        through = None
+        to_field = None
+        if field_type in RELATION_KINDS:
+            to_node = keywords.get('to', call.args[0] if call.args else None)
+            if isinstance(to_node, ast.Constant) and isinstance(to_node.value, str):
+                to = to_node.value
+            elif to_node is not None:
+                to = self._resolve(to_node)
+            on_delete = self._on_delete(keywords.get('on_delete', call.args[1] if len(call.args) > 1 else None))
+            through_node = keywords.get('through')
+            if isinstance(through_node, ast.Constant) and isinstance(through_node.value, str):
+                through = through_node.value
+            elif through_node is not None:
+                through = self._resolve(through_node)
+            to_field_node = keywords.get('to_field')
+            if isinstance(to_field_node, ast.Constant) and isinstance(to_field_node.value, str):
+                to_field = to_field_node.value
+
+        return ParsedField(
+            name=name,
+            field_type=field_type,
+            to=to,
+            null=_is_true(keywords.get('null')),
+            primary_key=_is_true(keywords.get('primary_key')),
+            on_delete=on_delete,
+            through=through,
+            to_field=to_field,
+        )
+
+    def _on_delete(self, node: Optional[ast.expr]) -> Optional[str]:
+        if isinstance(node, ast.Call):
+            node = node.func
+        if node is None:
+            return None
+        handler = self._resolve(node)
+        return handler.rsplit('.', 1)[-1] if handler else None
+
+
+def _is_true(node: Optional[ast.expr]) -> bool:
+    return isinstance(node, ast.Constant) and node.value is True
+
+
+class StaticGraphBuilder:
+    """
+    Builds `ModelGraph` from parsed modules in the same way
+    `GraphModelBuilder` does from model registry.
+    """
+
+    def __init__(
+        self,
+        modules: Sequence[ParsedModule],
+        auth_user_model: str = 'auth.User',
+        exclude_apps: Sequence[str] = (),
+        show_ref: bool = True,
+        abstract_models_depth: int = 1,
+    ):
+        self._auth_user_model = auth_user_model
+        self._exclude_apps = set(exclude_apps)
+        self._show_ref = show_ref
+        self._max_depth = abstract_models_depth
+        self._classes = {
+            cls.path: cls
+            for module in modules
+            for cls in module.classes
+        }
+        self._labels = {
+            f'{cls.app_label}.{cls.name}'.lower(): f'{cls.app_label}.{cls.name}'
+            for cls in self._classes.values()
+        }
+        self._label_classes = {f'{cls.app_label}.{cls.name}': cls for cls in self._classes.values()}
+        self._models = self._find_models()
+        self._all_fields: dict[str, list[DetachedField]] = {}
+        self._all_field_names: dict[str, frozenset[str]] = {}
+        self._table_fields: dict[str, list[DetachedField]] = {}
+        self._joined: dict[str, frozenset[str]] = {}
+        self._detached: dict[str, DetachedModel] = {}
+
+    def _find_models(self) -> set[str]:
+        models = set()
+        changed = True
+        while changed:
+            changed = False
+            for path, cls in self._classes.items():
+                if path not in models and any(self._is_model_base(base, models) for base in cls.bases):
+                    models.add(path)
+                    changed = True
+        return models
+
+    def _is_model_base(self, base: str, models: set[str]) -> bool:
+        if base == DJANGO_MODEL or base in models:
+            return True
+        if base.startswith('django.db.models.'):
+            return False
+        # Not parsed base imported from some models module.
+        module = base.rsplit('.', 1)[0]
+        return base not in self._classes and module.rsplit('.', 1)[-1] == 'models'
+
+    def build_graph(self) -> ModelGraph:
+        self._nodes: list[ModelView] = []
+        self._inheritance: list[InheritanceRelation] = []
+        self._visited: set[str] = set()
+        for path, cls in self._classes.items():
+            if path in self._models and not cls.abstract and cls.app_label not in self._exclude_apps:
+                self._add_model(cls)
+        through = self._add_through_models()
+
+        exported = {node.model._meta.label for node in self._nodes}
+        relations = []
+        for node in self._nodes:
+            for field_ in node.fields:
+                if field_.related_model is None:
+                    continue
+                if field_.related_model not in exported and not self._show_ref:
+                    continue
+                relations.append(Relation(
+                    source_model=node.model._meta.label,
+                    source_field=field_.name,
+                    target_model=field_.related_model,
+                    target_field=self._target_field(field_),
+                    kind=self._kind(field_),
+                    allow_null=field_.null,
+                    on_delete=field_.on_delete,
+                    through=through.get((node.model._meta.label, field_.name)),
+                ))
+
+        return ModelGraph(nodes=self._nodes, inheritance=self._inheritance, relations=relations)
+
+    def _add_model(self, cls: ParsedClass, depth: int = 0):
+        stack: list[tuple[ParsedClass, int, Optional[InheritanceRelation]]] = [(cls, depth, None)]
+        while stack:
+            cls, depth, relation = stack.pop()
+            if relation is not None:
+                self._inheritance.append(relation)
+            label = f'{cls.app_label}.{cls.name}'
+            if label in self._visited:
+                continue
+            self._visited.add(label)
+
+            bases = []
+            for parent in self._parents(cls):
+                if cls.proxy and not parent.abstract:
+                    bases.append((parent, 0, InheritanceKind.PROXY))
+                elif not parent.abstract:
+                    bases.append((parent, 0, InheritanceKind.MULTI_TABLE))
+                elif depth < self._max_depth:
+                    bases.append((parent, depth + 1, InheritanceKind.ABSTRACT))
+
+            parent_fields = set()
+            for parent, _, kind in bases:
+                if kind == InheritanceKind.ABSTRACT:
+                    parent_fields |= self._field_names(parent)
+            self._compute_fields(cls)
+            fields = [field_ for field_ in self._table_fields[cls.path] if field_.name not in parent_fields]
+            self._nodes.append(ModelView(
+                self._detached_model(cls),
+                fields,
+                parent_joins=len(self._joined[cls.path]),
+            ))
+            for parent, parent_depth, kind in reversed(bases):
+                stack.append((parent, parent_depth, InheritanceRelation(
+                    source_model=label,
+                    target_model=f'{parent.app_label}.{parent.name}',
+                    kind=kind,
+                )))
+
+    def _add_through_models(self) -> dict[tuple[str, str], str]:
+        """
+        Adds through models django creates for many-to-many fields
+        without explicit `through`, each right after its model.
+        Returns through model label by model label and field name.
+        """
+        result = {}
+        nodes = []
+        for node in self._nodes:
+            nodes.append(node)
+            meta = node.model._meta
+            if meta.abstract:
+                continue
+            for field_ in meta.fields:
+                if not field_.many_to_many:
+                    continue
+                if field_.through:
+                    result[(meta.label, field_.name)] = field_.through
+                    continue
+                through = self._through_model(node.model, field_)
+                result[(meta.label, field_.name)] = through.model._meta.label
+                nodes.append(through)
+        self._nodes = nodes
+        return result
+
+    @staticmethod
+    def _through_model(model: DetachedModel, field_: DetachedField) -> ModelView:
+        meta = model._meta
+        source = meta.model_name
+        target = field_.related_model.rsplit('.', 1)[-1].lower()
+        if source == target:
+            source, target = f'from_{source}', f'to_{target}'
+        fields = [
+            DetachedField(name='id', internal_type='AutoField', primary_key=True),
+            DetachedField(
+                name=source,
+                internal_type='ForeignKey',
+                many_to_one=True,
+                related_model=meta.label,
+                on_delete='CASCADE',
+            ),
+            DetachedField(
+                name=target,
+                internal_type='ForeignKey',
+                many_to_one=True,
+                related_model=field_.related_model,
+                on_delete='CASCADE',
+            ),
+        ]
+        return ModelView(DetachedModel(DetachedOptions(
+            app_label=meta.app_label,
+            object_name=f'{meta.object_name}_{field_.name}',
+            db_table=f'{meta.db_table}_{field_.name}',
+            fields=fields,
+        )), fields)
+
+    def _parents(self, cls: ParsedClass) -> list[ParsedClass]:
+        return [
+            self._classes[base]
+            for base in cls.bases
+            if base in self._classes and base in self._models
+        ]
+
+    def _detached_model(self, cls: ParsedClass) -> DetachedModel:
+        if cls.path not in self._detached:
+            self._detached[cls.path] = DetachedModel(DetachedOptions(
+                app_label=cls.app_label,
+                object_name=cls.name,
+                db_table=self._db_table(cls),
+                abstract=cls.abstract,
+                fields=self._fields(cls),
+            ))
+        return self._detached[cls.path]
+
+    def _db_table(self, cls: ParsedClass) -> str:
+        # Proxy models share table of their concrete model.
+        while cls.proxy:
+            concrete = [parent for parent in self._parents(cls) if not parent.abstract]
+            if not concrete:
+                break
+            cls = concrete[0]
+        return cls.db_table or f'{cls.app_label}_{cls.name.lower()}'
+
+    def _fields(self, cls: ParsedClass) -> list[DetachedField]:
+        """
+        All fields of model, including inherited ones, in the order
+        django puts them into `_meta.fields`.
+        """
+        self._compute_fields(cls)
+        return self._all_fields[cls.path]
+
+    def _field_names(self, cls: ParsedClass) -> frozenset[str]:
+        names = self._all_field_names.get(cls.path)
+        if names is None:
+            names = self._all_field_names[cls.path] = frozenset(field_.name for field_ in self._fields(cls))
+        return names
+
+    def _compute_fields(self, cls: ParsedClass):
+        """
+        Computes fields of model and all its bases, bases first. Besides
+        all fields, stores fields of model's own table (without fields
+        of concrete parents, which live in their tables) and concrete
+        parents joined to load model.
+        """
+        stack = [(cls, False)]
+        while stack:
+            current, ready = stack.pop()
+            if current.path in self._all_fields:
+                continue
+            parents = self._parents(current)
+            if not ready:
+                stack.append((current, True))
+                stack.extend((parent, False) for parent in parents if parent.path not in self._all_fields)
+                continue
+
+            inherited: list[DetachedField] = []
+            local: list[DetachedField] = []
+            joined: set[str] = set()
+            has_concrete_parent = False
+            for parent in parents:
+                inherited += self._all_fields[parent.path]
+                joined |= self._joined[parent.path]
+                if parent.abstract:
+                    local += self._all_fields[parent.path]
+                    continue
+                has_concrete_parent = True
+                if current.proxy:
+                    continue
+                joined.add(parent.path)
+                ptr = DetachedField(
+                    name=f'{parent.name.lower()}_ptr',
+                    internal_type='OneToOneField',
+                    primary_key=True,
+                    one_to_one=True,
+                    related_model=f'{parent.app_label}.{parent.name}',
+                    on_delete='CASCADE',
+                )
+                inherited.append(ptr)
+                local.append(ptr)
+
+            own = [self._detached_field(current, parsed) for parsed in current.fields]
+            fields = inherited + own
+            local += own
+            has_pk = has_concrete_parent or any(field_.primary_key for field_ in fields)
+            if not current.abstract and not has_pk:
+                pk = DetachedField(name='id', internal_type='AutoField', primary_key=True)
+                fields.insert(0, pk)
+                local.insert(0, pk)
+
+            self._all_fields[current.path] = fields
+            self._table_fields[current.path] = [] if current.proxy else local
+            self._joined[current.path] = frozenset(joined)
+
+    def _detached_field(self, cls: ParsedClass, parsed: ParsedField) -> DetachedField:
+        kind = RELATION_KINDS.get(parsed.field_type)
+        return DetachedField(
+            name=parsed.name,
+            internal_type=parsed.field_type,
+            primary_key=parsed.primary_key,
+            null=parsed.null,
+            many_to_one=kind == RelationKind.FOREIGN_KEY,
+            one_to_one=kind == RelationKind.ONE_TO_ONE,
+            many_to_many=kind == RelationKind.MANY_TO_MANY,
+            related_model=self._resolve_label(cls, parsed.to) if kind else None,
+            on_delete=parsed.on_delete if kind != RelationKind.MANY_TO_MANY else None,
+            through=self._resolve_label(cls, parsed.through) if parsed.through else None,
+            to_field=parsed.to_field,
+        )
+
+    def _resolve_label(self, cls: ParsedClass, reference: Optional[str]) -> str:
+        if reference is None:
+            return f'{cls.app_label}.{cls.name}'
+        if reference == AUTH_USER_MODEL:
+            reference = self._auth_user_model
+        if reference == 'self':
+            return f'{cls.app_label}.{cls.name}'
+        if reference in self._classes:
+            target = self._classes[reference]
+            return f'{target.app_label}.{target.name}'
+        if '.' not in reference:
+            reference = f'{cls.app_label}.{reference}'
+        elif reference.count('.') > 1:
+            # Dotted path of class from not parsed module:
+            # `django.contrib.auth.models.User` -> `auth.User`.
+            module, name = reference.rsplit('.', 1)
+            parts = module.split('.')
+            if parts[-1] == 'models' and len(parts) > 1:
+                parts.pop()
+            reference = f'{parts[-1]}.{name}'
+        return self._labels.get(reference.lower(), reference)
+
+    def _target_field(self, field_: DetachedField) -> str:
+        """
+        Field of related model relation refers to: `to_field` or primary
+        key of parsed model, django default `id` for not parsed models.
+        """
+        if field_.to_field and not field_.many_to_many:
+            return field_.to_field
+        target = self._label_classes.get(field_.related_model)
+        if target is None or target.path not in self._models:
+            return 'id'
+        self._compute_fields(target)
+        return next((item.name for item in self._all_fields[target.path] if item.primary_key), 'id')
+
+    def _kind(self, field_: DetachedField) -> RelationKind:
+        if field_.many_to_many:
+            return RelationKind.MANY_TO_MANY
+        if field_.one_to_one:
+            return RelationKind.ONE_TO_ONE
+        return RelationKind.FOREIGN_KEY
+
+
+def parse_models_files(files: Sequence[Path], jobs: Optional[int] = None) -> list[ParsedModule]:
+    """
+    Parses files in process pool. Small inputs are parsed in current
+    process, since starting pool would take longer than parsing.
+    """
+    tasks = [
+        (str(path), module_name(path), app_label(app_directory(path)))
+        for path in files
+    ]
+    if jobs == 1 or len(tasks) < 2 * (jobs or os.cpu_count() or 1):
+        return [_parse_job(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(_parse_job, tasks, chunksize=8))
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m django_d2_models.static_extractor',
+        description='Generates d2 diagram from models.py files without importing them.',
+    )
+    parser.add_argument('paths', nargs='+', help='models files or directories to search them in')
+    parser.add_argument('--output', help='Write diagram into file instead of stdout.')
+    parser.add_argument('--settings-file', help='Settings file to read AUTH_USER_MODEL from.')
+    parser.add_argument('--auth-user-model', help='Label of user model. Defaults to auth.User.')
+    parser.add_argument('--exclude-apps', nargs='+', default=[])
+    parser.add_argument('--hide-ref', action='store_true', help='Do not show models from excluded apps.')
+    parser.add_argument('--abstract-models-depth', type=int, default=1)
+    parser.add_argument('--jobs', type=int, help='Number of parser processes.')
+    args = parser.parse_args(argv)
+
+    auth_user_model = args.auth_user_model
+    if auth_user_model is None and args.settings_file:
+        auth_user_model = read_auth_user_model(args.settings_file)
+
+    modules = parse_models_files(find_models_files(args.paths), args.jobs)
+    graph = StaticGraphBuilder(
+        modules,
+        auth_user_model=auth_user_model or 'auth.User',
+        exclude_apps=args.exclude_apps,
+        show_ref=not args.hide_ref,
+        abstract_models_depth=args.abstract_models_depth,
+    ).build_graph()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            GraphRenderer().write_model_graph(graph, output)
+    else:
+        GraphRenderer().write_model_graph(graph, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
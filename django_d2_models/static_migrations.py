@@ -0,0 +1,467 @@
+"""
+Builds model graph by parsing migration files with `ast`.
+
+Like `static_extractor`, nothing is imported and django is not set up,
+so application code never runs. Migration operations are replayed on
+parsed model states in dependency order, the way django migration
+loader does it without database connection:
+
+- `CreateModel`, `DeleteModel`, `RenameModel`, `AlterModelTable`,
+  `AddField`, `RemoveField`, `AlterField`, `RenameField` and state
+  operations of `SeparateDatabaseAndState` change model state, other
+  operations (indexes, constraints, `RunPython`, `RunSQL`) are skipped;
+- squashed migrations replace migrations they list in `replaces`;
+- app label is taken from `apps.py` next to migrations package;
+- dependencies on migrations which are not parsed are ignored, models
+  of not parsed apps are only shown when referenced.
+
+Migrations do not record abstract models, so inherited fields are
+always shown inline.
+
+Usage:
+
+    python -m django_d2_models.static_migrations apps/ --settings-file project/settings.py
+    python -m django_d2_models.static_migrations apps/ --migration chat 0002
+"""
+
+import argparse
+import ast
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+from .graph import ModelGraph
+from .renderer import GraphRenderer
+from .static_extractor import (
+    AUTH_USER_MODEL, DJANGO_MODEL, SKIP_DIRS, ModuleParser, ParsedClass, ParsedField, ParsedModule, StaticGraphBuilder,
+    app_label, module_name, read_auth_user_model,
+)
+
+
+MigrationKey = tuple[str, str]
+
+
+@dataclass
+class ParsedOperation:
+    name: str
+    """Operation class name, e.g. 'CreateModel'."""
+    arguments: dict[str, ast.expr]
+    """Arguments by name, positional ones mapped by operation signature."""
+
+
+@dataclass
+class ParsedMigration:
+    app_label: str
+    name: str
+    dependencies: list[MigrationKey] = field(default_factory=list)
+    run_before: list[MigrationKey] = field(default_factory=list)
+    replaces: list[MigrationKey] = field(default_factory=list)
+    operations: list[ParsedOperation] = field(default_factory=list)
+    parser: Optional['MigrationParser'] = None
+
+    @property
+    def key(self) -> MigrationKey:
+        return self.app_label, self.name
+
+
+OPERATION_ARGUMENTS = {
+    'CreateModel': ('name', 'fields', 'options', 'bases', 'managers'),
+    'DeleteModel': ('name',),
+    'RenameModel': ('old_name', 'new_name'),
+    'AlterModelTable': ('name', 'table'),
+    'AddField': ('model_name', 'name', 'field', 'preserve_default'),
+    'RemoveField': ('model_name', 'name'),
+    'AlterField': ('model_name', 'name', 'field', 'preserve_default'),
+    'RenameField': ('model_name', 'old_name', 'new_name'),
+    'SeparateDatabaseAndState': ('database_operations', 'state_operations'),
+}
+
+
+def find_migration_files(paths: Iterable[str]) -> list[Path]:
+    result = []
+    skip = SKIP_DIRS - {'migrations'}
+    for path in map(Path, paths):
+        if path.is_file():
+            result.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(name for name in dirs if not name.startswith('.') and name not in skip)
+            root_path = Path(root)
+            if root_path.name == 'migrations' and '__init__.py' in files:
+                dirs[:] = []
+                result += [
+                    root_path / name
+                    for name in sorted(files)
+                    if name.endswith('.py') and name[0] not in '_~'
+                ]
+    return result
+
+
+def parse_migration_file(path: Path, auth_user_model: str) -> ParsedMigration:
+    tree = ast.parse(path.read_text(encoding='utf-8'), filename=str(path))
+    migration = ParsedMigration(app_label=app_label(path.resolve().parent.parent), name=path.stem)
+    parser = MigrationParser(module_name(path), migration.app_label)
+    parser.parse(tree)
+    migration.parser = parser
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == 'Migration':
+            parser.parse_migration_class(node, migration, auth_user_model)
+    return migration
+
+
+class MigrationParser(ModuleParser):
+    """
+    Reads `Migration` class of migration module. Module level imports
+    are resolved by `ModuleParser`, so fields are parsed the same way
+    as fields of models modules.
+    """
+
+    def parse_migration_class(self, node: ast.ClassDef, migration: ParsedMigration, auth_user_model: str):
+        for statement in node.body:
+            if not isinstance(statement, ast.Assign) or len(statement.targets) != 1:
+                continue
+            target = statement.targets[0]
+            if not isinstance(target, ast.Name) or not isinstance(statement.value, (ast.List, ast.Tuple)):
+                continue
+            items = statement.value.elts
+            if target.id in ('dependencies', 'run_before', 'replaces'):
+                keys = [self._migration_key(item, auth_user_model) for item in items]
+                setattr(migration, target.id, [key for key in keys if key])
+            elif target.id == 'operations':
+                migration.operations = [
+                    operation for operation in map(self.parse_operation, items) if operation
+                ]
+
+    def _migration_key(self, node: ast.expr, auth_user_model: str) -> Optional[MigrationKey]:
+        if isinstance(node, ast.Call) and (self._resolve(node.func) or '').endswith('swappable_dependency'):
+            return auth_user_model.split('.', 1)[0], '__first__'
+        if isinstance(node, ast.Tuple) and len(node.elts) == 2:
+            values = [item.value for item in node.elts if isinstance(item, ast.Constant)]
+            if len(values) == 2 and all(isinstance(value, str) for value in values):
+                return values[0], values[1]
+        return None
+
+    def parse_operation(self, node: ast.expr) -> Optional[ParsedOperation]:
+        if not isinstance(node, ast.Call):
+            return None
+        func = self._resolve(node.func)
+        if not func:
+            return None
+        name = func.rsplit('.', 1)[-1]
+        arguments = dict(zip(OPERATION_ARGUMENTS.get(name, ()), node.args))
+        arguments.update((keyword.arg, keyword.value) for keyword in node.keywords if keyword.arg)
+        return ParsedOperation(name, arguments)
+
+    def parse_field(self, name: str, node: ast.expr) -> Optional[ParsedField]:
+        return self._parse_field_call(name, node)
+
+    def resolve(self, node: ast.expr) -> Optional[str]:
+        return self._resolve(node)
+
+
+@dataclass
+class ModelState:
+    app_label: str
+    name: str
+    fields: dict[str, ParsedField] = field(default_factory=dict)
+    parent_links: set[str] = field(default_factory=set)
+    bases: list[str] = field(default_factory=list)
+    """Lowercased labels of model bases, `DJANGO_MODEL` for `models.Model`."""
+    db_table: Optional[str] = None
+    proxy: bool = False
+
+    @property
+    def key(self) -> str:
+        return f'{self.app_label}.{self.name}'.lower()
+
+
+class MigrationNotFoundError(LookupError):
+    pass
+
+
+class MigrationStateReplayer:
+    """
+    Orders parsed migrations by dependencies and replays their
+    operations into model states.
+    """
+
+    def __init__(self, migrations: Sequence[ParsedMigration]):
+        self._migrations = {migration.key: migration for migration in migrations}
+        self._replace_squashed()
+        self.models: dict[str, ModelState] = {}
+
+    def _replace_squashed(self):
+        """
+        Without database all migrations are unapplied, so django uses
+        squashed migrations instead of migrations they replace.
+        """
+        replaced = {}
+        for migration in list(self._migrations.values()):
+            for key in migration.replaces:
+                if self._migrations.pop(key, None) is not None:
+                    replaced[key] = migration.key
+        for migration in self._migrations.values():
+            migration.dependencies = [replaced.get(key, key) for key in migration.dependencies]
+            migration.run_before = [replaced.get(key, key) for key in migration.run_before]
+
+    def _dependencies(self) -> dict[MigrationKey, list[MigrationKey]]:
+        by_app: dict[str, list[MigrationKey]] = {}
+        for key in sorted(self._migrations):
+            by_app.setdefault(key[0], []).append(key)
+        result: dict[MigrationKey, list[MigrationKey]] = {key: [] for key in self._migrations}
+        for migration in self._migrations.values():
+            for app, name in migration.dependencies:
+                if name == '__first__':
+                    keys = by_app.get(app, [])[:1]
+                elif name == '__latest__':
+                    keys = by_app.get(app, [])[-1:]
+                else:
+                    keys = [(app, name)] if (app, name) in self._migrations else []
+                result[migration.key] += [key for key in keys if key != migration.key]
+            for key in migration.run_before:
+                if key in result:
+                    result[key].append(migration.key)
+        return result
+
+    def find(self, app: str, prefix: str) -> MigrationKey:
+        """
+        Key of migration of `app` whose name starts with `prefix`.
+        """
+        keys = [key for key in self._migrations if key[0] == app and key[1].startswith(prefix)]
+        exact = [key for key in keys if key[1] == prefix]
+        if exact:
+            return exact[0]
+        if len(keys) > 1:
+            raise MigrationNotFoundError(f'More than one migration matches {prefix!r} in app {app!r}.')
+        if not keys:
+            raise MigrationNotFoundError(f'Cannot find migration {prefix!r} in app {app!r}.')
+        return keys[0]
+
+    def plan(self, target: Optional[MigrationKey] = None) -> list[ParsedMigration]:
+        """
+        Migrations in the order they are applied: all of them, or only
+        `target` and migrations it depends on. Dependency cycles are
+        broken arbitrarily.
+        """
+        dependencies = self._dependencies()
+        roots = [target] if target is not None else sorted(self._migrations, reverse=True)
+        result = []
+        entered = set()
+        stack = [(key, False) for key in roots]
+        while stack:
+            key, ready = stack.pop()
+            if ready:
+                result.append(self._migrations[key])
+                continue
+            if key in entered:
+                continue
+            entered.add(key)
+            stack.append((key, True))
+            stack.extend((dependency, False) for dependency in sorted(dependencies[key], reverse=True))
+        return result
+
+    def replay(self, target: Optional[MigrationKey] = None) -> dict[str, ModelState]:
+        for migration in self.plan(target):
+            for operation in migration.operations:
+                self._apply(migration, operation)
+        return self.models
+
+    def _apply(self, migration: ParsedMigration, operation: ParsedOperation):
+        parser = migration.parser
+        arguments = operation.arguments
+        name = operation.name
+        if name == 'SeparateDatabaseAndState':
+            operations = arguments.get('state_operations')
+            if isinstance(operations, (ast.List, ast.Tuple)):
+                for item in operations.elts:
+                    state_operation = parser.parse_operation(item)
+                    if state_operation is not None:
+                        self._apply(migration, state_operation)
+            return
+
+        if name == 'CreateModel':
+            model = ModelState(migration.app_label, _string(arguments.get('name')) or '')
+            fields = arguments.get('fields')
+            for item in fields.elts if isinstance(fields, (ast.List, ast.Tuple)) else ():
+                if isinstance(item, ast.Tuple) and len(item.elts) == 2:
+                    self._set_field(migration, model, _string(item.elts[0]), item.elts[1])
+            options = _constant_dict(arguments.get('options'))
+            model.db_table = options.get('db_table') if isinstance(options.get('db_table'), str) else None
+            model.proxy = options.get('proxy') is True
+            model.bases = self._bases(migration, arguments.get('bases'))
+            self.models[model.key] = model
+            return
+
+        label = _string(arguments.get('model_name') or arguments.get('name') or arguments.get('old_name'))
+        model = self.models.get(f'{migration.app_label}.{label}'.lower()) if label else None
+        if model is None:
+            return
+        if name == 'DeleteModel':
+            del self.models[model.key]
+        elif name == 'RenameModel':
+            self._rename_model(model, _string(arguments.get('new_name')) or model.name)
+        elif name == 'AlterModelTable':
+            model.db_table = _string(arguments.get('table'))
+        elif name in ('AddField', 'AlterField'):
+            self._set_field(migration, model, _string(arguments.get('name')), arguments.get('field'))
+        elif name == 'RemoveField':
+            model.fields.pop(_string(arguments.get('name')), None)
+        elif name == 'RenameField':
+            old_name, new_name = _string(arguments.get('old_name')), _string(arguments.get('new_name'))
+            if old_name in model.fields and new_name:
+                model.fields = {
+                    (new_name if key == old_name else key): value
+                    for key, value in model.fields.items()
+                }
+                model.fields[new_name].name = new_name
+
+    def _set_field(self, migration: ParsedMigration, model: ModelState, name: Optional[str], node: ast.expr):
+        parsed = migration.parser.parse_field(name, node) if name else None
+        if parsed is None:
+            return
+        if parsed.to and '.' not in parsed.to and parsed.to not in ('self', AUTH_USER_MODEL):
+            parsed.to = f'{migration.app_label}.{parsed.to}'
+        model.fields[name] = parsed
+        keywords = {keyword.arg: keyword.value for keyword in node.keywords if keyword.arg}
+        if isinstance(keywords.get('parent_link'), ast.Constant) and keywords['parent_link'].value is True:
+            model.parent_links.add(name)
+        else:
+            model.parent_links.discard(name)
+
+    def _bases(self, migration: ParsedMigration, node: Optional[ast.expr]) -> list[str]:
+        result = []
+        for item in node.elts if isinstance(node, (ast.List, ast.Tuple)) else ():
+            value = _string(item)
+            if value is not None:
+                result.append(value.lower() if '.' in value else f'{migration.app_label}.{value}'.lower())
+            elif migration.parser.resolve(item) == DJANGO_MODEL:
+                result.append(DJANGO_MODEL)
+        # Other bases are mixins, whose fields migrations list inline.
+        return result or [DJANGO_MODEL]
+
+    def _rename_model(self, model: ModelState, new_name: str):
+        old_key = model.key
+        del self.models[old_key]
+        model.name = new_name
+        self.models[model.key] = model
+        for other in self.models.values():
+            other.bases = [model.key if base == old_key else base for base in other.bases]
+            for field_ in other.fields.values():
+                if field_.to and field_.to.lower() == old_key:
+                    field_.to = model.key
+                if field_.through and field_.through.lower() == old_key:
+                    field_.through = model.key
+
+
+def _string(node: Optional[ast.expr]) -> Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _constant_dict(node: Optional[ast.expr]) -> dict:
+    if not isinstance(node, ast.Dict):
+        return {}
+    return {
+        key.value: value.value
+        for key, value in zip(node.keys, node.values)
+        if isinstance(key, ast.Constant) and isinstance(value, ast.Constant)
+    }
+
+
+def state_modules(models: dict[str, ModelState]) -> list[ParsedModule]:
+    """
+    Converts model states into parsed modules, one per app, for
+    `StaticGraphBuilder`. Parent links of multi-table inheritance are
+    left out, since builder adds them for concrete parents itself.
+    """
+    paths = {key: f'{model.app_label}.migrations.{model.name}' for key, model in models.items()}
+    modules: dict[str, ParsedModule] = {}
+    for model in models.values():
+        bases = [paths.get(base, base) for base in model.bases if base == DJANGO_MODEL or base in paths]
+        links = model.parent_links if any(base in paths for base in model.bases) else set()
+        module = modules.setdefault(model.app_label, ParsedModule(f'{model.app_label}.migrations', model.app_label))
+        module.classes.append(ParsedClass(
+            path=paths[model.key],
+            name=model.name,
+            app_label=model.app_label,
+            bases=bases or [DJANGO_MODEL],
+            abstract=False,
+            db_table=model.db_table,
+            fields=[field_ for name, field_ in model.fields.items() if name not in links],
+            proxy=model.proxy,
+        ))
+    return list(modules.values())
+
+
+def build_migration_graph(
+    paths: Sequence[str],
+    migration: Optional[tuple[str, str]] = None,
+    auth_user_model: str = 'auth.User',
+    exclude_apps: Sequence[str] = (),
+    show_ref: bool = True,
+) -> ModelGraph:
+    """
+    Graph of project state after all migrations found in `paths` or,
+    if `migration` is given as (app_label, migration name prefix), right
+    after that migration. Raises `MigrationNotFoundError` for unknown
+    or ambiguous migration.
+    """
+    replayer = MigrationStateReplayer([
+        parse_migration_file(path, auth_user_model) for path in find_migration_files(paths)
+    ])
+    target = replayer.find(*migration) if migration else None
+    return StaticGraphBuilder(
+        state_modules(replayer.replay(target)),
+        auth_user_model=auth_user_model,
+        exclude_apps=exclude_apps,
+        show_ref=show_ref,
+        abstract_models_depth=0,
+    ).build_graph()
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m django_d2_models.static_migrations',
+        description='Generates d2 diagram from migration files without importing them.',
+    )
+    parser.add_argument('paths', nargs='+', help='migration files or directories to search migrations packages in')
+    parser.add_argument('--output', help='Write diagram into file instead of stdout.')
+    parser.add_argument(
+        '--migration',
+        nargs=2,
+        metavar=('APP_LABEL', 'MIGRATION_NAME'),
+        help='Build diagram from project state right after given migration.',
+    )
+    parser.add_argument('--settings-file', help='Settings file to read AUTH_USER_MODEL from.')
+    parser.add_argument('--auth-user-model', help='Label of user model. Defaults to auth.User.')
+    parser.add_argument('--exclude-apps', nargs='+', default=[])
+    parser.add_argument('--hide-ref', action='store_true', help='Do not show models from excluded apps.')
+    args = parser.parse_args(argv)
+
+    auth_user_model = args.auth_user_model
+    if auth_user_model is None and args.settings_file:
+        auth_user_model = read_auth_user_model(args.settings_file)
+
+    try:
+        graph = build_migration_graph(
+            args.paths,
+            migration=tuple(args.migration) if args.migration else None,
+            auth_user_model=auth_user_model or 'auth.User',
+            exclude_apps=args.exclude_apps,
+            show_ref=not args.hide_ref,
+        )
+    except MigrationNotFoundError as e:
+        parser.error(str(e))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            GraphRenderer().write_model_graph(graph, output)
+    else:
+        GraphRenderer().write_model_graph(graph, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.urls import path
+
+from .views import DiagramView
+
+
+app_name = 'django_d2_models'
+
+urlpatterns = [
+    path('', staff_member_required(DiagramView.as_view()), name='diagram'),
+    path('models.d2', staff_member_required(DiagramView.as_view(format='d2')), name='diagram-d2'),
+]
@@ -0,0 +1,180 @@
+"""
+Schema diagram served by running project, e.g. next to admin:
+
+    urlpatterns = [
+        path('admin/models/', include('django_d2_models.urls')),
+        path('admin/', admin.site.urls),
+    ]
+
+Diagram is built once per process for each combination of export
+options given in query string (`user_apps_only`, `show_ref`,
+`abstract_models_depth`, `exclude_apps`) and kept together with its
+compiled SVG in bounded in-memory LRU, keyed by model registry
+fingerprint and options. Responses carry ETag, so unchanged diagram
+is answered with 304.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Callable, Hashable, Optional, Sequence
+
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views import View
+
+from .cache import config_key, model_registry_fingerprint
+from .compiler import D2CompileError, D2Compiler
+from .graph_builder import GraphModelBuilder, ModelExportConfig
+from .renderer import GraphRenderer
+
+
+CONTENT_TYPES = {
+    'd2': 'text/plain; charset=utf-8',
+    'svg': 'image/svg+xml',
+}
+
+
+@dataclass(frozen=True)
+class DiagramEntry:
+    content: bytes
+    etag: str
+    """Quoted strong ETag of content."""
+
+
+class DiagramMemoryCache:
+    """
+    Bounded LRU of built diagrams. Missing entry is built by single
+    thread, concurrent requests for it wait for that build instead of
+    starting their own.
+    """
+
+    def __init__(self, max_size: int = 16):
+        self._max_size = max_size
+        self._entries: OrderedDict[Hashable, DiagramEntry] = OrderedDict()
+        self._building: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+
+    def fingerprint(self) -> str:
+        """
+        Model registry fingerprint, computed once: registry does not
+        change while process runs.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = model_registry_fingerprint()
+        return self._fingerprint
+
+    def get(self, key: Hashable, build: Callable[[], bytes]) -> DiagramEntry:
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry
+            try:
+                content = build()
+                entry = DiagramEntry(content, f'"{hashlib.sha256(content).hexdigest()[:32]}"')
+                with self._lock:
+                    self._entries[key] = entry
+                    while len(self._entries) > self._max_size:
+                        self._entries.popitem(last=False)
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+        return entry
+
+    def _lookup(self, key: Hashable) -> Optional[DiagramEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._fingerprint = None
+
+
+default_cache = DiagramMemoryCache()
+
+
+class DiagramView(View):
+    """
+    Returns diagram of project models as `format` ('svg' or 'd2').
+    SVG is compiled with `d2_binary`, which has to be installed on server.
+    """
+
+    format = 'svg'
+    d2_binary = 'd2'
+    d2_args: Sequence[str] = ()
+    cache = default_cache
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        try:
+            config = export_config_from_query(request.GET)
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+
+        try:
+            entry = self.diagram(config, self.format)
+        except D2CompileError as e:
+            return HttpResponse(str(e), status=500, content_type=CONTENT_TYPES['d2'])
+
+        response = HttpResponse(entry.content, content_type=CONTENT_TYPES[self.format])
+        response['ETag'] = entry.etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return get_conditional_response(request, etag=entry.etag, response=response)
+
+    def diagram(self, config: ModelExportConfig, format_: str) -> DiagramEntry:
+        key = (self.cache.fingerprint(), config_key(config), format_)
+        if format_ == 'svg':
+            key += (self.d2_binary, *self.d2_args)
+            return self.cache.get(key, lambda: self.compile(self.diagram(config, 'd2').content))
+        return self.cache.get(key, lambda: self.render(config))
+
+    def render(self, config: ModelExportConfig) -> bytes:
+        graph = GraphModelBuilder(config).build_graph()
+        output = StringIO()
+        GraphRenderer().write_model_graph(graph, output)
+        return output.getvalue().encode('utf-8')
+
+    def compile(self, source: bytes) -> bytes:
+        compiler = D2Compiler(self.d2_binary, args=self.d2_args)
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'models.d2'
+            path.write_bytes(source)
+            return compiler.compile_one(path).read_bytes()
+
+
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'off'}
+
+
+def export_config_from_query(query) -> ModelExportConfig:
+    config = ModelExportConfig()
+    for name in ('user_apps_only', 'show_ref'):
+        value = query.get(name)
+        if value is None:
+            continue
+        if value.lower() in TRUE_VALUES:
+            setattr(config, name, True)
+        elif value.lower() in FALSE_VALUES:
+            setattr(config, name, False)
+        else:
+            raise ValueError(f'{name} must be boolean, got {value!r}.')
+    if 'abstract_models_depth' in query:
+        value = query['abstract_models_depth']
+        if not value.isdigit():
+            raise ValueError(f'abstract_models_depth must be non-negative integer, got {value!r}.')
+        config.abstract_models_depth = int(value)
+    config.exclude_apps = sorted(set(query.getlist('exclude_apps')))
+    return config
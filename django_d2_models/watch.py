@@ -0,0 +1,247 @@
+"""
+Keeps django loaded and regenerates diagram when models change.
+
+Models modules are polled for modification, changed apps get their
+models module reloaded and only their part of the graph rebuilt.
+Apps with models inheriting from models of changed apps are reloaded
+and rebuilt too, since their classes keep references to old bases.
+"""
+
+import dataclasses
+import importlib
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.apps import apps, AppConfig
+
+from .graph import ModelGraph, merge_graphs
+from .graph_builder import GraphModelBuilder, ModelExportConfig
+
+
+class ModelFilesWatcher:
+    """
+    Tracks modification time of models modules of given apps.
+    """
+
+    def __init__(self, app_configs: list[AppConfig]):
+        self._app_configs = app_configs
+        self._mtimes = self._snapshot()
+
+    def _files(self, app_config: AppConfig) -> list[Path]:
+        module = app_config.models_module
+        if module is None or not getattr(module, '__file__', None):
+            return []
+        if hasattr(module, '__path__'):
+            return [
+                path
+                for directory in module.__path__
+                for path in Path(directory).rglob('*.py')
+            ]
+        return [Path(module.__file__)]
+
+    def _snapshot(self) -> dict[Path, tuple[str, int]]:
+        result = {}
+        for app_config in self._app_configs:
+            for path in self._files(app_config):
+                try:
+                    result[path] = (app_config.label, os.stat(path).st_mtime_ns)
+                except FileNotFoundError:
+                    pass
+        return result
+
+    def poll(self) -> set[str]:
+        """
+        Returns labels of apps which models files changed since last poll.
+        """
+        mtimes = self._snapshot()
+        changed = {
+            label
+            for path, (label, mtime) in mtimes.items() ^ self._mtimes.items()
+        }
+        self._mtimes = mtimes
+        return changed
+
+
+def reload_app_models(app_config: AppConfig):
+    """
+    Re-imports models module of app, replacing its registered models.
+    On import error previously registered models are restored.
+    """
+    module = app_config.models_module
+    registered = apps.all_models[app_config.label]
+    previous = dict(registered)
+    registered.clear()
+    try:
+        submodules = [
+            name for name in sys.modules
+            if name.startswith(f'{module.__name__}.')
+        ]
+        for name in submodules:
+            importlib.reload(sys.modules[name])
+        app_config.models_module = importlib.reload(module)
+    except BaseException:
+        registered.update(previous)
+        raise
+    finally:
+        apps.clear_cache()
+
+
+class DiagramWatcher:
+    """
+    Rebuilds graph of changed apps and passes merged graph together
+    with labels of affected apps into `write`.
+    """
+
+    def __init__(
+        self,
+        config: ModelExportConfig,
+        write: Callable[[ModelGraph, Optional[set[str]]], None],
+        poll_interval: float = 0.05,
+        debounce: float = 0.05,
+        log: Callable[[str], None] = print,
+    ):
+        self._config = config
+        self._write = write
+        self._poll_interval = poll_interval
+        self._debounce = debounce
+        self._log = log
+        # Fragments keep references to models of other apps, so
+        # references are filtered only after fragments are merged.
+        self._builder = GraphModelBuilder(dataclasses.replace(config, show_ref=True))
+        self._app_configs = [
+            app_config
+            for app_config in apps.get_app_configs()
+            if app_config.models_module is not None
+            and self._builder.should_export_app(app_config.label)
+        ]
+        self._fragments: dict[str, ModelGraph] = {}
+
+    def build(self) -> ModelGraph:
+        for app_config in self._app_configs:
+            self._fragments[app_config.label] = self._builder.build_graph([app_config.label])
+        graph = self._merged_graph()
+        self._write(graph, None)
+        return graph
+
+    def update(self, app_labels: set[str]) -> ModelGraph:
+        affected = set(app_labels)
+        for app_config in self._reload_order(app_labels):
+            affected.add(app_config.label)
+            reload_app_models(app_config)
+            fragment = self._builder.build_graph([app_config.label])
+            previous = self._fragments.get(app_config.label)
+            for graph in (previous, fragment):
+                if graph is not None:
+                    affected.update(node.model._meta.app_label for node in graph.nodes)
+            self._fragments[app_config.label] = fragment
+
+        graph = self._merged_graph()
+        self._write(graph, affected)
+        return graph
+
+    def _dependencies(self, app_config: AppConfig) -> set[str]:
+        """
+        Labels of other watched apps whose models are bases of models
+        of app, found from classes of registered models and from
+        inheritance edges of app fragment.
+        """
+        modules = {config.models_module.__name__: config.label for config in self._app_configs}
+        result = set()
+        for model in apps.all_models[app_config.label].values():
+            for base in model.__mro__[1:]:
+                module = base.__module__
+                while module and module not in modules:
+                    module = module.rpartition('.')[0]
+                if module:
+                    result.add(modules[module])
+        fragment = self._fragments.get(app_config.label)
+        if fragment is not None:
+            result.update(relation.target_model.partition('.')[0] for relation in fragment.inheritance)
+        result.discard(app_config.label)
+        return result
+
+    def _reload_order(self, app_labels: set[str]) -> list[AppConfig]:
+        """
+        Changed apps and apps depending on them, transitively, with
+        every app after apps it depends on.
+        """
+        dependencies = {app_config.label: self._dependencies(app_config) for app_config in self._app_configs}
+        dependents: dict[str, set[str]] = {}
+        for label, labels in dependencies.items():
+            for dependency in labels:
+                dependents.setdefault(dependency, set()).add(label)
+
+        reloaded = set(app_labels)
+        stack = list(app_labels)
+        while stack:
+            for label in dependents.get(stack.pop(), ()):
+                if label not in reloaded:
+                    reloaded.add(label)
+                    stack.append(label)
+
+        result: list[AppConfig] = []
+        entered: set[str] = set()
+        configs = {app_config.label: app_config for app_config in self._app_configs}
+        stack = [(app_config.label, False) for app_config in reversed(self._app_configs)]
+        while stack:
+            label, ready = stack.pop()
+            if ready:
+                result.append(configs[label])
+                continue
+            if label not in reloaded or label in entered:
+                continue
+            entered.add(label)
+            stack.append((label, True))
+            # Apps in dependency cycle are ordered arbitrarily.
+            stack.extend(
+                (dependency, False)
+                for dependency in dependencies[label]
+                if dependency in configs and dependency not in entered
+            )
+        return result
+
+    def _merged_graph(self) -> ModelGraph:
+        graph = merge_graphs(
+            self._fragments[app_config.label]
+            for app_config in self._app_configs
+        )
+        if not self._config.show_ref:
+            exported = {node.model._meta.label for node in graph.nodes}
+            graph.relations = [
+                relation
+                for relation in graph.relations
+                if relation.target_model in exported
+            ]
+        return graph
+
+    def run(self):
+        """
+        Polls models files until interrupted. Bursts of changes closer
+        than `debounce` seconds are folded into single regeneration.
+        """
+        watcher = ModelFilesWatcher(self._app_configs)
+        pending: set[str] = set()
+        last_change = 0.0
+        while True:
+            time.sleep(self._poll_interval)
+            changed = watcher.poll()
+            now = time.perf_counter()
+            if changed:
+                pending |= changed
+                last_change = now
+                continue
+            if not pending or now - last_change < self._debounce:
+                continue
+
+            start = time.perf_counter()
+            try:
+                self.update(pending)
+            except Exception as e:
+                self._log(f'Failed to reload {", ".join(sorted(pending))}: {e!r}')
+            else:
+                elapsed = (time.perf_counter() - start) * 1000
+                self._log(f'Regenerated diagram for {", ".join(sorted(pending))} in {elapsed:.0f} ms')
+            pending = set()
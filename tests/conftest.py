@@ -0,0 +1,18 @@
+"""
+Tests run against `django_test_project`, set up once per session.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import django
+
+
+ROOT = Path(__file__).resolve().parent.parent
+TEST_PROJECT = ROOT / 'django_test_project'
+
+sys.path.insert(0, str(TEST_PROJECT))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_test_project.settings')
+os.environ.setdefault('SECRET_KEY', 'tests')
+django.setup()
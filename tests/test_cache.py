@@ -0,0 +1,90 @@
+import pickle
+
+import pytest
+from django.apps.registry import Apps
+from django.db import models
+
+from django_d2_models.cache import DiagramCache, model_registry_fingerprint
+from django_d2_models.compact import CompactGraph
+from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig
+
+
+def fingerprint(fields, meta=None):
+    """Fingerprint of registry with `shop.Author` and `shop.Book` made of `fields`."""
+    registry = Apps()
+    options = {'app_label': 'shop', 'apps': registry}
+    type('Author', (models.Model,), {
+        '__module__': __name__,
+        'Meta': type('Meta', (), dict(options)),
+    })
+    type('Book', (models.Model,), {
+        '__module__': __name__,
+        'Meta': type('Meta', (), {**options, **(meta or {})}),
+        **fields(),
+    })
+    return model_registry_fingerprint(registry)
+
+
+def book(title=models.CharField, on_delete=models.CASCADE, db_index=False):
+    return lambda: {
+        'title': title(max_length=10),
+        'author': models.ForeignKey('shop.Author', on_delete=on_delete, db_index=db_index),
+    }
+
+
+def test_fingerprint_is_stable():
+    assert fingerprint(book()) == fingerprint(book())
+
+
+@pytest.mark.parametrize('fields, meta', [
+    (lambda: {'name': models.CharField(max_length=10)}, None),
+    (book(title=models.SlugField), None),
+    (book(on_delete=models.PROTECT), None),
+    (book(), {'indexes': [models.Index(fields=['title'], name='book_title')]}),
+    (book(), {'unique_together': [('title', 'author')]}),
+])
+def test_fingerprint_changes_with_models(fields, meta):
+    assert fingerprint(fields, meta) != fingerprint(book())
+
+
+@pytest.fixture
+def graph():
+    return CompactGraph.from_model_graph(GraphModelBuilder(ModelExportConfig()).build_graph())
+
+
+def test_stale_entries_are_discarded(tmp_path, graph):
+    cache = DiagramCache(str(tmp_path))
+    config = ModelExportConfig()
+    other_config = ModelExportConfig(exclude_apps=['chat'])
+    with cache.store(config, 'old') as entry:
+        entry.write('old')
+    cache.store_graph(config, 'old', graph)
+    cache.store_graph(other_config, 'old', graph)
+
+    with cache.store(config, 'new') as entry:
+        entry.write('new')
+    cache.store_graph(config, 'new', graph)
+
+    assert cache.get(config, 'old') is None
+    assert cache.get(config, 'new').read_text() == 'new'
+    assert cache.get_graph(config, 'old') is None
+    assert cache.get_graph(config, 'new') is not None
+    assert cache.get_graph(other_config, 'old') is not None
+
+
+@pytest.mark.parametrize('content', [
+    b'',
+    b'not a pickle',
+    pickle.dumps({'graph': 1})[:-3],
+    pickle.dumps(['not', 'a', 'graph']),
+    # Class which no longer exists.
+    b'\x80\x04\x95\x1b\x00\x00\x00\x00\x00\x00\x00\x8c\x10django_d2_models\x94\x8c\x04Gone\x94\x93\x94.',
+])
+def test_unreadable_graph_entry_is_miss(tmp_path, content):
+    cache = DiagramCache(str(tmp_path))
+    config = ModelExportConfig()
+    path = cache.entry_path(config, 'fingerprint', '.graph')
+    path.write_bytes(content)
+
+    assert cache.get_graph(config, 'fingerprint') is None
+    assert not path.exists()
@@ -0,0 +1,120 @@
+from io import StringIO
+
+from django_d2_models.cascade import CascadeIndex, worst_fan_outs, write_cascade_report
+from django_d2_models.detached import DetachedModel, DetachedOptions
+from django_d2_models.graph import (
+    InheritanceKind, InheritanceRelation, ModelGraph, ModelView, Relation, RelationKind,
+)
+
+
+def make_graph(labels, relations, abstract=(), inheritance=()):
+    nodes = []
+    for label in labels:
+        app_label, name = label.split('.')
+        options = DetachedOptions(app_label, name, name.lower(), abstract=label in abstract)
+        nodes.append(ModelView(DetachedModel(options), []))
+    return ModelGraph(
+        nodes=nodes,
+        relations=[
+            Relation(
+                source_model=source,
+                source_field=field_,
+                target_model=target,
+                target_field='id',
+                kind=RelationKind.FOREIGN_KEY,
+                allow_null=False,
+                on_delete=on_delete,
+            )
+            for source, field_, target, on_delete in relations
+        ],
+        inheritance=[
+            InheritanceRelation(source_model=source, target_model=target, kind=InheritanceKind.ABSTRACT)
+            for source, target in inheritance
+        ],
+    )
+
+
+def fan_outs(graph):
+    return {item.label: item for item in CascadeIndex(graph).fan_out()}
+
+
+def test_chain_fan_out():
+    graph = make_graph(['app.A', 'app.B', 'app.C', 'app.D'], [
+        ('app.B', 'a', 'app.A', 'CASCADE'),
+        ('app.C', 'b', 'app.B', 'CASCADE'),
+        ('app.D', 'a', 'app.A', 'SET_NULL'),
+        ('app.D', 'c', 'app.C', 'PROTECT'),
+    ])
+
+    item = fan_outs(graph)['app.A']
+
+    assert sorted(item.deleted) == ['app.B', 'app.C']
+    assert item.updated == ['app.D']
+    assert item.depth == 2
+    assert not item.cyclic
+    assert item.path == ['app.B.a', 'app.C.b']
+
+
+def test_self_referencing_model_is_cyclic():
+    graph = make_graph(['app.Category', 'app.Tree'], [
+        ('app.Tree', 'parent', 'app.Tree', 'CASCADE'),
+        ('app.Tree', 'category', 'app.Category', 'CASCADE'),
+    ])
+
+    items = fan_outs(graph)
+
+    assert items['app.Tree'].cyclic
+    assert items['app.Tree'].deleted == []
+    assert items['app.Category'].cyclic
+    assert items['app.Category'].deleted == ['app.Tree']
+    assert worst_fan_outs(graph)[0].label == 'app.Category'
+
+
+def test_mutual_cascade_is_one_component():
+    graph = make_graph(['app.A', 'app.B', 'app.C'], [
+        ('app.A', 'b', 'app.B', 'CASCADE'),
+        ('app.B', 'a', 'app.A', 'CASCADE'),
+        ('app.C', 'a', 'app.A', 'CASCADE'),
+    ])
+    index = CascadeIndex(graph)
+    component = dict(zip(index.labels, index.components()))
+
+    assert component['app.A'] == component['app.B'] != component['app.C']
+    # Components are numbered in reverse topological order.
+    assert component['app.C'] < component['app.A']
+    assert sorted(fan_outs(graph)['app.B'].deleted) == ['app.A', 'app.C']
+
+
+def test_long_chain_does_not_recurse():
+    # Longer than default recursion limit.
+    labels = [f'app.M{i}' for i in range(1500)]
+    relations = [(labels[i + 1], 'parent', labels[i], 'CASCADE') for i in range(len(labels) - 1)]
+
+    item = fan_outs(make_graph(labels, relations))['app.M0']
+
+    assert item.depth == len(labels) - 1
+    assert len(item.deleted) == len(labels) - 1
+
+
+def test_abstract_relation_applies_to_concrete_models():
+    graph = make_graph(
+        ['app.User', 'app.Owned', 'app.Post', 'app.Photo'],
+        [('app.Owned', 'owner', 'app.User', 'CASCADE')],
+        abstract={'app.Owned'},
+        inheritance=[('app.Post', 'app.Owned'), ('app.Photo', 'app.Owned')],
+    )
+
+    assert sorted(fan_outs(graph)['app.User'].deleted) == ['app.Photo', 'app.Post']
+
+
+def test_report():
+    graph = make_graph(['app.A', 'app.B'], [('app.B', 'a', 'app.A', 'CASCADE')])
+    sink = StringIO()
+
+    write_cascade_report(graph, sink)
+
+    assert sink.getvalue() == (
+        'app.A: deletes 1, updates 0, depth 1\n'
+        '  longest chain: app.A <- app.B.a\n'
+        '  deletes: app.B\n'
+    )
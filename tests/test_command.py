@@ -0,0 +1,23 @@
+import io
+
+from django.core.management import call_command
+
+from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig
+from django_d2_models.renderer import GraphRenderer
+
+
+def test_diagram_is_written_into_command_stdout():
+    stdout = io.StringIO()
+    call_command('model_diagram', stdout=stdout)
+
+    expected = GraphRenderer().render_model_graph(GraphModelBuilder(ModelExportConfig()).build_graph())
+    assert stdout.getvalue() == expected
+
+
+def test_cached_diagram_is_written_into_command_stdout(tmp_path):
+    first, second = io.StringIO(), io.StringIO()
+    call_command('model_diagram', cache_dir=str(tmp_path), stdout=first)
+    call_command('model_diagram', cache_dir=str(tmp_path), stdout=second)
+
+    assert 'chat.Message: {' in first.getvalue()
+    assert second.getvalue() == first.getvalue()
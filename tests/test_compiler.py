@@ -0,0 +1,139 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from django_d2_models.compiler import D2CompileError, D2Compiler, source_key
+
+
+FAKE_D2 = '''#!/bin/sh
+# Stand-in for d2: records each run and "compiles" source by copying it.
+log="$(dirname "$0")/runs.log"
+echo "start $1" >> "$log"
+touch "$2.running"
+ls "$(dirname "$2")" | grep -c '\\.running$' >> "$log"
+sleep "${FAKE_D2_SLEEP:-0}"
+case "$1" in *broken*) echo "syntax error" >&2; rm "$2.running"; exit 1;; esac
+cat "$1" > "$2"
+rm "$2.running"
+'''
+
+
+@pytest.fixture
+def d2(tmp_path):
+    path = tmp_path / 'bin' / 'd2'
+    path.parent.mkdir()
+    path.write_text(FAKE_D2)
+    path.chmod(0o755)
+    return path
+
+
+def runs(d2):
+    log = d2.parent / 'runs.log'
+    lines = log.read_text().splitlines() if log.exists() else []
+    return [line.split(' ', 1)[1] for line in lines if line.startswith('start ')]
+
+
+def concurrency(d2):
+    lines = (d2.parent / 'runs.log').read_text().splitlines()
+    return max(int(line) for line in lines if not line.startswith('start '))
+
+
+def sources(directory, count):
+    directory.mkdir(exist_ok=True)
+    result = []
+    for i in range(count):
+        path = directory / f'app_{i}.d2'
+        path.write_text(f'model_{i}: {{shape: sql_table}}\n')
+        result.append(path)
+    return result
+
+
+def test_compiled_svg_is_cached_by_source(d2, tmp_path):
+    paths = sources(tmp_path / 'diagrams', 3)
+    compiler = D2Compiler(str(d2), cache_dir=str(tmp_path / 'cache'))
+
+    svgs = compiler.compile(paths)
+    assert [svg.read_text() for svg in svgs] == [path.read_text() for path in paths]
+    assert len(runs(d2)) == 3
+
+    paths[1].write_text('changed: {shape: sql_table}\n')
+    for svg in svgs:
+        svg.unlink()
+    compiler.compile(paths)
+
+    assert runs(d2)[3:] == [str(paths[1])]
+    assert svgs[1].read_text() == 'changed: {shape: sql_table}\n'
+    assert svgs[0].exists()
+
+
+def test_source_key_includes_imported_files(tmp_path):
+    (tmp_path / 'users.d2').write_text('User\n')
+    (tmp_path / 'all.d2').write_text('...@users\n')
+    key = source_key(tmp_path / 'all.d2')
+
+    (tmp_path / 'users.d2').write_text('User: {shape: sql_table}\n')
+
+    assert source_key(tmp_path / 'all.d2') != key
+    assert source_key(tmp_path / 'all.d2', ['--layout=elk']) != source_key(tmp_path / 'all.d2')
+
+
+@pytest.mark.parametrize('jobs, parallel', [(1, False), (4, True)])
+def test_jobs_bound_parallel_processes(d2, tmp_path, monkeypatch, jobs, parallel):
+    monkeypatch.setenv('FAKE_D2_SLEEP', '0.3')
+    paths = sources(tmp_path / 'diagrams', 4)
+
+    D2Compiler(str(d2), jobs=jobs).compile(paths)
+
+    assert sorted(runs(d2)) == sorted(map(str, paths))
+    assert (concurrency(d2) > 1) == parallel
+    assert concurrency(d2) <= jobs
+
+
+def test_failed_compilation_raises_error(d2, tmp_path):
+    path = tmp_path / 'broken.d2'
+    path.write_text('{')
+
+    with pytest.raises(D2CompileError, match='syntax error'):
+        D2Compiler(str(d2)).compile([path])
+    with pytest.raises(D2CompileError, match='Cannot run'):
+        D2Compiler(str(tmp_path / 'missing')).compile([path])
+
+
+@pytest.mark.parametrize('script, timeout, message', [
+    ('echo "<svg" > "$2"\necho "crashed" >&2\nexit 2\n', None, 'crashed'),
+    ('echo "<svg" > "$2"\nexec sleep 5\n', 0.5, 'timed out'),
+])
+def test_failed_compilation_leaves_no_partial_output(tmp_path, script, timeout, message):
+    d2 = tmp_path / 'd2'
+    d2.write_text('#!/bin/sh\n' + script)
+    d2.chmod(0o755)
+    path = sources(tmp_path / 'diagrams', 1)[0]
+    cache_dir = tmp_path / 'cache'
+
+    with pytest.raises(D2CompileError, match=message):
+        D2Compiler(str(d2), cache_dir=str(cache_dir), timeout=timeout).compile([path])
+
+    assert list(cache_dir.iterdir()) == []
+    assert not path.with_suffix('.svg').exists()
+
+
+def test_command_compiles_output_dir(d2, tmp_path):
+    output_dir = tmp_path / 'diagrams'
+    call_command(
+        'model_diagram', '--output-dir', str(output_dir), '--compile',
+        '--d2-binary', str(d2), '--cache-dir', str(tmp_path / 'cache'), '--jobs', '2',
+        stdout=StringIO(),
+    )
+    compiled = len(runs(d2))
+    call_command(
+        'model_diagram', '--output-dir', str(output_dir), '--compile',
+        '--d2-binary', str(d2), '--cache-dir', str(tmp_path / 'cache'), '--jobs', '2',
+        stdout=StringIO(),
+    )
+
+    svgs = sorted(output_dir.glob('*.svg'))
+    assert svgs and compiled == len(svgs)
+    assert len(runs(d2)) == compiled
+    for svg in svgs:
+        assert svg.read_text() == svg.with_suffix('.d2').read_text()
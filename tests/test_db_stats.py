@@ -0,0 +1,57 @@
+import pytest
+from django.test import override_settings
+
+from django_d2_models import db_stats
+from django_d2_models.compact import CompactGraph
+from django_d2_models.db_stats import DbStatsError, TableStats, collect_stats, database_alias
+from django_d2_models.detached import DetachedModel, DetachedOptions
+from django_d2_models.graph import ModelGraph, ModelView
+from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig
+
+
+class ChatRouter:
+    def db_for_read(self, model, **hints):
+        return 'chat' if model._meta.app_label == 'chat' else None
+
+
+@pytest.fixture
+def cached_graph():
+    """Graph as loaded from cache: made of detached models."""
+    graph = GraphModelBuilder(ModelExportConfig()).build_graph()
+    return CompactGraph.from_model_graph(graph).to_model_graph()
+
+
+@override_settings(DATABASE_ROUTERS=[ChatRouter()])
+def test_detached_models_are_routed_as_registered_ones(cached_graph):
+    aliases = {
+        node.model._meta.label: database_alias(node.model)
+        for node in cached_graph.nodes
+        if not node.model._meta.abstract
+    }
+
+    assert aliases['chat.Message'] == 'chat'
+    assert aliases['users.User'] == 'default'
+
+
+@override_settings(DATABASE_ROUTERS=[ChatRouter()])
+def test_stats_are_queried_per_database(cached_graph, monkeypatch):
+    queried = {}
+
+    def fetch_table_stats(alias, tables):
+        queried[alias] = set(tables)
+        return {table: TableStats(rows=1, table_bytes=2, index_bytes=3) for table in tables}
+
+    monkeypatch.setattr(db_stats, 'fetch_table_stats', fetch_table_stats)
+    stats = collect_stats(cached_graph)
+
+    assert queried['chat'] == {'chat_chat', 'chat_message', 'chat_reply', 'chat_vote'}
+    assert 'users_user' in queried['default']
+    assert stats['chat.Message'].total_bytes == 5
+
+
+def test_unregistered_model_is_reported():
+    model = DetachedModel(DetachedOptions('missing', 'Model', 'missing_model'))
+    graph = ModelGraph(nodes=[ModelView(model, [])], relations=[], inheritance=[])
+
+    with pytest.raises(DbStatsError):
+        collect_stats(graph)
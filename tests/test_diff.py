@@ -0,0 +1,93 @@
+import copy
+
+import pytest
+
+from django_d2_models.diff import (
+    ADDED_FILL, CHANGED_FILL, REMOVED_FILL, DiffOverlay, diff_graphs, diff_view, main,
+)
+from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig
+from django_d2_models.renderer import GraphRenderer
+from django_d2_models.serialization import dump_graph, graph_from_dict, graph_to_dict
+
+
+@pytest.fixture(scope='module')
+def document():
+    return graph_to_dict(GraphModelBuilder(ModelExportConfig()).build_graph())
+
+
+def model(document, label):
+    return next(item for item in document['models'] if item['label'] == label)
+
+
+@pytest.fixture
+def changed(document):
+    """Graph document with one model removed, one added and one changed."""
+    result = copy.deepcopy(document)
+    result['models'].remove(model(result, 'chat.Reply'))
+    for key in ('relations', 'inheritance'):
+        result[key] = [item for item in result[key] if item['source_model'] != 'chat.Reply']
+    result['models'].append({
+        'label': 'chat.Attachment',
+        'db_table': 'chat_attachment',
+        'abstract': False,
+        'fields': [{'name': 'id', 'type': 'AutoField', 'primary_key': True, 'null': False,
+                    'relation': None, 'related_model': None}],
+    })
+    chat = model(result, 'chat.Chat')
+    chat['fields'].append({'name': 'topic', 'type': 'CharField', 'primary_key': False, 'null': True,
+                           'relation': None, 'related_model': None})
+    next(item for item in chat['fields'] if item['name'] == 'name')['null'] = True
+    return result
+
+
+def test_same_graph_has_no_changes(document):
+    assert diff_graphs(graph_from_dict(document), graph_from_dict(copy.deepcopy(document))).is_empty
+
+
+def test_models_fields_and_relations_are_compared(document, changed):
+    diff = diff_graphs(graph_from_dict(document), graph_from_dict(changed))
+
+    assert diff.added_models == ['chat.Attachment']
+    assert diff.removed_models == ['chat.Reply']
+    assert [change.label for change in diff.changed_models] == ['chat.Chat']
+    assert diff.changed_models[0].added_fields == ['topic']
+    assert diff.changed_models[0].changed_fields == ['name']
+    assert diff.added_relations == []
+    assert {(item.source_model, item.target_model) for item in diff.removed_relations} == {
+        ('chat.Reply', 'chat.Message'),
+        ('chat.Reply', 'chat.AbstractMessage'),
+    }
+
+
+def test_relations_of_graph_without_on_delete_are_compared_without_it(document):
+    old = copy.deepcopy(document)
+    for relation in old['relations']:
+        relation['on_delete'] = None
+
+    assert diff_graphs(graph_from_dict(old), graph_from_dict(document)).is_empty
+
+
+def test_diff_diagram_highlights_changes(document, changed):
+    old, new = graph_from_dict(document), graph_from_dict(changed)
+    diff = diff_graphs(old, new)
+
+    diagram = GraphRenderer(overlays=[DiffOverlay(diff)]).render_model_graph(diff_view(old, new, diff))
+
+    blocks = {block.split(':', 1)[0]: block for block in diagram.split('\n\n')}
+    assert ADDED_FILL in blocks['chat.Attachment']
+    assert REMOVED_FILL in blocks['chat.Reply']
+    assert CHANGED_FILL in blocks['chat.Chat']
+    assert 'style' not in blocks['chat.Vote']
+
+
+def test_main_exit_code(document, changed, tmp_path, capsys):
+    dump_graph(graph_from_dict(document), tmp_path / 'old.json')
+    dump_graph(graph_from_dict(changed), tmp_path / 'new.bin')
+
+    main([str(tmp_path / 'old.json'), str(tmp_path / 'old.json'), '--report', '--exit-code'])
+    assert capsys.readouterr().out == 'No schema changes.\n'
+
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(tmp_path / 'old.json'), str(tmp_path / 'new.bin'), '--report', '--exit-code'])
+    assert exit_info.value.code == 1
+    assert 'Models: 1 added, 1 removed, 1 changed\n' in capsys.readouterr().out
@@ -0,0 +1,68 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from django_d2_models.compact import CompactGraph
+from django_d2_models.focus import focus_graph, nodes_within, resolve_labels
+from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig
+
+
+def chain(size):
+    """Graph of `size` nodes where node i references node i + 1."""
+    graph = CompactGraph()
+    for node_id in range(size):
+        graph.intern_label(f'app.Model{node_id}')
+    for node_id in range(size - 1):
+        graph.add_edge(node_id, node_id + 1, 0)
+    graph.build_index()
+    return graph
+
+
+def test_adjacency_index():
+    graph = chain(3)
+
+    assert [graph.edge_target[edge_id] for edge_id in graph.out_edges(1)] == [2]
+    assert [graph.edge_source[edge_id] for edge_id in graph.in_edges(1)] == [0]
+    assert sorted(graph.neighbours(1)) == [0, 2]
+    assert list(graph.neighbours(2)) == [1]
+
+
+def test_nodes_within_radius_follow_both_directions():
+    graph = chain(10)
+
+    assert nodes_within(graph, [5], 0) == {5}
+    assert nodes_within(graph, [5], 2) == {3, 4, 5, 6, 7}
+    assert nodes_within(graph, [0, 9], 1) == {0, 1, 8, 9}
+    assert nodes_within(graph, [0], 100) == set(range(10))
+
+
+def test_resolve_labels_ignores_case():
+    graph = chain(3)
+
+    assert resolve_labels(graph, ['app.Model2', 'APP.model0']) == [2, 0]
+    with pytest.raises(LookupError):
+        resolve_labels(graph, ['app.Missing'])
+
+
+@pytest.mark.parametrize('show_ref', [True, False])
+def test_focus_graph(show_ref):
+    graph = GraphModelBuilder(ModelExportConfig()).build_graph()
+
+    focused = focus_graph(graph, ['chat.Message'], 1, show_ref=show_ref)
+    labels = {node.model._meta.label for node in focused.nodes}
+
+    assert labels == {'chat.Message', 'chat.AbstractMessage', 'chat.Vote', 'chat.Reply'}
+    assert all(relation.source_model in labels for relation in focused.relations)
+    assert any(relation.target_model not in labels for relation in focused.relations) == show_ref
+
+
+def test_command_focus():
+    stdout = StringIO()
+    call_command('model_diagram', '--focus', 'chat.vote', '--radius', '1', stdout=stdout)
+
+    assert 'chat.Vote: {' in stdout.getvalue()
+    assert 'chat.Chat: {' not in stdout.getvalue()
+    with pytest.raises(CommandError):
+        call_command('model_diagram', '--focus', 'chat.Missing', stdout=StringIO())
@@ -0,0 +1,115 @@
+import pytest
+from django.db.models import Count, Exists, OuterRef
+from django.db.utils import ConnectionHandler
+
+from apps.chat.models import Chat, Message, Vote
+from django_d2_models import query_recorder
+from django_d2_models.hotness import QueryProfile, parse_sql
+from django_d2_models.query_recorder import record_queries
+
+
+def test_select_related_joins():
+    sql = str(Message.objects.select_related('chat', 'user').filter(chat__name='general').query)
+
+    tables, joins = parse_sql(sql)
+
+    assert tables == {'chat_message', 'chat_chat', 'users_user'}
+    assert joins == {('chat_chat', 'chat_message'), ('chat_message', 'users_user')}
+
+
+def test_aliased_joins_of_same_table():
+    sql = str(Vote.objects.filter(message__chat__name='a', user__reply_messages__chat__name='b').query)
+
+    tables, joins = parse_sql(sql)
+
+    assert tables == {'chat_vote', 'chat_message', 'chat_chat', 'users_user', 'chat_reply'}
+    assert ('chat_chat', 'chat_reply') in joins
+    assert ('chat_chat', 'chat_message') in joins
+
+
+def test_subqueries():
+    sql = str(
+        Chat.objects
+        .filter(id__in=Message.objects.values('chat'))
+        .annotate(voted=Exists(Vote.objects.filter(message__chat=OuterRef('pk'))), replies=Count('reply_messages'))
+        .query
+    )
+
+    tables, joins = parse_sql(sql)
+
+    assert tables == {'chat_chat', 'chat_message', 'chat_vote', 'chat_reply'}
+    assert joins == {('chat_message', 'chat_vote'), ('chat_chat', 'chat_reply')}
+
+
+@pytest.mark.parametrize('sql', [
+    'SELECT EXTRACT(YEAR FROM "users_user"."last_login") AS "year" FROM "users_user"',
+    "SELECT TRIM(BOTH ' ' FROM `users_user`.`email`) FROM `users_user` WHERE `users_user`.`id` = %s",
+    'SELECT SUBSTRING([users_user].[email] FROM 1 FOR 3) FROM [users_user]',
+    "SELECT \"users_user\".\"id\" FROM \"users_user\" WHERE \"users_user\".\"email\" = 'x FROM y'",
+])
+def test_from_in_functions_and_literals_is_not_table(sql):
+    assert parse_sql(sql) == ({'users_user'}, frozenset())
+
+
+def test_subquery_in_function_arguments():
+    sql = (
+        'SELECT COALESCE((SELECT COUNT(*) FROM "chat_vote" V0 WHERE V0."message_id" = "chat_message"."id"), 0) '
+        'FROM "chat_message"'
+    )
+
+    assert parse_sql(sql)[0] == {'chat_vote', 'chat_message'}
+
+
+def test_merge():
+    first, second = QueryProfile(), QueryProfile()
+    first.add('SELECT * FROM "chat_chat"', 0.5)
+    first.add('SELECT * FROM "chat_message" INNER JOIN "chat_chat" ON ("chat_message"."chat_id" = "chat_chat"."id")', 1)
+    second.add('SELECT * FROM "chat_chat"', 0.25, count=3)
+
+    first.merge(second)
+
+    assert first.queries == 5
+    assert (first.tables['chat_chat'].count, first.tables['chat_chat'].seconds) == (5, 1.75)
+    assert first.tables['chat_message'].count == 1
+    assert first.joins[('chat_chat', 'chat_message')].count == 1
+    assert QueryProfile.from_dict(first.to_dict()).to_dict() == first.to_dict()
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    handler = ConnectionHandler({
+        'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+        'other': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+    })
+    monkeypatch.setattr(query_recorder, 'connections', handler)
+    yield handler
+    handler.close_all()
+
+
+def test_recorder_is_installed_within_block(connections, tmp_path):
+    path = tmp_path / 'hotness.json'
+    for _ in range(2):
+        with record_queries(path, using=['default']) as profile:
+            assert len(connections['default'].execute_wrappers) == 1
+            assert connections['other'].execute_wrappers == []
+            with connections['default'].cursor() as cursor:
+                cursor.execute('CREATE TABLE IF NOT EXISTS "chat_chat" ("id" integer)')
+                cursor.executemany('INSERT INTO "chat_chat" ("id") VALUES (%s)', [(1,), (2,)])
+            with connections['other'].cursor() as cursor:
+                cursor.execute('SELECT 1 FROM "sqlite_master"')
+
+        assert connections['default'].execute_wrappers == []
+        assert profile.tables['chat_chat'].count == 2
+
+    saved = QueryProfile.load(path)
+    assert saved.queries == 6
+    assert saved.tables['chat_chat'].count == 4
+    assert 'sqlite_master' not in saved.tables
+
+
+def test_recorder_is_removed_on_error(connections):
+    with pytest.raises(ZeroDivisionError):
+        with record_queries():
+            1 / 0
+
+    assert all(connection.execute_wrappers == [] for connection in connections.all())
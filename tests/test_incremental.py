@@ -0,0 +1,39 @@
+from django.core.management import call_command
+
+from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig
+from django_d2_models.incremental import AppDiagramWriter
+
+
+def build_graph(**options):
+    return GraphModelBuilder(ModelExportConfig(show_ref=False, **options)).build_graph()
+
+
+def test_unchanged_files_are_not_rewritten(tmp_path):
+    writer = AppDiagramWriter(str(tmp_path))
+
+    first = writer.write(build_graph())
+    second = writer.write(build_graph())
+
+    assert first == [tmp_path / 'auth.d2', tmp_path / 'chat.d2', tmp_path / 'users.d2', tmp_path / 'index.d2']
+    assert second == []
+    # `auth` holds abstract base of user model.
+    assert (tmp_path / 'index.d2').read_text() == '...@auth\n...@chat\n...@users\n'
+
+
+def test_files_of_removed_apps_are_deleted(tmp_path):
+    writer = AppDiagramWriter(str(tmp_path))
+    (tmp_path / 'notes.d2').write_text('kept')
+    writer.write(build_graph())
+
+    changed = writer.write(build_graph(exclude_apps=['chat']))
+
+    assert changed == [tmp_path / 'index.d2']
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['auth.d2', 'index.d2', 'notes.d2', 'users.d2']
+    assert writer.paths == [tmp_path / 'auth.d2', tmp_path / 'users.d2', tmp_path / 'index.d2']
+
+
+def test_command_removes_files_of_excluded_apps(tmp_path):
+    call_command('model_diagram', output_dir=str(tmp_path), show_ref=False)
+    call_command('model_diagram', output_dir=str(tmp_path), show_ref=False, exclude_apps=['users'])
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['chat.d2', 'index.d2']
@@ -0,0 +1,108 @@
+from io import StringIO
+
+from django.apps.registry import Apps
+from django.db import models
+
+from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig
+from django_d2_models.indexes import IndexOverlay, UNINDEXED_STROKE, unindexed_relations, write_index_report
+from django_d2_models.renderer import GraphRenderer
+
+
+registry = Apps()
+
+
+class Author(models.Model):
+    class Meta:
+        app_label = 'library'
+        apps = registry
+
+
+class Book(models.Model):
+    author = models.ForeignKey(Author, on_delete=models.CASCADE)
+
+    class Meta:
+        app_label = 'library'
+        apps = registry
+
+
+class Review(models.Model):
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, db_index=False)
+    rating = models.IntegerField()
+
+    class Meta:
+        app_label = 'library'
+        apps = registry
+        indexes = [models.Index(fields=['author', '-rating'], name='review_author_rating')]
+
+
+class Loan(models.Model):
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, db_index=False)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, db_index=False)
+    day = models.DateField()
+
+    class Meta:
+        app_label = 'library'
+        apps = registry
+        unique_together = [('book', 'day'), ('day', 'author')]
+
+
+class Note(models.Model):
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        app_label = 'library'
+        apps = registry
+
+
+class IsolatedGraphBuilder(GraphModelBuilder):
+    def get_app_models(self):
+        return registry.all_models
+
+    def get_model(self, label):
+        app_label, name = label.split('.')
+        return registry.all_models[app_label][name.lower()]
+
+
+def build_graph():
+    return IsolatedGraphBuilder(ModelExportConfig(user_apps_only=False)).build_graph()
+
+
+def test_relation_is_covered_by_leading_column_only():
+    unindexed = {(item.model, item.field) for item in unindexed_relations(build_graph())}
+
+    # Covered by `db_index`, `Meta.indexes` and `unique_together` respectively.
+    assert ('library.Book', 'author') not in unindexed
+    assert ('library.Review', 'author') not in unindexed
+    assert ('library.Loan', 'book') not in unindexed
+    # Second column of composite index, and no index at all.
+    assert unindexed == {('library.Loan', 'author'), ('library.Note', 'author')}
+
+
+def test_rendered_index_constraints():
+    graph = build_graph()
+    diagram = GraphRenderer(overlays=[IndexOverlay(graph)], show_indexes=True).render_model_graph(graph)
+    blocks = {block.split(':', 1)[0]: block for block in diagram.split('\n\n')}
+
+    assert '".id": ".id" {\n\t\tconstraint: primary_key\n\t}' in blocks['library.Author']
+    assert '".author": ".author" {\n\t\tconstraint: [foreign_key; index]\n\t}' in blocks['library.Book']
+    assert '".author": ".author" {\n\t\tconstraint: [foreign_key; ix1.1]\n\t}' in blocks['library.Review']
+    assert '".rating": ".rating" {\n\t\tconstraint: ix1.2\n\t}' in blocks['library.Review']
+    assert '".book": ".book" {\n\t\tconstraint: [foreign_key; uq1.1]\n\t}' in blocks['library.Loan']
+    assert '".day": ".day" {\n\t\tconstraint: [uq1.2; uq2.1]\n\t}' in blocks['library.Loan']
+    assert '\t\tconstraint: [foreign_key; uq2.2]\n\t\tstyle.fill' in blocks['library.Loan']
+    assert 'constraint: foreign_key\n\t\tstyle.fill' in blocks['library.Note']
+    relations = {block.split(' {', 1)[0]: block for block in diagram.split('\n\n')}
+    assert f'style.stroke: {UNINDEXED_STROKE}' in relations['library.Note.".author" <-> library.Author.".id"']
+    assert 'style.stroke' not in relations['library.Book.".author" <-> library.Author.".id"']
+
+
+def test_index_report():
+    sink = StringIO()
+
+    write_index_report(build_graph(), sink)
+
+    assert sink.getvalue() == (
+        'Relations without supporting index: 2\n'
+        '  library.Loan.author -> library.Author.id: no index on library.Loan.author\n'
+        '  library.Note.author -> library.Author.id: no index on library.Note.author\n'
+    )
@@ -0,0 +1,112 @@
+from django.apps.registry import Apps
+from django.db import models
+
+from django_d2_models.graph import InheritanceKind
+from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig
+from django_d2_models.renderer import GraphRenderer
+
+
+registry = Apps()
+
+
+class Place(models.Model):
+    code = models.CharField(max_length=10, primary_key=True)
+
+    class Meta:
+        app_label = 'shop'
+        apps = registry
+
+
+class Restaurant(Place):
+    serves_pizza = models.BooleanField(unique=True)
+
+    class Meta:
+        app_label = 'shop'
+        apps = registry
+
+
+class Cafe(Place):
+    class Meta:
+        app_label = 'shop'
+        apps = registry
+        proxy = True
+
+
+class Tree(models.Model):
+    parent = models.ForeignKey('self', null=True, on_delete=models.CASCADE)
+    slug = models.SlugField(primary_key=True)
+
+    class Meta:
+        app_label = 'shop'
+        apps = registry
+        abstract = True
+
+
+class Order(Tree):
+    place = models.ForeignKey(Place, on_delete=models.CASCADE)
+    restaurant = models.ForeignKey(Restaurant, to_field='serves_pizza', on_delete=models.CASCADE)
+    places = models.ManyToManyField(Place, related_name='+')
+
+    class Meta:
+        app_label = 'shop'
+        apps = registry
+
+
+class IsolatedGraphBuilder(GraphModelBuilder):
+    def get_app_models(self):
+        return registry.all_models
+
+    def get_model(self, label):
+        app_label, name = label.split('.')
+        return registry.all_models[app_label][name.lower()]
+
+
+def build_graph():
+    return IsolatedGraphBuilder(ModelExportConfig(user_apps_only=False)).build_graph()
+
+
+def test_relations_point_at_target_field():
+    targets = {
+        (relation.source_model, relation.source_field): (relation.target_model, relation.target_field)
+        for relation in build_graph().relations
+    }
+
+    assert targets[('shop.Restaurant', 'place_ptr')] == ('shop.Place', 'code')
+    assert targets[('shop.Order', 'place')] == ('shop.Place', 'code')
+    assert targets[('shop.Order', 'restaurant')] == ('shop.Restaurant', 'serves_pizza')
+    assert targets[('shop.Order', 'places')] == ('shop.Place', 'code')
+    assert targets[('shop.Tree', 'parent')] == ('shop.Tree', 'slug')
+
+
+def test_inheritance_kinds():
+    kinds = {
+        (relation.source_model, relation.target_model): relation.kind
+        for relation in build_graph().inheritance
+    }
+
+    assert kinds[('shop.Restaurant', 'shop.Place')] == InheritanceKind.MULTI_TABLE
+    assert kinds[('shop.Cafe', 'shop.Place')] == InheritanceKind.PROXY
+    assert kinds[('shop.Order', 'shop.Tree')] == InheritanceKind.ABSTRACT
+
+
+def test_rendered_parent_link_and_proxy():
+    diagram = GraphRenderer().render_model_graph(build_graph())
+
+    assert 'shop.Restaurant.".place_ptr" <-> shop.Place.".code"' in diagram
+    assert 'shop.Cafe -> shop.Place: proxy' in diagram
+    assert 'shop.Restaurant -> shop.Place: "+1 join"' in diagram
+
+
+def test_rendered_primary_keys_and_many_to_many():
+    diagram = GraphRenderer().render_model_graph(build_graph())
+    blocks = {block.split(':', 1)[0]: block for block in diagram.split('\n\n')}
+
+    assert '".code": ".code" {\n\t\tconstraint: primary_key\n\t}' in blocks['shop.Place']
+    assert '".place_ptr": ".place_ptr" {\n\t\tconstraint: [primary_key; foreign_key]\n\t}' in blocks['shop.Restaurant']
+    assert '".slug": ".slug" {\n\t\tconstraint: primary_key\n\t}' in blocks['shop.Tree']
+    assert '".places": ".places" {\n\t\tconstraint: m2m\n\t}' in blocks['shop.Order']
+    assert 'label: "Order_places (m2m through)"' in blocks['shop.Order_places']
+    assert '".id": ".id" {\n\t\tconstraint: primary_key\n\t}' in blocks['shop.Order_places']
+    assert '".order": ".order" {\n\t\tconstraint: foreign_key\n\t}' in blocks['shop.Order_places']
+    assert 'shop.Order.".places" <-> shop.Place.".code": "+1 join via Order_places"' in diagram
+    assert 'shop.Order_places.".order" <-> shop.Order.".slug"' in diagram
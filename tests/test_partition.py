@@ -0,0 +1,89 @@
+from django_d2_models.compact import CompactGraph
+from django_d2_models.partition import connected_components, edge_weights, propagate_labels
+
+
+def compact_graph(size, edges):
+    graph = CompactGraph()
+    for node_id in range(size):
+        graph.intern_label(f'app.Model{node_id}')
+    for source, target in edges:
+        graph.add_edge(source, target, 0)
+    graph.build_index()
+    return graph
+
+
+TWO_TRIANGLES = [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3), (2, 3)]
+
+
+def test_label_propagation_splits_bridged_triangles():
+    graph = compact_graph(6, TWO_TRIANGLES)
+
+    labels = propagate_labels(graph, list(range(6)))
+
+    assert labels[0] == labels[1] == labels[2]
+    assert labels[3] == labels[4] == labels[5]
+    assert labels[0] != labels[3]
+
+
+def test_label_propagation_ignores_edges_leaving_node_ids():
+    graph = compact_graph(7, TWO_TRIANGLES + [(6, 0), (6, 1), (6, 3)])
+
+    labels = propagate_labels(graph, [0, 1, 2, 3, 4, 5])
+
+    assert set(labels) == {0, 1, 2, 3, 4, 5}
+    assert labels[0] == labels[2] != labels[3]
+
+
+def adjacency(size, edges):
+    result = {node_id: set() for node_id in range(size)}
+    for source, target in edges:
+        result[source].add(target)
+        result[target].add(source)
+    return result
+
+
+def test_edge_weight_counts_shared_neighbours():
+    weights = edge_weights(adjacency(6, TWO_TRIANGLES))
+
+    assert weights[0] == {1: 2, 2: 2}
+    assert weights[2] == {0: 2, 1: 2, 3: 1}
+
+
+def test_shared_hub_is_not_counted():
+    hub = 6
+    edges = TWO_TRIANGLES + [(node_id, hub) for node_id in range(6)]
+
+    counted = edge_weights(adjacency(7, edges), degree_limit=6)
+    skipped = edge_weights(adjacency(7, edges), degree_limit=5)
+
+    assert counted[0] == {1: 3, 2: 3, hub: 3}
+    assert counted[2][3] == 2
+    assert skipped[0] == {1: 2, 2: 2, hub: 1}
+    assert skipped[2][3] == 1
+    assert skipped[hub] == dict.fromkeys(range(6), 1)
+
+
+def test_label_propagation_splits_triangles_sharing_hub():
+    hub = 6
+    leaves = range(7, 200)
+    edges = TWO_TRIANGLES + [(node_id, hub) for node_id in [*range(6), *leaves]]
+
+    labels = propagate_labels(compact_graph(200, edges), list(range(200)))
+
+    assert labels[0] == labels[1] == labels[2] != labels[3] == labels[4] == labels[5]
+
+
+def test_label_propagation_is_deterministic():
+    graph = compact_graph(6, TWO_TRIANGLES)
+
+    assert propagate_labels(graph, list(range(6))) == propagate_labels(graph, list(range(6)))
+
+
+def test_connected_components():
+    graph = compact_graph(5, [(0, 1), (3, 2)])
+
+    components = connected_components(graph)
+
+    assert components[0] == components[1]
+    assert components[2] == components[3]
+    assert len({components[0], components[2], components[4]}) == 3
@@ -0,0 +1,41 @@
+import json
+import time
+from io import StringIO
+
+from django.core.management import call_command
+
+from django_d2_models.profiling import PhaseProfiler
+
+
+def test_nested_phase_time_is_not_counted_twice():
+    with PhaseProfiler(trace_memory=False) as profiler:
+        with profiler.phase('outer'):
+            time.sleep(0.05)
+            with profiler.phase('inner'):
+                time.sleep(0.1)
+
+    outer, inner = profiler.phases['outer'], profiler.phases['inner']
+    assert inner.seconds >= 0.1
+    assert 0.05 <= outer.seconds < 0.1
+    assert outer.seconds + inner.seconds <= profiler.total_seconds
+
+
+def test_nested_phase_keeps_peak_of_outer_phase():
+    with PhaseProfiler() as profiler:
+        with profiler.phase('outer'):
+            data = bytearray(1_000_000)
+            del data
+            with profiler.phase('inner'):
+                data = bytearray(1000)
+
+    assert profiler.phases['outer'].allocated_bytes >= 1_000_000
+    assert profiler.phases['inner'].allocated_bytes < 1_000_000
+
+
+def test_command_phases_do_not_overlap():
+    stderr = StringIO()
+    call_command('model_diagram', '--profile', '--db-routing', stdout=StringIO(), stderr=stderr)
+
+    report = json.loads(stderr.getvalue())
+    assert {'db_routing', 'render'} <= set(report['phases'])
+    assert sum(phase['seconds'] for phase in report['phases'].values()) <= report['total_seconds']
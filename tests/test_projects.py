@@ -0,0 +1,82 @@
+import re
+import shutil
+from pathlib import Path
+
+import pytest
+
+from django_d2_models.projects import SHARED_CONTAINER, main
+from django_d2_models.serialization import load_graph
+
+
+TEST_PROJECT = Path(__file__).resolve().parent.parent / 'django_test_project'
+
+CRM_SETTINGS = '''
+SECRET_KEY = 'tests'
+INSTALLED_APPS = ['django.contrib.contenttypes', 'django.contrib.auth', 'apps.users', 'apps.tickets']
+DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+AUTH_USER_MODEL = 'users.User'
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+'''
+
+TICKETS_MODELS = '''
+from django.conf import settings
+from django.db import models
+
+
+class Ticket(models.Model):
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+'''
+
+
+@pytest.fixture
+def crm(tmp_path):
+    """Second project, sharing `users` app with test project."""
+    root = tmp_path / 'crm'
+    shutil.copytree(
+        TEST_PROJECT / 'apps' / 'users', root / 'apps' / 'users', ignore=shutil.ignore_patterns('__pycache__'),
+    )
+    (root / 'apps' / '__init__.py').write_text('')
+    (root / 'apps' / 'tickets').mkdir()
+    (root / 'apps' / 'tickets' / '__init__.py').write_text('')
+    (root / 'apps' / 'tickets' / 'models.py').write_text(TICKETS_MODELS)
+    (root / 'crm_settings.py').write_text(CRM_SETTINGS)
+    return root
+
+
+def projects(crm):
+    return [f'{TEST_PROJECT}:django_test_project.settings', f'{crm}:crm_settings', '--jobs', '2', '--hide-ref']
+
+
+def test_merged_graph(crm, tmp_path):
+    main([*projects(crm), '--dump-graph', str(tmp_path / 'graph.json')])
+
+    graph = load_graph(tmp_path / 'graph.json')
+    labels = [node.model._meta.label for node in graph.nodes]
+    assert sorted(labels) == [
+        'auth.AbstractBaseUser', 'chat.AbstractMessage', 'chat.Chat', 'chat.Message', 'chat.Reply', 'chat.Vote',
+        'tickets.Ticket', 'users.User',
+    ]
+    relations = {(relation.source_model, relation.source_field, relation.target_model) for relation in graph.relations}
+    assert ('tickets.Ticket', 'owner', 'users.User') in relations
+    assert ('chat.Vote', 'user', 'users.User') in relations
+
+
+def test_models_are_namespaced_by_project(crm, tmp_path):
+    main([*projects(crm), '--output', str(tmp_path / 'all.d2')])
+
+    diagram = (tmp_path / 'all.d2').read_text()
+    containers = dict(re.findall(r'^(\w+): \{\n(.*?)^\}', diagram, re.MULTILINE | re.DOTALL))
+    assert set(containers) == {SHARED_CONTAINER, 'django_test_project', 'crm'}
+    assert '\tusers.User: {' in containers[SHARED_CONTAINER]
+    assert '\tchat.Chat: {' in containers['django_test_project']
+    assert '\ttickets.Ticket: {' in containers['crm']
+    assert 'users.User: {' not in containers['crm']
+    assert 'crm.tickets.Ticket.".owner" <-> shared.users.User.".id"' in diagram
+    assert 'django_test_project.chat.Vote.".user" <-> shared.users.User.".id"' in diagram
+
+
+def test_project_names_must_differ(capsys):
+    with pytest.raises(SystemExit):
+        main(['a/shop:shop.settings', 'b/shop:other.settings'])
+
+    assert 'Project names must be unique' in capsys.readouterr().err
@@ -0,0 +1,42 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from django_d2_models.compact import CompactGraph
+from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig
+from django_d2_models.routing import DatabaseRouting
+
+
+class ChatRouter:
+    def db_for_read(self, model, **hints):
+        return 'chat' if model._meta.app_label == 'chat' else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return obj1._state.db == obj2._state.db
+
+
+def routing_report(*args):
+    stdout = StringIO()
+    call_command('model_diagram', '--db-routing-report', *args, stdout=stdout)
+    return stdout.getvalue()
+
+
+@override_settings(DATABASE_ROUTERS=[ChatRouter()])
+def test_cached_graph_is_routed_as_built_one():
+    graph = GraphModelBuilder(ModelExportConfig()).build_graph()
+    built = DatabaseRouting(graph)
+    cached = DatabaseRouting(CompactGraph.from_model_graph(graph).to_model_graph())
+
+    assert cached.databases == built.databases
+    assert cached.databases['chat.Vote'] == 'chat'
+    assert cached.cross_database_relations() == built.cross_database_relations()
+
+
+@override_settings(DATABASE_ROUTERS=[ChatRouter()])
+def test_routing_report_with_warm_cache(tmp_path):
+    cold = routing_report('--cache-dir', str(tmp_path))
+    warm = routing_report('--cache-dir', str(tmp_path))
+
+    assert warm == cold == routing_report()
+    assert 'chat.Vote.user -> users.User.id: chat -> default, not allowed by routers' in warm
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig
+from django_d2_models.renderer import GraphRenderer
+from django_d2_models.serialization import BINARY_MAGIC, GraphFormatError, dumps, graph_to_dict, loads
+
+
+@pytest.fixture(scope='module')
+def graph():
+    return GraphModelBuilder(ModelExportConfig()).build_graph()
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_round_trip(graph, binary):
+    loaded = loads(dumps(graph, binary=binary))
+
+    assert graph_to_dict(loaded) == graph_to_dict(graph)
+    assert GraphRenderer().render_model_graph(loaded) == GraphRenderer().render_model_graph(graph)
+
+
+def test_binary_is_smaller(graph):
+    assert len(dumps(graph, binary=True)) < len(dumps(graph))
+
+
+def test_version_1_document_is_loaded(graph):
+    document = graph_to_dict(graph)
+    document['version'] = 1
+    for model in document['models']:
+        del model['parent_joins'], model['indexes']
+    for relation in document['relations']:
+        del relation['on_delete'], relation['through']
+    for relation in document['inheritance']:
+        del relation['kind']
+
+    loaded = loads(json.dumps(document).encode())
+
+    assert [node.model._meta.label for node in loaded.nodes] == [node.model._meta.label for node in graph.nodes]
+    assert all(node.indexes is None for node in loaded.nodes)
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'not json',
+    b'[]',
+    b'{"format": "django_d2_models.graph", "version": 2}',
+    b'{"format": "django_d2_models.graph", "version": 3, "models": [], "relations": [], "inheritance": []}',
+    BINARY_MAGIC,
+    BINARY_MAGIC + b'\x02' + b'not zlib',
+    BINARY_MAGIC + b'\x09',
+])
+def test_malformed_input_raises_format_error(data):
+    with pytest.raises(GraphFormatError):
+        loads(data)
+
+
+def test_unknown_kind_raises_format_error(graph):
+    document = graph_to_dict(graph)
+    document['relations'][0]['kind'] = 'unknown'
+
+    with pytest.raises(GraphFormatError):
+        loads(json.dumps(document).encode())
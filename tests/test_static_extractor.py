@@ -0,0 +1,52 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig
+from django_d2_models.static_extractor import StaticGraphBuilder, find_models_files, parse_models_files
+
+
+APPS_DIR = Path(__file__).resolve().parent.parent / 'django_test_project' / 'apps'
+
+
+def static_graph():
+    modules = parse_models_files(find_models_files([str(APPS_DIR)]), jobs=1)
+    return StaticGraphBuilder(modules, auth_user_model='users.User').build_graph()
+
+
+def test_static_graph_matches_runtime_graph():
+    runtime = GraphModelBuilder(ModelExportConfig()).build_graph()
+    static = static_graph()
+    # Static graph knows only parsed apps, e.g. not abstract bases of `auth`.
+    parsed = {node.model._meta.label for node in static.nodes}
+
+    runtime_fields = {
+        node.model._meta.label: [field_.name for field_ in node.fields]
+        for node in runtime.nodes
+        if node.model._meta.label in parsed
+    }
+    static_fields = {node.model._meta.label: [field_.name for field_ in node.fields] for node in static.nodes}
+    assert static_fields == runtime_fields
+
+    assert set(static.relations) == set(runtime.relations)
+    assert set(static.inheritance) == {
+        relation for relation in runtime.inheritance if relation.target_model in parsed
+    }
+
+
+def test_extractor_runs_without_django():
+    script = (
+        'import sys\n'
+        "sys.modules['django'] = None\n"
+        'from django_d2_models.static_extractor import main\n'
+        f'main([{str(APPS_DIR)!r}, "--jobs", "1"])\n'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert 'chat.Message' in result.stdout
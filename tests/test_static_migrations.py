@@ -0,0 +1,117 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from django_d2_models.graph_builder import ModelExportConfig
+from django_d2_models.migration_builder import MigrationStateGraphBuilder
+from django_d2_models.static_migrations import MigrationNotFoundError, build_migration_graph
+
+
+APPS_DIR = Path(__file__).resolve().parent.parent / 'django_test_project' / 'apps'
+
+
+def fields(graph):
+    return {node.model._meta.label: [field_.name for field_ in node.fields] for node in graph.nodes}
+
+
+@pytest.mark.parametrize('migration', [None, ('chat', '0001')])
+def test_graph_matches_migration_loader_graph(migration):
+    runtime = MigrationStateGraphBuilder(ModelExportConfig(), migration).build_graph()
+    static = build_migration_graph([str(APPS_DIR)], migration, auth_user_model='users.User')
+    parsed = set(fields(static))
+
+    assert fields(static) == {label: names for label, names in fields(runtime).items() if label in parsed}
+    assert set(static.relations) == set(runtime.relations)
+
+
+def write_app(root, migrations):
+    app = root / 'shop'
+    (app / 'migrations').mkdir(parents=True)
+    (app / 'apps.py').write_text(
+        'from django.apps import AppConfig\n\n\n'
+        'class ShopConfig(AppConfig):\n'
+        "    name = 'shop'\n"
+    )
+    (app / 'migrations' / '__init__.py').write_text('')
+    for name, body in migrations.items():
+        (app / 'migrations' / f'{name}.py').write_text(
+            'from django.db import migrations, models\n'
+            'import django.db.models.deletion\n\n\n'
+            'class Migration(migrations.Migration):\n' + body
+        )
+    return root
+
+
+INITIAL = '''
+    operations = [
+        migrations.CreateModel(
+            name='Item',
+            fields=[('id', models.AutoField(primary_key=True)), ('title', models.CharField(max_length=10))],
+        ),
+        migrations.CreateModel(
+            'Basket',
+            [
+                ('id', models.AutoField(primary_key=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='shop.item')),
+            ],
+        ),
+    ]
+'''
+
+RENAMES = '''
+    dependencies = [('shop', '0001_initial')]
+    operations = [
+        migrations.RenameModel('Item', 'Product'),
+        migrations.RenameField(model_name='product', old_name='title', new_name='name'),
+        migrations.AddField('basket', 'note', models.TextField(null=True)),
+        migrations.RunPython(migrations.RunPython.noop),
+    ]
+'''
+
+
+def test_operations_are_replayed(tmp_path):
+    root = write_app(tmp_path, {'0001_initial': INITIAL, '0002_renames': RENAMES})
+
+    graph = build_migration_graph([str(root)])
+
+    assert fields(graph) == {'shop.Basket': ['id', 'item', 'note'], 'shop.Product': ['id', 'name']}
+    assert [(item.source_model, item.target_model) for item in graph.relations] == [('shop.Basket', 'shop.Product')]
+    assert fields(build_migration_graph([str(root)], ('shop', '0001'))) == {
+        'shop.Item': ['id', 'title'], 'shop.Basket': ['id', 'item'],
+    }
+    with pytest.raises(MigrationNotFoundError):
+        build_migration_graph([str(root)], ('shop', '0003'))
+    with pytest.raises(MigrationNotFoundError):
+        build_migration_graph([str(root)], ('shop', '000'))
+
+
+def test_squashed_migration_replaces_migrations(tmp_path):
+    squashed = '''
+    replaces = [('shop', '0001_initial'), ('shop', '0002_renames')]
+    operations = [
+        migrations.CreateModel(name='Product', fields=[('id', models.AutoField(primary_key=True))]),
+    ]
+'''
+    root = write_app(tmp_path, {'0001_initial': INITIAL, '0002_renames': RENAMES, '0001_squashed_0002': squashed})
+
+    assert fields(build_migration_graph([str(root)])) == {'shop.Product': ['id']}
+
+
+def test_runs_without_django():
+    script = (
+        'import sys\n'
+        "sys.modules['django'] = None\n"
+        'from django_d2_models.static_migrations import main\n'
+        f'main([{str(APPS_DIR)!r}, "--auth-user-model", "users.User"])\n'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert 'chat.Message.".user" <-> users.User.".id"' in result.stdout
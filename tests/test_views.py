@@ -0,0 +1,102 @@
+import threading
+import time
+
+from django.test import RequestFactory
+
+from django_d2_models.graph_builder import GraphModelBuilder, ModelExportConfig
+from django_d2_models.renderer import GraphRenderer
+from django_d2_models.views import DiagramMemoryCache, DiagramView
+
+
+factory = RequestFactory()
+
+
+def test_d2_diagram_with_etag():
+    view = DiagramView.as_view(format='d2', cache=DiagramMemoryCache())
+
+    response = view(factory.get('/models.d2'))
+
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/plain; charset=utf-8'
+    expected = GraphRenderer().render_model_graph(GraphModelBuilder(ModelExportConfig()).build_graph())
+    assert response.content.decode() == expected
+    assert response['ETag'].startswith('"')
+
+    response = view(factory.get('/models.d2', HTTP_IF_NONE_MATCH=response['ETag']))
+
+    assert response.status_code == 304
+    assert response.content == b''
+
+
+def test_query_options_select_diagram():
+    view = DiagramView.as_view(format='d2', cache=DiagramMemoryCache())
+
+    full = view(factory.get('/models.d2'))
+    without_chat = view(factory.get('/models.d2', {'exclude_apps': 'chat', 'show_ref': 'no'}))
+
+    assert without_chat['ETag'] != full['ETag']
+    assert b'chat.' not in without_chat.content
+    assert view(factory.get('/models.d2', {'show_ref': 'maybe'})).status_code == 400
+    assert view(factory.get('/models.d2', {'abstract_models_depth': '-1'})).status_code == 400
+
+
+def test_svg_is_compiled_once(tmp_path):
+    d2 = tmp_path / 'd2'
+    log = tmp_path / 'runs.log'
+    d2.write_text(f'#!/bin/sh\necho run >> {log}\necho "<svg/>" > "$2"\n')
+    d2.chmod(0o755)
+    view = DiagramView.as_view(d2_binary=str(d2), cache=DiagramMemoryCache())
+
+    first = view(factory.get('/'))
+    second = view(factory.get('/'))
+
+    assert first['Content-Type'] == 'image/svg+xml'
+    assert first.content == second.content == b'<svg/>\n'
+    assert log.read_text() == 'run\n'
+
+
+def test_failed_compilation_is_server_error(tmp_path):
+    view = DiagramView.as_view(d2_binary=str(tmp_path / 'missing'), cache=DiagramMemoryCache())
+
+    response = view(factory.get('/'))
+
+    assert response.status_code == 500
+
+
+def test_cache_evicts_least_recently_used():
+    cache = DiagramMemoryCache(max_size=2)
+    builds = []
+
+    def build(key):
+        def build_():
+            builds.append(key)
+            return key.encode()
+        return build_
+
+    cache.get('a', build('a'))
+    cache.get('b', build('b'))
+    cache.get('a', build('a'))
+    cache.get('c', build('c'))
+    cache.get('a', build('a'))
+    cache.get('b', build('b'))
+
+    assert builds == ['a', 'b', 'c', 'b']
+
+
+def test_concurrent_requests_build_once():
+    cache = DiagramMemoryCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.1)
+        return b'diagram'
+
+    threads = [threading.Thread(target=cache.get, args=('key', build)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert cache.get('key', build).content == b'diagram'
@@ -0,0 +1,112 @@
+import os
+import sys
+
+import pytest
+from django.apps import apps
+from django.conf import settings
+from django.test import override_settings
+
+from django_d2_models.graph_builder import ModelExportConfig
+from django_d2_models.watch import DiagramWatcher, ModelFilesWatcher
+
+
+BASE_MODELS = '''
+from django.db import models
+
+
+class Stamped(models.Model):
+    created = models.DateTimeField()
+
+    class Meta:
+        abstract = True
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=50)
+'''
+
+CHILD_MODELS = '''
+from django.db import models
+
+from watch_base.models import Stamped
+
+
+class Post(Stamped):
+    title = models.CharField(max_length=100)
+'''
+
+APPS = ['watch_child', 'watch_base']
+"""Dependent app is installed first, so it has to be reordered on reload."""
+
+
+def write_module(path, source):
+    path.write_text(source)
+    # Make sure reload does not pick stale bytecode written in the same second.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+
+
+@pytest.fixture
+def project(tmp_path):
+    for name, source in (('watch_base', BASE_MODELS), ('watch_child', CHILD_MODELS)):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / '__init__.py').write_text('')
+        write_module(tmp_path / name / 'models.py', source)
+    sys.path.insert(0, str(tmp_path))
+    try:
+        with override_settings(INSTALLED_APPS=[*settings.INSTALLED_APPS, *APPS]):
+            yield tmp_path
+    finally:
+        sys.path.remove(str(tmp_path))
+        for name in [name for name in sys.modules if name.split('.')[0] in APPS]:
+            del sys.modules[name]
+        for label in APPS:
+            apps.all_models.pop(label, None)
+        apps.clear_cache()
+
+
+def field_names(graph, label):
+    node = next(node for node in graph.nodes if node.model._meta.label == label)
+    return [field_.name for field_ in node.fields]
+
+
+def test_changed_base_rebuilds_inheriting_app(project):
+    writes = []
+    watcher = DiagramWatcher(
+        ModelExportConfig(abstract_models_depth=0),
+        write=lambda graph, affected: writes.append((graph, affected)),
+    )
+    watcher.build()
+    assert field_names(writes[-1][0], 'watch_child.Post') == ['id', 'created', 'title']
+
+    write_module(project / 'watch_base' / 'models.py', BASE_MODELS.replace(
+        'created = models.DateTimeField()',
+        'created = models.DateTimeField()\n    updated = models.DateTimeField(null=True)',
+    ))
+    graph = watcher.update({'watch_base'})
+
+    assert field_names(graph, 'watch_child.Post') == ['id', 'created', 'updated', 'title']
+    assert writes[-1][1] == {'watch_base', 'watch_child'}
+    assert apps.get_model('watch_child.Post').__mro__[1] is sys.modules['watch_base.models'].Stamped
+
+
+def test_changed_dependent_does_not_reload_base(project):
+    watcher = DiagramWatcher(ModelExportConfig(), write=lambda graph, affected: None)
+    watcher.build()
+    post = apps.get_model('watch_child.Post')
+    tag = apps.get_model('watch_base.Tag')
+
+    watcher.update({'watch_child'})
+
+    assert apps.get_model('watch_child.Post') is not post
+    assert apps.get_model('watch_base.Tag') is tag
+
+
+def test_files_watcher_reports_changed_app(project):
+    watcher = ModelFilesWatcher([apps.get_app_config(label) for label in APPS])
+    assert watcher.poll() == set()
+
+    write_module(project / 'watch_base' / 'models.py', BASE_MODELS + '\n')
+
+    assert watcher.poll() == {'watch_base'}
+    assert watcher.poll() == set()